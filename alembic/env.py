@@ -8,6 +8,7 @@ from app.core.config import settings
 
 # Import Base
 from app.db.database import Base
+from app.db.migrations import migration_lock
 
 # ← QUAN TRỌNG: IMPORT TẤT CẢ MODELS Ở ĐÂY
 from app.models.user import User
@@ -47,7 +48,20 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def _run_migrations(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
+    # App truyền sẵn connection (đang giữ advisory lock) qua config.attributes
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -55,10 +69,10 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
-
-        with context.begin_transaction():
-            context.run_migrations()
+        # CLI cũng lấy advisory lock để không đua với app đang migrate
+        with migration_lock(connection):
+            _run_migrations(connection)
+            connection.commit()
 
 
 if context.is_offline_mode():
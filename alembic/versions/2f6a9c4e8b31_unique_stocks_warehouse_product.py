@@ -0,0 +1,58 @@
+"""Unique stocks (warehouse_id, product_id)
+
+Revision ID: 2f6a9c4e8b31
+Revises: 8e4d1b7a6c20
+Create Date: 2026-10-17 18:41:09.203517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2f6a9c4e8b31"
+down_revision: Union[str, None] = "8e4d1b7a6c20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Gộp các dòng trùng (get_or_create_stock đồng thời) vào dòng có id nhỏ nhất
+    op.execute(
+        """
+        WITH dup AS (
+            SELECT id,
+                   MIN(id) OVER w AS keep_id,
+                   SUM(COALESCE(quantity, 0)) OVER w AS total
+            FROM stocks
+            WINDOW w AS (PARTITION BY warehouse_id, product_id)
+        )
+        UPDATE stocks s SET quantity = dup.total
+        FROM dup
+        WHERE s.id = dup.id AND dup.id = dup.keep_id
+          AND EXISTS (
+              SELECT 1 FROM stocks o
+              WHERE o.warehouse_id = s.warehouse_id
+                AND o.product_id = s.product_id
+                AND o.id <> s.id
+          )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM stocks s
+        USING stocks keep
+        WHERE keep.warehouse_id = s.warehouse_id
+          AND keep.product_id = s.product_id
+          AND keep.id < s.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_stocks_warehouse_product", "stocks", ["warehouse_id", "product_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_stocks_warehouse_product", "stocks", type_="unique")
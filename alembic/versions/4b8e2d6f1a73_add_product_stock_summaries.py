@@ -0,0 +1,73 @@
+"""Add product_stock_summaries
+
+Revision ID: 4b8e2d6f1a73
+Revises: 7c3e1a5d9f42
+Create Date: 2026-10-17 21:05:48.391027
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8e2d6f1a73"
+down_revision: Union[str, None] = "7c3e1a5d9f42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_stock_summaries",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("on_hand", sa.Float(), nullable=False),
+        sa.Column("available", sa.Float(), nullable=False),
+        sa.Column("is_low_stock", sa.Boolean(), nullable=False),
+        sa.Column("last_movement_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    op.create_index(
+        "ix_product_stock_summaries_low_stock",
+        "product_stock_summaries",
+        ["product_id"],
+        unique=False,
+        postgresql_where=sa.text("is_low_stock"),
+    )
+
+    # Backfill từ dữ liệu hiện có
+    op.execute(
+        """
+        INSERT INTO product_stock_summaries
+            (product_id, on_hand, available, is_low_stock, last_movement_at, updated_at)
+        SELECT p.id,
+               COALESCE(s.on_hand, 0),
+               COALESCE(a.available, 0),
+               COALESCE(s.on_hand, 0) < COALESCE(p.min_stock, 0),
+               m.last_movement_at,
+               now()
+        FROM products p
+        LEFT JOIN (
+            SELECT product_id, SUM(quantity) AS on_hand FROM stocks GROUP BY product_id
+        ) s ON s.product_id = p.id
+        LEFT JOIN (
+            SELECT bs.product_id, SUM(bs.quantity) AS available
+            FROM batch_stocks bs JOIN batches b ON b.id = bs.batch_id
+            WHERE b.qc_status = 'passed' AND b.is_active
+            GROUP BY bs.product_id
+        ) a ON a.product_id = p.id
+        LEFT JOIN (
+            SELECT product_id, MAX(created_at) AS last_movement_at
+            FROM stock_movements GROUP BY product_id
+        ) m ON m.product_id = p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_stock_summaries_low_stock", table_name="product_stock_summaries")
+    op.drop_table("product_stock_summaries")
@@ -0,0 +1,63 @@
+"""Add document_counters
+
+Revision ID: 5b8f2d3c9a17
+Revises: c41f7a9e2d10
+Create Date: 2026-10-17 14:20:41.518302
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8f2d3c9a17"
+down_revision: Union[str, None] = "c41f7a9e2d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "document_counters",
+        sa.Column("scope", sa.String(length=50), nullable=False),
+        sa.Column("period", sa.String(length=8), nullable=False, server_default=""),
+        sa.Column("last_value", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("scope", "period"),
+    )
+
+    # Khởi tạo bộ đếm từ số lớn nhất đang có (giống app.core.numbering.sync_counters_sql)
+    op.execute(
+        r"""
+        INSERT INTO document_counters (scope, period, last_value)
+        SELECT scope, period, MAX(value)
+        FROM (
+            SELECT m[1] AS scope, m[2] AS period, m[3]::bigint AS value
+            FROM (SELECT regexp_match(batch_number, '^(BATCH)-(\d{8})-(\d+)$') AS m FROM batches) s
+            WHERE m IS NOT NULL
+            UNION ALL
+            SELECT m[1], m[2], m[3]::bigint
+            FROM (SELECT regexp_match(movement_number, '^([A-Z]{3})-(\d{8})-(\d+)$') AS m FROM stock_movements) s
+            WHERE m IS NOT NULL
+            UNION ALL
+            SELECT m[1], m[2], m[3]::bigint
+            FROM (SELECT regexp_match(order_number, '^(ORD-B2[BC])-(\d{8})-(\d+)$') AS m FROM orders) s
+            WHERE m IS NOT NULL
+            UNION ALL
+            SELECT m[1], m[2], m[3]::bigint
+            FROM (SELECT regexp_match(customer_code, '^(B2[BC])-(\d{8})-(\d+)$') AS m FROM customers) s
+            WHERE m IS NOT NULL
+            UNION ALL
+            SELECT m[1], m[2], m[3]::bigint
+            FROM (SELECT regexp_match(employee_code, '^(EMP)()(\d+)$') AS m FROM employees) s
+            WHERE m IS NOT NULL
+        ) existing
+        GROUP BY scope, period
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("document_counters")
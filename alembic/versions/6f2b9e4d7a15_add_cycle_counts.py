@@ -0,0 +1,71 @@
+"""Add cycle_counts
+
+Revision ID: 6f2b9e4d7a15
+Revises: e5a1c8f3b960
+Create Date: 2026-10-17 23:14:52.207931
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6f2b9e4d7a15"
+down_revision: Union[str, None] = "e5a1c8f3b960"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cycle_counts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("count_number", sa.String(length=50), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("note", sa.Text(), nullable=True),
+        sa.Column("line_count", sa.Integer(), nullable=False),
+        sa.Column("adjustment_count", sa.Integer(), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("approved_by", sa.Integer(), nullable=True),
+        sa.Column("approved_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["approved_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_cycle_counts_id"), "cycle_counts", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_cycle_counts_count_number"), "cycle_counts", ["count_number"], unique=True
+    )
+
+    op.create_table(
+        "cycle_count_lines",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cycle_count_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("batch_id", sa.Integer(), nullable=True),
+        sa.Column("counted_quantity", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["cycle_count_id"], ["cycle_counts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["batch_id"], ["batches.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_cycle_count_lines_count_product",
+        "cycle_count_lines",
+        ["cycle_count_id", "product_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cycle_count_lines_count_product", table_name="cycle_count_lines")
+    op.drop_table("cycle_count_lines")
+    op.drop_index(op.f("ix_cycle_counts_count_number"), table_name="cycle_counts")
+    op.drop_index(op.f("ix_cycle_counts_id"), table_name="cycle_counts")
+    op.drop_table("cycle_counts")
@@ -0,0 +1,63 @@
+"""Add stock_snapshots
+
+Revision ID: 7c3e1a5d9f42
+Revises: 2f6a9c4e8b31
+Create Date: 2026-10-17 20:12:36.814250
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e1a5d9f42"
+down_revision: Union[str, None] = "2f6a9c4e8b31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("snapshot_at", sa.DateTime(), nullable=False),
+        sa.Column("line_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("snapshot_at"),
+    )
+    op.create_index(op.f("ix_stock_snapshots_id"), "stock_snapshots", ["id"], unique=False)
+
+    op.create_table(
+        "stock_snapshot_lines",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("snapshot_id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("batch_id", sa.Integer(), nullable=True),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["snapshot_id"], ["stock_snapshots.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["batch_id"], ["batches.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_stock_snapshot_lines_snapshot_warehouse_product",
+        "stock_snapshot_lines",
+        ["snapshot_id", "warehouse_id", "product_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_stock_snapshot_lines_snapshot_warehouse_product",
+        table_name="stock_snapshot_lines",
+    )
+    op.drop_table("stock_snapshot_lines")
+    op.drop_index(op.f("ix_stock_snapshots_id"), table_name="stock_snapshots")
+    op.drop_table("stock_snapshots")
@@ -0,0 +1,84 @@
+"""Add batch_stocks
+
+Revision ID: 8e4d1b7a6c20
+Revises: 5b8f2d3c9a17
+Create Date: 2026-10-17 16:02:13.447120
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e4d1b7a6c20"
+down_revision: Union[str, None] = "5b8f2d3c9a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "batch_stocks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("batch_id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["batch_id"], ["batches.id"]),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("batch_id", "warehouse_id", name="uq_batch_stocks_batch_warehouse"),
+    )
+    op.create_index(op.f("ix_batch_stocks_id"), "batch_stocks", ["id"], unique=False)
+    op.create_index(
+        "ix_batch_stocks_warehouse_product",
+        "batch_stocks",
+        ["warehouse_id", "product_id"],
+        unique=False,
+    )
+
+    # Backfill batch đã nhập qua phiếu kho: nhập (+), xuất (-) theo từng kho
+    op.execute(
+        """
+        INSERT INTO batch_stocks (batch_id, warehouse_id, product_id, quantity, updated_at)
+        SELECT m.batch_id, m.warehouse_id, b.product_id,
+               GREATEST(SUM(CASE WHEN m.movement_type = 'EXPORT' THEN -m.quantity
+                                 ELSE m.quantity END), 0),
+               now()
+        FROM stock_movements m
+        JOIN batches b ON b.id = m.batch_id
+        WHERE EXISTS (
+            SELECT 1 FROM stock_movements i
+            WHERE i.batch_id = m.batch_id AND i.movement_type <> 'EXPORT'
+        )
+        GROUP BY m.batch_id, m.warehouse_id, b.product_id
+        """
+    )
+
+    # Batch chưa có phiếu nhập (tạo thẳng trong DB): current_quantity đặt vào
+    # kho duy nhất đang có tồn của product, product có tồn ở nhiều kho thì bỏ qua
+    op.execute(
+        """
+        INSERT INTO batch_stocks (batch_id, warehouse_id, product_id, quantity, updated_at)
+        SELECT b.id, s.warehouse_id, b.product_id, b.current_quantity, now()
+        FROM batches b
+        JOIN stocks s ON s.product_id = b.product_id
+        WHERE b.current_quantity > 0
+          AND NOT EXISTS (
+              SELECT 1 FROM stock_movements m
+              WHERE m.batch_id = b.id AND m.movement_type <> 'EXPORT'
+          )
+          AND (SELECT COUNT(*) FROM stocks s2 WHERE s2.product_id = b.product_id) = 1
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batch_stocks_warehouse_product", table_name="batch_stocks")
+    op.drop_index(op.f("ix_batch_stocks_id"), table_name="batch_stocks")
+    op.drop_table("batch_stocks")
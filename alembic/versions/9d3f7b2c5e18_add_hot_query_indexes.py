@@ -0,0 +1,60 @@
+"""Add FEFO, movement history and attendance lookup indexes
+
+Revision ID: 9d3f7b2c5e18
+Revises: 4b8e2d6f1a73
+Create Date: 2026-10-17 21:48:03.620514
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3f7b2c5e18"
+down_revision: Union[str, None] = "4b8e2d6f1a73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, columns, partial WHERE) - kiểm tra bằng app/scripts/check_query_plans.py
+# Unique (warehouse_id, product_id) của stocks đã có từ 2f6a9c4e8b31
+HOT_QUERY_INDEXES = [
+    ("ix_batches_product_id", "batches", ["product_id"], None),
+    (
+        "ix_batches_fefo",
+        "batches",
+        ["product_id", "expiry_date", "id"],
+        "qc_status = 'passed' AND is_active AND current_quantity > 0",
+    ),
+    (
+        "ix_stock_movements_product_created_at",
+        "stock_movements",
+        ["product_id", "created_at", "id"],
+        None,
+    ),
+    (
+        "ix_stock_movements_warehouse_created_at",
+        "stock_movements",
+        ["warehouse_id", "created_at", "id"],
+        None,
+    ),
+    ("ix_attendance_employee_date", "attendance", ["employee_id", "date", "id"], None),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, where in HOT_QUERY_INDEXES:
+        op.create_index(
+            name,
+            table,
+            columns,
+            postgresql_where=sa.text(where) if where else None,
+        )
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(HOT_QUERY_INDEXES):
+        op.drop_index(name, table_name=table)
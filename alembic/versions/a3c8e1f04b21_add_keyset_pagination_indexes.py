@@ -0,0 +1,38 @@
+"""Add keyset pagination indexes
+
+Revision ID: a3c8e1f04b21
+Revises: d7c521b265be
+Create Date: 2026-10-17 09:12:41.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c8e1f04b21"
+down_revision: Union[str, None] = "d7c521b265be"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, columns) - khớp với ORDER BY ... DESC, id DESC của cursor pagination
+KEYSET_INDEXES = [
+    ("ix_stock_movements_created_at_id", "stock_movements", ["created_at", "id"]),
+    ("ix_orders_created_at_id", "orders", ["created_at", "id"]),
+    ("ix_attendance_date_id", "attendance", ["date", "id"]),
+    ("ix_qc_inspections_started_at_id", "qc_inspections", ["started_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in KEYSET_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(KEYSET_INDEXES):
+        op.drop_index(name, table_name=table)
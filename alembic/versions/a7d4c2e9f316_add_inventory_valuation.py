@@ -0,0 +1,88 @@
+"""Add inventory valuation (stock_movements.unit_cost, inventory_valuations, cost_layers)
+
+Revision ID: a7d4c2e9f316
+Revises: 6f2b9e4d7a15
+Create Date: 2026-10-18 09:41:27.583104
+
+Sau upgrade chạy `python -m app.scripts.rebuild_valuation` để tính giá trị
+tồn từ các movement đã có.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d4c2e9f316"
+down_revision: Union[str, None] = "6f2b9e4d7a15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("stock_movements", sa.Column("unit_cost", sa.Float(), nullable=True))
+
+    # Phiếu nhập cũ: giá vốn hiện tại của sản phẩm
+    op.execute(
+        """
+        UPDATE stock_movements m
+        SET unit_cost = COALESCE(p.cost_price, 0)
+        FROM products p
+        WHERE p.id = m.product_id AND m.movement_type = 'IMPORT'
+        """
+    )
+
+    op.create_table(
+        "inventory_valuations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("fifo_value", sa.Float(), nullable=False),
+        sa.Column("average_value", sa.Float(), nullable=False),
+        sa.Column("average_cost", sa.Float(), nullable=False),
+        sa.Column("last_movement_id", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "warehouse_id", "product_id", name="uq_inventory_valuations_warehouse_product"
+        ),
+    )
+    op.create_index(
+        op.f("ix_inventory_valuations_id"), "inventory_valuations", ["id"], unique=False
+    )
+
+    op.create_table(
+        "cost_layers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("movement_id", sa.Integer(), nullable=True),
+        sa.Column("unit_cost", sa.Float(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("remaining_quantity", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["movement_id"], ["stock_movements.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_cost_layers_open",
+        "cost_layers",
+        ["warehouse_id", "product_id", "id"],
+        unique=False,
+        postgresql_where=sa.text("remaining_quantity > 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cost_layers_open", table_name="cost_layers")
+    op.drop_table("cost_layers")
+    op.drop_index(op.f("ix_inventory_valuations_id"), table_name="inventory_valuations")
+    op.drop_table("inventory_valuations")
+    op.drop_column("stock_movements", "unit_cost")
@@ -0,0 +1,33 @@
+"""Add version to stocks and batches
+
+Revision ID: c3e8f1a5b247
+Revises: a7d4c2e9f316
+Create Date: 2026-10-18 14:12:05.361942
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e8f1a5b247"
+down_revision: Union[str, None] = "a7d4c2e9f316"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "stocks", sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+    )
+    op.add_column(
+        "batches", sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("batches", "version")
+    op.drop_column("stocks", "version")
@@ -0,0 +1,46 @@
+"""Add users.permission_bits
+
+Revision ID: c41f7a9e2d10
+Revises: a3c8e1f04b21
+Create Date: 2026-10-17 11:03:27.904113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f7a9e2d10"
+down_revision: Union[str, None] = "a3c8e1f04b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("permission_bits", sa.Numeric(), nullable=False, server_default="0"),
+    )
+
+    # Backfill: tổng 2^permission_id (distinct) = OR các bit
+    op.execute(
+        """
+        UPDATE users u
+        SET permission_bits = bits.value
+        FROM (
+            SELECT ur.user_id, SUM(DISTINCT trunc(power(2::numeric, rp.permission_id))) AS value
+            FROM user_roles ur
+            JOIN roles r ON r.id = ur.role_id AND r.is_active
+            JOIN role_permissions rp ON rp.role_id = r.id
+            GROUP BY ur.user_id
+        ) bits
+        WHERE u.id = bits.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "permission_bits")
@@ -0,0 +1,48 @@
+"""Add stock_movements.to_warehouse_id for transfers
+
+Revision ID: e5a1c8f3b960
+Revises: 9d3f7b2c5e18
+Create Date: 2026-10-17 22:31:17.084562
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a1c8f3b960"
+down_revision: Union[str, None] = "9d3f7b2c5e18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "stock_movements", sa.Column("to_warehouse_id", sa.Integer(), nullable=True)
+    )
+    op.create_foreign_key(
+        "stock_movements_to_warehouse_id_fkey",
+        "stock_movements",
+        "warehouses",
+        ["to_warehouse_id"],
+        ["id"],
+    )
+    op.create_index(
+        "ix_stock_movements_to_warehouse_created_at",
+        "stock_movements",
+        ["to_warehouse_id", "created_at", "id"],
+        postgresql_where=sa.text("to_warehouse_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_stock_movements_to_warehouse_created_at", table_name="stock_movements"
+    )
+    op.drop_constraint(
+        "stock_movements_to_warehouse_id_fkey", "stock_movements", type_="foreignkey"
+    )
+    op.drop_column("stock_movements", "to_warehouse_id")
@@ -1,10 +1,15 @@
-from fastapi import Depends, status
+from typing import Optional
+
+from fastapi import Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.core.config import settings
+from app.core.principal import Principal, principal_cache
 from app.models.user import User
 from app.schemas.token import TokenData
 from app.core.exceptions import UnauthorizedError, InactiveUserError
@@ -12,16 +17,8 @@ from app.core.exceptions import UnauthorizedError, InactiveUserError
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    """
-    Dependency: Lấy current user từ JWT token
-
-    Raises:
-        UnauthorizedError: Token không hợp lệ, hết hạn, hoặc user không tồn tại
-        InactiveUserError: User bị vô hiệu hóa
-    """
+def _decode_token(token: str) -> TokenData:
+    """Giải mã JWT và lấy username (sub)"""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -31,16 +28,65 @@ def get_current_user(
         if username is None:
             raise UnauthorizedError("Token không hợp lệ: thiếu thông tin username.")
 
-        token_data = TokenData(username=username)
+        perms = payload.get("perms")
+        return TokenData(
+            username=username,
+            is_superuser=payload.get("su"),
+            permission_bits=int(perms, 16) if perms is not None else None,
+        )
 
     except JWTError as e:
         raise UnauthorizedError(
             detail="Token không hợp lệ hoặc đã hết hạn. Vui lòng đăng nhập lại."
         )
 
-    # Query user
-    user = db.query(User).filter(User.username == token_data.username).first()
 
+def _user_query(username: str):
+    # Quyền đã materialize ở users.permission_bits, không cần load roles
+    return select(User).where(User.username == username)
+
+
+def load_principal(db: Session, token: str, username: str) -> Optional[Principal]:
+    """
+    Principal của token: lấy từ principal cache, miss thì query DB rồi cache
+
+    Chỉ cache user đang active để user bị khóa luôn bị kiểm tra lại.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation
+    user = db.execute(_user_query(username)).scalars().first()
+    if user is None:
+        return None
+
+    principal = Principal.from_user(user)
+    if principal.is_active:
+        principal_cache.put(token, principal, generation)
+    return principal
+
+
+async def load_principal_async(
+    db: AsyncSession, token: str, username: str
+) -> Optional[Principal]:
+    """Giống load_principal nhưng query qua AsyncSession"""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation
+    user = (await db.execute(_user_query(username))).scalars().first()
+    if user is None:
+        return None
+
+    principal = Principal.from_user(user)
+    if principal.is_active:
+        principal_cache.put(token, principal, generation)
+    return principal
+
+
+def _ensure_active(user: Optional[Principal]) -> Principal:
     if user is None:
         raise UnauthorizedError("User không tồn tại.")
 
@@ -50,9 +96,68 @@ def get_current_user(
     return user
 
 
+def request_principal(
+    request: Request, db: Session, token: str, username: str
+) -> Principal:
+    """
+    Principal của request, load tối đa 1 lần / request
+
+    get_current_user và require_permission cùng gọi hàm này: route dùng cả 2
+    chỉ tra cache / query user 1 lần (lưu ở request.state).
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = _ensure_active(load_principal(db, token, username))
+        request.state.principal = principal
+    return principal
+
+
+async def request_principal_async(
+    request: Request, db: AsyncSession, token: str, username: str
+) -> Principal:
+    """Giống request_principal nhưng query qua AsyncSession"""
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = _ensure_active(await load_principal_async(db, token, username))
+        request.state.principal = principal
+    return principal
+
+
+def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    Dependency: Lấy current user (Principal) từ JWT token
+
+    Cache hit thì không chạy SQL nào. Dùng chung session của request (get_db).
+
+    Raises:
+        UnauthorizedError: Token không hợp lệ, hết hạn, hoặc user không tồn tại
+        InactiveUserError: User bị vô hiệu hóa
+    """
+    token_data = _decode_token(token)
+
+    return request_principal(request, db, token, token_data.username)
+
+
+async def get_current_user_async(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """
+    Dependency (async): Lấy current user (Principal) từ JWT token qua AsyncSession
+    """
+    token_data = _decode_token(token)
+
+    return await request_principal_async(request, db, token, token_data.username)
+
+
 def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     Dependency: Chỉ cho phép superuser
 
@@ -1,9 +1,42 @@
-from fastapi import Depends, status
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.models.user import User
-from app.api.dependencies.auth import get_current_user
+
+from app.db.database import get_db, get_async_db
+from app.api.dependencies.auth import (
+    _decode_token,
+    oauth2_scheme,
+    request_principal,
+    request_principal_async,
+)
+from app.core.config import settings
 from app.core.exceptions import PermissionDeniedError
+from app.core.permission_bits import has_bit, permission_registry
+from app.schemas.token import TokenData
+
+
+def _check_permission(is_superuser: bool, permission_bits: int, permission_name: str):
+    # Superuser có mọi quyền, còn lại là 1 phép test bit
+    if is_superuser or has_bit(permission_bits, permission_registry.bit(permission_name)):
+        return
+
+    # Chỉ đổi bitset -> tên khi từ chối (message lỗi)
+    user_permissions = permission_registry.names(permission_bits)
+    raise PermissionDeniedError(
+        permission_name=permission_name,
+        detail=f"Bạn không có quyền '{permission_name}'. "
+        f"Quyền hiện tại: {', '.join(user_permissions) or 'Không có quyền nào'}. "
+        f"Vui lòng liên hệ quản trị viên để được cấp quyền.",
+    )
+
+
+def _claims(token_data: TokenData) -> Optional[TokenData]:
+    """Token có claim quyền (JWT_PERMISSIONS_CLAIM) thì check không cần load user"""
+    if settings.JWT_PERMISSIONS_CLAIM and token_data.permission_bits is not None:
+        return token_data
+    return None
 
 
 def require_permission(permission_name: str):
@@ -26,27 +59,43 @@ def require_permission(permission_name: str):
     """
 
     def permission_checker(
-        db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+        request: Request,
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db),
+    ):
+        token_data = _decode_token(token)
+        claims = _claims(token_data)
+        if claims is not None:
+            _check_permission(claims.is_superuser, claims.permission_bits, permission_name)
+            return True
+
+        user = request_principal(request, db, token, token_data.username)
+        _check_permission(user.is_superuser, user.permission_bits, permission_name)
+        return True
+
+    return Depends(permission_checker)
+
+
+def require_permission_async(permission_name: str):
+    """
+    Dependency (async): Giống require_permission nhưng load user qua AsyncSession
+
+    Dùng cho các route `async def` để toàn bộ request chạy trên event loop.
+    """
+
+    async def permission_checker(
+        request: Request,
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db),
     ):
-        # Superuser có mọi quyền
-        if current_user.is_superuser:
-            return
-
-        # Collect tất cả permissions từ các roles của user
-        user_permissions = set()
-        for role in current_user.roles:
-            if role.is_active:  # Chỉ check role đang active
-                user_permissions.update(perm.name for perm in role.permissions)
-
-        # Kiểm tra permission
-        if permission_name not in user_permissions:
-            raise PermissionDeniedError(
-                permission_name=permission_name,
-                detail=f"Bạn không có quyền '{permission_name}'. "
-                f"Quyền hiện tại: {', '.join(sorted(user_permissions)) or 'Không có quyền nào'}. "
-                f"Vui lòng liên hệ quản trị viên để được cấp quyền.",
-            )
+        token_data = _decode_token(token)
+        claims = _claims(token_data)
+        if claims is not None:
+            _check_permission(claims.is_superuser, claims.permission_bits, permission_name)
+            return True
 
+        user = await request_principal_async(request, db, token, token_data.username)
+        _check_permission(user.is_superuser, user.permission_bits, permission_name)
         return True
 
     return Depends(permission_checker)
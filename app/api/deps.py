@@ -1,131 +1,31 @@
 """
 API Dependencies
 FastAPI dependencies for authentication, database session, etc.
-"""
-
-from typing import Generator
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-
-from app.db.database import SessionLocal
-from app.core.config import settings
-from app.models.user import User
-
-# OAuth2 scheme for token authentication
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
-
-
-def get_db() -> Generator:
-    """
-    Database session dependency
-
-    Yields:
-        Session: SQLAlchemy database session
-
-    Example:
-        @router.get("/users")
-        def get_users(db: Session = Depends(get_db)):
-            return db.query(User).all()
-    """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    """
-    Get current authenticated user from JWT token
-
-    Args:
-        db: Database session
-        token: JWT access token from Authorization header
-
-    Returns:
-        User: Current authenticated user
-
-    Raises:
-        HTTPException: 401 if token invalid or user not found
-
-    Example:
-        @router.get("/me")
-        def get_me(user: User = Depends(get_current_user)):
-            return user
-    """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        # Decode JWT token
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
 
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-
-    except JWTError:
-        raise credentials_exception
-
-    # Get user from database
-    user = db.query(User).filter(User.username == username).first()
-
-    if user is None:
-        raise credentials_exception
-
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
-        )
-
-    return user
-
-
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
-    """
-    Verify current user is active
-
-    Args:
-        current_user: User from get_current_user
-
-    Returns:
-        User: Active user
-
-    Raises:
-        HTTPException: 403 if user inactive
-    """
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
-        )
-    return current_user
-
-
-def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
-    """
-    Verify current user is superuser
-
-    Args:
-        current_user: User from get_current_user
-
-    Returns:
-        User: Superuser
+Chỉ re-export từ app.db.database và app.api.dependencies.auth: FastAPI cache
+dependency theo function object, 2 bản get_db / get_current_user khác nhau
+sẽ mở 2 session và load user 2 lần trong cùng 1 request.
+"""
 
-    Raises:
-        HTTPException: 403 if not superuser
-    """
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions. Superuser required.",
-        )
-    return current_user
+from app.db.database import get_db, get_async_db
+from app.api.dependencies.auth import (
+    get_current_active_superuser,
+    get_current_user,
+    get_current_user_async,
+    oauth2_scheme,
+)
+
+# Tên cũ: get_current_user đã kiểm tra is_active
+get_current_active_user = get_current_user
+get_current_superuser = get_current_active_superuser
+
+__all__ = [
+    "get_db",
+    "get_async_db",
+    "oauth2_scheme",
+    "get_current_user",
+    "get_current_user_async",
+    "get_current_active_user",
+    "get_current_superuser",
+    "get_current_active_superuser",
+]
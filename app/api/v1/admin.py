@@ -0,0 +1,32 @@
+"""
+Admin API Endpoints - Vận hành hệ thống (pool, metrics, ...)
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.db.database import get_engines
+from app.db.pool import pool_status
+from app.api.dependencies.auth import get_current_active_superuser
+from app.models.user import User as UserModel
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/db/pool")
+def get_db_pool_status(
+    current_user: UserModel = Depends(get_current_active_superuser),
+):
+    """
+    ## Trạng thái connection pool của worker hiện tại
+
+    **Yêu cầu:** Chỉ Superuser/Admin
+
+    **Response (theo từng engine):**
+    - `size`, `checked_out`, `checked_in`, `overflow`: trạng thái pool hiện tại
+    - `checkouts_total`, `timeouts_total`: số lần lấy connection / bị timeout
+    - `wait_seconds_avg`, `wait_seconds_max`: thời gian chờ connection
+
+    **Lưu ý:** Số liệu là của 1 worker (process). Chạy nhiều uvicorn worker
+    thì mỗi worker có pool riêng.
+    """
+    return {name: pool_status(engine) for name, engine in get_engines().items()}
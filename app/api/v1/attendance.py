@@ -3,11 +3,13 @@ Attendance API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, get_read_db
+from app.db.counting import COUNT_STRATEGY_PATTERN, is_estimate
 from app.schemas.attendance import (
     Attendance,
     AttendanceCheckIn,
@@ -17,8 +19,11 @@ from app.schemas.attendance import (
 )
 from app.schemas.common import PaginatedResponse
 from app.services.attendance_service import AttendanceService
-from app.api.dependencies.auth import get_current_user
-from app.api.dependencies.permissions import require_permission
+from app.api.dependencies.auth import get_current_user, get_current_user_async
+from app.api.dependencies.permissions import (
+    require_permission,
+    require_permission_async,
+)
 from app.models.user import User as UserModel
 
 router = APIRouter(tags=["Attendance"])
@@ -28,12 +33,12 @@ router = APIRouter(tags=["Attendance"])
     "/attendance/check-in",
     response_model=Attendance,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[require_permission("hr:read")],
+    dependencies=[require_permission_async("hr:read")],
 )
-def check_in(
+async def check_in(
     check_in_data: AttendanceCheckIn,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
 ):
     """
     Chấm công vào
@@ -41,7 +46,7 @@ def check_in(
     Auto-calculate late_minutes nếu check_in > 9:00
     """
     try:
-        return AttendanceService.check_in(db, check_in_data)
+        return await AttendanceService.check_in_async(db, check_in_data)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -49,12 +54,12 @@ def check_in(
 @router.post(
     "/attendance/check-out",
     response_model=Attendance,
-    dependencies=[require_permission("hr:read")],
+    dependencies=[require_permission_async("hr:read")],
 )
-def check_out(
+async def check_out(
     check_out_data: AttendanceCheckOut,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
 ):
     """
     Chấm công ra
@@ -62,7 +67,7 @@ def check_out(
     Auto-calculate overtime_minutes và work_hours
     """
     try:
-        return AttendanceService.check_out(db, check_out_data)
+        return await AttendanceService.check_out_async(db, check_out_data)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -101,23 +106,53 @@ def get_attendance_records(
     employee_id: Optional[int] = Query(default=None),
     start_date: Optional[date] = Query(default=None),
     end_date: Optional[date] = Query(default=None),
+    pagination: str = Query(default="offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor của trang trước"),
+    count: str = Query(
+        default="exact",
+        pattern=COUNT_STRATEGY_PATTERN,
+        description="Cách tính total: exact | estimated | cached | none",
+    ),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
-    """Lấy danh sách attendance records"""
+    """
+    Lấy danh sách attendance records
+
+    pagination=cursor (hoặc truyền cursor): phân trang keyset theo
+    (date, id), không trả total; dùng next_cursor để lấy trang tiếp.
+    """
+    if pagination == "cursor" or cursor:
+        records, next_cursor = AttendanceService.get_attendance_records_keyset(
+            db=db,
+            limit=page_size,
+            cursor=cursor,
+            employee_id=employee_id,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return PaginatedResponse.create_cursor(
+            items=records, page_size=page_size, next_cursor=next_cursor
+        )
+
     skip = (page - 1) * page_size
 
     records, total = AttendanceService.get_attendance_records(
         db=db,
         skip=skip,
         limit=page_size,
+        count=count,
         employee_id=employee_id,
         start_date=start_date,
         end_date=end_date,
     )
 
     return PaginatedResponse.create(
-        items=records, total=total, page=page, page_size=page_size
+        items=records,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_is_estimate=is_estimate(count),
     )
 
 
@@ -129,7 +164,7 @@ def get_attendance_records(
 def get_monthly_report(
     employee_id: int,
     month: str = Query(..., description="Format: YYYY-MM, VD: 2025-11"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
 ):
     """
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.schemas.user import User, UserCreate
 from app.schemas.token import Token
 from app.services.auth_service import AuthService
@@ -35,11 +36,14 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    # bcrypt chạy trên password pool, pool đầy thì 429 (TooManyRequestsError)
+    user = await AuthService.authenticate_user_async(
+        db, form_data.username, form_data.password
+    )
 
     if not user:
         raise HTTPException(
@@ -50,7 +54,7 @@ def login(
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=access_token_expires, user=user
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.db.database import get_db
+from app.db.counting import COUNT_STRATEGY_PATTERN, is_estimate
 from app.schemas.customer import Customer, CustomerCreate, CustomerUpdate
 from app.schemas.common import PaginatedResponse
 from app.services.customer_service import CustomerService
@@ -58,6 +59,11 @@ def get_customers(
     search: Optional[str] = Query(default=None),
     customer_type: Optional[str] = Query(default=None, pattern="^(b2c|b2b)$"),
     is_active: Optional[bool] = Query(default=None),
+    count: str = Query(
+        default="exact",
+        pattern=COUNT_STRATEGY_PATTERN,
+        description="Cách tính total: exact | estimated | cached | none",
+    ),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
@@ -68,13 +74,18 @@ def get_customers(
         db=db,
         skip=skip,
         limit=page_size,
+        count=count,
         search=search,
         customer_type=customer_type,
         is_active=is_active,
     )
 
     return PaginatedResponse.create(
-        items=customers, total=total, page=page, page_size=page_size
+        items=customers,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_is_estimate=is_estimate(count),
     )
 
 
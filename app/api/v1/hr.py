@@ -6,7 +6,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
+from app.db.counting import COUNT_STRATEGY_PATTERN, is_estimate
 from app.schemas.hr import (
     Department,
     DepartmentCreate,
@@ -247,7 +248,12 @@ def get_employees(
     position_id: Optional[int] = Query(default=None),
     employment_status: Optional[str] = Query(default=None),
     search: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
+    count: str = Query(
+        default="exact",
+        pattern=COUNT_STRATEGY_PATTERN,
+        description="Cách tính total: exact | estimated | cached | none",
+    ),
+    db: Session = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
 ):
     """
@@ -261,6 +267,7 @@ def get_employees(
         db=db,
         skip=skip,
         limit=page_size,
+        count=count,
         department_id=department_id,
         position_id=position_id,
         employment_status=employment_status,
@@ -268,7 +275,11 @@ def get_employees(
     )
 
     return PaginatedResponse.create(
-        items=employees, total=total, page=page, page_size=page_size
+        items=employees,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_is_estimate=is_estimate(count),
     )
 
 
@@ -2,11 +2,18 @@
 Inventory API Endpoints - Warehouses, Batches, Stock, Movements
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
+from datetime import date, datetime, time, timedelta
 
-from app.db.database import get_db
+from app.core.config import settings
+from app.core.exceptions import ConcurrentUpdateError
+from app.db.database import get_db, get_async_db, get_read_db, get_async_read_db
+from app.db.counting import COUNT_STRATEGY_PATTERN, is_estimate
 from app.schemas.inventory import (
     Warehouse,
     WarehouseCreate,
@@ -15,9 +22,20 @@ from app.schemas.inventory import (
     BatchUpdate,
     Stock,
     StockSummary,
+    StockSnapshot,
+    StockAsOf,
     StockMovement,
     StockMovementCreate,
     StockMovementWithDetails,
+    StockMovementBulkResult,
+    StockTransferCreate,
+    CycleCount,
+    CycleCountCreate,
+    CycleCountLineCreate,
+    CycleCountUploadResult,
+    CycleCountVariance,
+    InventoryValuationItem,
+    InventoryValuationReport,
 )
 from app.schemas.common import PaginatedResponse
 from app.services.inventory_service import (
@@ -26,12 +44,21 @@ from app.services.inventory_service import (
     StockService,
     StockMovementService,
 )
-from app.api.dependencies.auth import get_current_user
-from app.api.dependencies.permissions import require_permission
+from app.services.cycle_count_service import CycleCountService, MAX_UPLOAD_ERRORS
+from app.services.stock_ledger_service import StockLedgerService
+from app.services.stock_transfer_service import StockTransferService
+from app.services.valuation_service import ValuationService
+from app.api.dependencies.auth import get_current_user, get_current_user_async
+from app.api.dependencies.permissions import (
+    require_permission,
+    require_permission_async,
+)
 from app.models.user import User as UserModel
 
 router = APIRouter(tags=["Inventory"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 # ============= WAREHOUSES =============
 
@@ -117,6 +144,9 @@ def update_batch_qc(
     """
     Cập nhật QC status của batch
 
+    Gửi kèm version (lấy từ GET) để không ghi đè thay đổi của người khác:
+    batch đã đổi từ lúc đọc thì trả 409.
+
     Permission: qc:perform
     Roles: QC_STAFF, ADMIN
     """
@@ -130,11 +160,15 @@ def update_batch_qc(
         )
 
     if batch_update.qc_status:
-        db_batch.qc_status = batch_update.qc_status
+        BatchService.set_qc_status(
+            db, db_batch, batch_update.qc_status, expected_version=batch_update.version
+        )
+    elif batch_update.version is not None and batch_update.version != db_batch.version:
+        raise ConcurrentUpdateError("Batch", batch_id)
     if batch_update.qc_note:
         db_batch.qc_note = batch_update.qc_note
 
-    db.commit()
+    db.flush()
     db.refresh(db_batch)
 
     return db_batch
@@ -178,25 +212,33 @@ def get_stock(
 )
 def get_stock_summary(
     product_id: Optional[int] = Query(default=None),
-    db: Session = Depends(get_db),
+    skip: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
 ):
     """
     Tổng hợp tồn kho theo sản phẩm
 
     Permission: inventory:read
+
+    Đọc từ product_stock_summaries (cập nhật cùng transaction với phiếu kho),
+    không phụ thuộc số kho. skip / limit để lấy từng trang theo product_id.
     """
-    results = StockService.get_stock_summary(db, product_id)
+    results = StockService.get_stock_summary(db, product_id, skip, limit)
 
     # Transform to StockSummary
     summary_list = []
-    for row in results:
+    for summary, sku, name in results:
         summary_list.append(
             StockSummary(
-                product_id=row[0],
-                product_sku=row[1],
-                product_name=row[2],
-                total_quantity=row[3],
+                product_id=summary.product_id,
+                product_sku=sku,
+                product_name=name,
+                total_quantity=summary.on_hand,
+                available_quantity=summary.available,
+                is_low_stock=summary.is_low_stock,
+                last_movement_at=summary.last_movement_at,
                 warehouses=[],  # TODO: Add warehouse breakdown
             )
         )
@@ -204,6 +246,141 @@ def get_stock_summary(
     return summary_list
 
 
+@router.get(
+    "/stock/as-of",
+    response_model=StockAsOf,
+    dependencies=[require_permission_async("inventory:read")],
+)
+async def get_stock_as_of(
+    at: Optional[datetime] = Query(default=None, description="Thời điểm (UTC nếu không có timezone)"),
+    on: Optional[date] = Query(default=None, description="Tồn cuối ngày (hết ngày, UTC)"),
+    warehouse_id: Optional[int] = Query(default=None),
+    product_id: Optional[int] = Query(default=None),
+    by_batch: bool = Query(default=False, description="Tách theo batch"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Tồn kho tại 1 thời điểm trong quá khứ (đối soát cuối tháng, audit)
+
+    Permission: inventory:read
+
+    Tính từ snapshot gần nhất trước thời điểm + các movement sau snapshot đó.
+    Truyền `at` (datetime) hoặc `on` (ngày, lấy tồn cuối ngày).
+    """
+    if (at is None) == (on is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Truyền 1 trong 2 tham số at hoặc on.",
+        )
+    if on is not None:
+        at = datetime.combine(on + timedelta(days=1), time.min)
+
+    return await StockLedgerService.get_stock_as_of_async(
+        db, at, warehouse_id=warehouse_id, product_id=product_id, by_batch=by_batch
+    )
+
+
+@router.post(
+    "/stock/snapshots",
+    response_model=StockSnapshot,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[require_permission("inventory:manage")],
+)
+def create_stock_snapshot(
+    snapshot_at: Optional[datetime] = Query(
+        default=None, description="Mặc định 00:00 UTC hôm nay"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Tạo snapshot tồn kho (thường chạy định kỳ qua app.scripts.stock_snapshot)
+
+    Permission: inventory:manage
+    """
+    try:
+        return StockLedgerService.create_snapshot(db, snapshot_at)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/stock/snapshots",
+    response_model=list[StockSnapshot],
+    dependencies=[require_permission("inventory:read")],
+)
+def get_stock_snapshots(
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Danh sách snapshot tồn kho, mới nhất trước"""
+    return StockLedgerService.get_snapshots(db, limit)
+
+
+@router.get(
+    "/stock/valuation",
+    response_model=InventoryValuationReport,
+    dependencies=[require_permission("inventory:read")],
+)
+def get_stock_valuation(
+    method: str = Query(default="fifo", pattern="^(fifo|average)$"),
+    group_by: str = Query(
+        default="warehouse", pattern="^(warehouse|category|warehouse_category)$"
+    ),
+    warehouse_id: Optional[int] = Query(default=None),
+    category_id: Optional[int] = Query(default=None),
+    db: Session = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Giá trị tồn kho theo kho / danh mục
+
+    Permission: inventory:read
+
+    Đọc từ inventory_valuations (FIFO và bình quân gia quyền cập nhật cùng
+    transaction với phiếu kho), không chạy lại lịch sử movement.
+    """
+    return ValuationService.get_report(
+        db, method=method, group_by=group_by, warehouse_id=warehouse_id, category_id=category_id
+    )
+
+
+@router.get(
+    "/stock/valuation/items",
+    response_model=list[InventoryValuationItem],
+    dependencies=[require_permission("inventory:read")],
+)
+def get_stock_valuation_items(
+    warehouse_id: Optional[int] = Query(default=None),
+    product_id: Optional[int] = Query(default=None),
+    category_id: Optional[int] = Query(default=None),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Giá trị tồn theo (kho, sản phẩm) còn hàng"""
+    results = ValuationService.get_valuations(
+        db, warehouse_id, product_id, category_id, skip, limit
+    )
+    return [
+        InventoryValuationItem(
+            warehouse_id=valuation.warehouse_id,
+            product_id=valuation.product_id,
+            product_sku=sku,
+            product_name=name,
+            quantity=valuation.quantity,
+            fifo_value=valuation.fifo_value,
+            average_value=valuation.average_value,
+            average_cost=valuation.average_cost,
+            updated_at=valuation.updated_at,
+        )
+        for valuation, sku, name in results
+    ]
+
+
 # ============= STOCK MOVEMENTS =============
 
 
@@ -211,12 +388,12 @@ def get_stock_summary(
     "/stock/import",
     response_model=StockMovement,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[require_permission("inventory:manage")],
+    dependencies=[require_permission_async("inventory:manage")],
 )
-def import_stock(
+async def import_stock(
     movement: StockMovementCreate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
 ):
     """
     Nhập kho
@@ -232,21 +409,23 @@ def import_stock(
     movement.movement_type = "import"
 
     try:
-        return StockMovementService.import_stock(db, movement, current_user.id)
+        return await StockMovementService.import_stock_async(
+            db, movement, current_user.id
+        )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post(
     "/stock/export",
-    response_model=StockMovement,
+    response_model=List[StockMovement],
     status_code=status.HTTP_201_CREATED,
-    dependencies=[require_permission("inventory:manage")],
+    dependencies=[require_permission_async("inventory:manage")],
 )
-def export_stock(
+async def export_stock(
     movement: StockMovementCreate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
 ):
     """
     Xuất kho
@@ -255,50 +434,500 @@ def export_stock(
     Roles: WAREHOUSE_STAFF, ADMIN
 
     Flow:
-    - Kiểm tra đủ tồn kho
-    - Tự động chọn batch theo FEFO (nếu không chỉ định)
-    - Tạo stock movement
-    - Cập nhật stock quantity
-    - Cập nhật batch quantity
+    - Chia số lượng cho các batch QC passed của kho theo FEFO (nếu không chỉ định batch)
+    - Tạo 1 stock movement cho mỗi batch (trả về danh sách)
+    - Cập nhật tồn theo lô, batch quantity, stock quantity
+    - Không đủ tồn kho -> 400, không ghi gì
     """
     movement.movement_type = "export"
 
     try:
-        return StockMovementService.export_stock(db, movement, current_user.id)
+        return await StockMovementService.export_stock_async(
+            db, movement, current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        ".".join(str(part) for part in error["loc"]) + f": {error['msg']}"
+        if error["loc"]
+        else error["msg"]
+        for error in exc.errors()
+    )
+
+
+def _bulk_request_body(schema: Type[BaseModel]) -> dict:
+    """openapi_extra cho endpoint bulk: array của schema, JSON hoặc NDJSON"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": f"#/components/schemas/{schema.__name__}"},
+                    }
+                }
+                for media_type in ("application/json", NDJSON_MEDIA_TYPE)
+            },
+        }
+    }
+
+
+def _bulk_result(results: Dict[int, dict]) -> StockMovementBulkResult:
+    ordered = [results[line] for line in sorted(results)]
+    succeeded = sum(1 for result in ordered if result["success"])
+    return StockMovementBulkResult(
+        total=len(ordered),
+        succeeded=succeeded,
+        failed=len(ordered) - succeeded,
+        results=ordered,
+    )
+
+
+async def _iter_bulk_lines(
+    request: Request, schema: Type[BaseModel]
+) -> AsyncIterator[Tuple[int, Optional[BaseModel], Optional[str]]]:
+    """
+    Đọc body bulk: JSON array, hoặc NDJSON (Content-Type: application/x-ndjson)
+    đọc theo stream từng dòng, không giữ nguyên body trong bộ nhớ
+
+    Yields:
+        (số dòng, dòng hợp lệ theo schema hoặc None, lỗi parse / validate hoặc None)
+    """
+
+    def parse(line: int, load) -> Tuple[int, Optional[BaseModel], Optional[str]]:
+        try:
+            return line, load(), None
+        except ValidationError as e:
+            return line, None, _validation_message(e)
+
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        line = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            for raw in complete:
+                line += 1
+                if raw.strip():
+                    yield parse(line, lambda: schema.model_validate_json(raw))
+        if buffer.strip():
+            yield parse(line + 1, lambda: schema.model_validate_json(buffer))
+        return
+
+    try:
+        items = await request.json()
+    except json.JSONDecodeError:
+        items = None
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Body phải là JSON array hoặc NDJSON ({NDJSON_MEDIA_TYPE}).",
+        )
+    for index, item in enumerate(items, start=1):
+        yield parse(index, lambda: schema.model_validate(item))
+
+
+async def _read_bulk_lines(
+    request: Request, schema: Type[BaseModel] = StockMovementCreate
+) -> Tuple[List[Tuple[int, BaseModel]], Dict[int, dict]]:
+    """
+    Đọc cả body bulk (tối đa STOCK_BULK_MAX_LINES dòng)
+
+    Returns:
+        ([(số dòng, dòng hợp lệ theo schema)], {số dòng: lỗi parse / validate})
+    """
+    lines: List[Tuple[int, BaseModel]] = []
+    errors: Dict[int, dict] = {}
+
+    async for line, item, error in _iter_bulk_lines(request, schema):
+        if len(lines) + len(errors) >= settings.STOCK_BULK_MAX_LINES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tối đa {settings.STOCK_BULK_MAX_LINES} dòng mỗi lần.",
+            )
+        if error:
+            errors[line] = {"line": line, "success": False, "error": error}
+        else:
+            lines.append((line, item))
+    return lines, errors
+
+
+@router.post(
+    "/stock/movements/bulk",
+    response_model=StockMovementBulkResult,
+    dependencies=[require_permission_async("inventory:manage")],
+    openapi_extra=_bulk_request_body(StockMovementCreate),
+)
+async def bulk_stock_movements(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Nhập / xuất kho hàng loạt (VD: nhận 1 container)
+
+    Permission: inventory:manage
+    Roles: WAREHOUSE_STAFF, ADMIN
+
+    Body: JSON array các StockMovementCreate, hoặc NDJSON (mỗi dòng 1 object,
+    Content-Type: application/x-ndjson). movement_type: import | export.
+
+    Flow:
+    - Toàn bộ ghi trong 1 transaction, cập nhật stocks / batches theo lô
+    - Xuất không chỉ định batch: chia FEFO như /stock/export
+    - Dòng lỗi (sai dữ liệu, không đủ tồn) bị bỏ qua, các dòng khác vẫn ghi;
+      kết quả trả về theo từng dòng
+    """
+    lines, results = await _read_bulk_lines(request)
+    if lines:
+        results.update(
+            await StockMovementService.apply_bulk_async(db, lines, current_user.id)
+        )
+
+    return _bulk_result(results)
+
+
+@router.post(
+    "/stock/transfers",
+    response_model=List[StockMovement],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[require_permission_async("inventory:manage")],
+)
+async def transfer_stock(
+    transfer: StockTransferCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Chuyển kho
+
+    Permission: inventory:manage
+    Roles: WAREHOUSE_STAFF, ADMIN
+
+    Flow:
+    - Rời kho nguồn và vào kho đích trong cùng 1 transaction (stocks + tồn theo lô)
+    - Không chỉ định batch: chia FEFO như /stock/export
+    - Mỗi batch 1 movement TRANSFER (warehouse_id = kho nguồn, to_warehouse_id = kho đích)
+    """
+    try:
+        return await StockTransferService.transfer_async(db, transfer, current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post(
+    "/stock/transfers/bulk",
+    response_model=StockMovementBulkResult,
+    dependencies=[require_permission_async("inventory:manage")],
+    openapi_extra=_bulk_request_body(StockTransferCreate),
+)
+async def bulk_transfer_stock(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Chuyển kho hàng loạt (VD: cân bằng tồn hàng trăm SKU giữa các kho)
+
+    Permission: inventory:manage
+    Roles: WAREHOUSE_STAFF, ADMIN
+
+    Body: JSON array các StockTransferCreate, hoặc NDJSON như /stock/movements/bulk.
+    Toàn bộ ghi trong 1 transaction; dòng lỗi bị bỏ qua, kết quả trả về theo từng dòng.
+    """
+    lines, results = await _read_bulk_lines(request, StockTransferCreate)
+    if lines:
+        results.update(
+            await StockTransferService.apply_bulk_async(db, lines, current_user.id)
+        )
+
+    return _bulk_result(results)
+
+
 @router.get(
     "/stock/movements",
     response_model=PaginatedResponse[StockMovement],
-    dependencies=[require_permission("inventory:read")],
+    dependencies=[require_permission_async("inventory:read")],
 )
-def get_stock_movements(
+async def get_stock_movements(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=10, ge=1, le=100),
     movement_type: Optional[str] = Query(default=None),
     product_id: Optional[int] = Query(default=None),
     warehouse_id: Optional[int] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    pagination: str = Query(default="offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor của trang trước"),
+    count: str = Query(
+        default="exact",
+        pattern=COUNT_STRATEGY_PATTERN,
+        description="Cách tính total: exact | estimated | cached | none",
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserModel = Depends(get_current_user_async),
 ):
     """
     Lấy lịch sử nhập/xuất/kiểm kho
 
     Permission: inventory:read
+
+    pagination=cursor (hoặc truyền cursor): phân trang keyset theo
+    (created_at, id), không trả total; dùng next_cursor để lấy trang tiếp.
     """
+    if pagination == "cursor" or cursor:
+        movements, next_cursor = await StockMovementService.get_movements_keyset_async(
+            db,
+            limit=page_size,
+            cursor=cursor,
+            movement_type=movement_type,
+            product_id=product_id,
+            warehouse_id=warehouse_id,
+        )
+        return PaginatedResponse.create_cursor(
+            items=movements, page_size=page_size, next_cursor=next_cursor
+        )
+
     skip = (page - 1) * page_size
 
-    movements, total = StockMovementService.get_movements(
-        db=db,
+    movements, total = await StockMovementService.get_movements_async(
+        db,
         skip=skip,
         limit=page_size,
+        count=count,
         movement_type=movement_type,
         product_id=product_id,
         warehouse_id=warehouse_id,
     )
 
     return PaginatedResponse.create(
-        items=movements, total=total, page=page, page_size=page_size
+        items=movements,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_is_estimate=is_estimate(count),
+    )
+
+
+# ============= CYCLE COUNT =============
+
+
+def _cycle_count_not_found(cycle_count_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Cycle count với ID {cycle_count_id} không tồn tại",
     )
+
+
+@router.post(
+    "/cycle-counts",
+    response_model=CycleCount,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[require_permission_async("inventory:manage")],
+)
+async def create_cycle_count(
+    cycle_count: CycleCountCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Tạo phiếu kiểm kê cho 1 kho
+
+    Permission: inventory:manage
+    Roles: WAREHOUSE_STAFF, ADMIN
+    """
+    try:
+        return await CycleCountService.create_cycle_count_async(
+            db, cycle_count, current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/cycle-counts",
+    response_model=list[CycleCount],
+    dependencies=[require_permission_async("inventory:read")],
+)
+async def get_cycle_counts(
+    warehouse_id: Optional[int] = Query(default=None),
+    status_filter: Optional[str] = Query(
+        default=None, alias="status", pattern="^(open|approved)$"
+    ),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Danh sách phiếu kiểm kê, mới nhất trước
+
+    Permission: inventory:read
+    """
+    return await CycleCountService.get_cycle_counts_async(
+        db, warehouse_id=warehouse_id, status=status_filter, skip=skip, limit=limit
+    )
+
+
+@router.get(
+    "/cycle-counts/{cycle_count_id}",
+    response_model=CycleCount,
+    dependencies=[require_permission_async("inventory:read")],
+)
+async def get_cycle_count(
+    cycle_count_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Chi tiết phiếu kiểm kê
+
+    Permission: inventory:read
+    """
+    cycle_count = await CycleCountService.get_cycle_count_async(db, cycle_count_id)
+    if not cycle_count:
+        raise _cycle_count_not_found(cycle_count_id)
+    return cycle_count
+
+
+@router.post(
+    "/cycle-counts/{cycle_count_id}/lines",
+    response_model=CycleCountUploadResult,
+    dependencies=[require_permission_async("inventory:manage")],
+    openapi_extra=_bulk_request_body(CycleCountLineCreate),
+)
+async def upload_cycle_count_lines(
+    cycle_count_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async),
+):
+    """
+    Upload số đếm (gọi nhiều lần được, các dòng được cộng dồn)
+
+    Permission: inventory:manage
+    Roles: WAREHOUSE_STAFF, ADMIN
+
+    Body: JSON array các CycleCountLineCreate, hoặc NDJSON
+    (Content-Type: application/x-ndjson) đọc theo stream và lưu từng
+    CYCLE_COUNT_UPLOAD_CHUNK dòng: file kiểm kê lớn không cần nằm hết trong bộ nhớ.
+    Dòng lỗi bị bỏ qua, các dòng khác vẫn lưu.
+
+    Mỗi chunk commit riêng, không giữ lock phiếu / transaction trong lúc đọc
+    body: upload lỗi giữa chừng thì các chunk trước vẫn được lưu. Phiếu được
+    duyệt trong lúc upload thì các chunk sau bị từ chối (400).
+    """
+    cycle_count = await CycleCountService.get_cycle_count_async(db, cycle_count_id)
+    if not cycle_count:
+        raise _cycle_count_not_found(cycle_count_id)
+    if cycle_count.status != "open":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cycle count {cycle_count.count_number} đã {cycle_count.status}",
+        )
+    await db.commit()
+
+    received = accepted = failed = 0
+    errors: List[dict] = []
+    chunk: List[Tuple[int, CycleCountLineCreate]] = []
+
+    def add_error(line: int, error: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_UPLOAD_ERRORS:
+            errors.append({"line": line, "error": error})
+
+    async def save_chunk() -> None:
+        nonlocal accepted
+        try:
+            chunk_errors = await CycleCountService.add_lines_async(db, cycle_count, chunk)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{e}, {accepted} dòng đã lưu trước đó",
+            )
+        await db.commit()
+        accepted += len(chunk) - len(chunk_errors)
+        for line, error in sorted(chunk_errors.items()):
+            add_error(line, error)
+        chunk.clear()
+
+    async for line, item, error in _iter_bulk_lines(request, CycleCountLineCreate):
+        received += 1
+        if error:
+            add_error(line, error)
+            continue
+        chunk.append((line, item))
+        if len(chunk) >= settings.CYCLE_COUNT_UPLOAD_CHUNK:
+            await save_chunk()
+    if chunk:
+        await save_chunk()
+
+    errors.sort(key=lambda error: error["line"])
+    return CycleCountUploadResult(
+        received=received, accepted=accepted, failed=failed, errors=errors
+    )
+
+
+@router.get(
+    "/cycle-counts/{cycle_count_id}/variance",
+    response_model=CycleCountVariance,
+    dependencies=[require_permission("inventory:read")],
+)
+def get_cycle_count_variance(
+    cycle_count_id: int,
+    only_changed: bool = Query(default=True, description="Chỉ trả các dòng có chênh lệch"),
+    skip: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=1000, ge=1, le=100000),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Preview chênh lệch kiểm kê (số đếm - số sổ), chênh lệch lớn nhất trước
+
+    Permission: inventory:read
+
+    Phạm vi: các sản phẩm có dòng đếm. Batch có tồn trong kho mà không được
+    đếm tính là đếm 0. Số sổ tính tại lúc mở phiếu, phiếu đã duyệt cũng vậy
+    (ADJUST của chính phiếu ghi sau lúc đếm nên cũng bị trừ ra): trả về đúng
+    chênh lệch đã được điều chỉnh, không so với tồn hiện tại.
+
+    Route sync (threadpool): ghép chênh lệch bằng NumPy tốn CPU, không chạy
+    trên event loop.
+    """
+    cycle_count = CycleCountService.get_cycle_count(db, cycle_count_id)
+    if not cycle_count:
+        raise _cycle_count_not_found(cycle_count_id)
+    return CycleCountService.get_variance(
+        db, cycle_count, only_changed=only_changed, skip=skip, limit=limit
+    )
+
+
+@router.post(
+    "/cycle-counts/{cycle_count_id}/approve",
+    response_model=CycleCount,
+    dependencies=[require_permission("inventory:manage")],
+)
+def approve_cycle_count(
+    cycle_count_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Duyệt phiếu kiểm kê: ghi movement ADJUST hàng loạt cho các dòng chênh lệch
+
+    Permission: inventory:manage
+    Roles: WAREHOUSE_STAFF, ADMIN
+
+    Chênh lệch được tính lại trên dữ liệu đã lock (tồn có thể đổi sau khi
+    preview), mỗi (sản phẩm, batch) chênh lệch 1 movement ADJUST, quantity có dấu.
+    Route sync giống variance: phần NumPy / ghép movement chạy trong threadpool.
+    """
+    if not CycleCountService.get_cycle_count(db, cycle_count_id):
+        raise _cycle_count_not_found(cycle_count_id)
+    try:
+        return CycleCountService.approve(db, cycle_count_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
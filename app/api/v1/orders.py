@@ -3,10 +3,12 @@ Orders API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_read_db
+from app.db.counting import COUNT_STRATEGY_PATTERN, is_estimate
 from app.schemas.order import (
     Order,
     OrderCreate,
@@ -18,8 +20,11 @@ from app.schemas.order import (
 from app.schemas.common import PaginatedResponse
 from app.services.order_service import OrderService
 from app.services.customer_service import CustomerService
-from app.api.dependencies.auth import get_current_user
-from app.api.dependencies.permissions import require_permission
+from app.api.dependencies.auth import get_current_user, get_current_user_async
+from app.api.dependencies.permissions import (
+    require_permission,
+    require_permission_async,
+)
 from app.models.user import User as UserModel
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
@@ -55,25 +60,52 @@ def create_order(
 @router.get(
     "/",
     response_model=PaginatedResponse[Order],
-    dependencies=[require_permission("orders:read")],  # ← FIX
+    dependencies=[require_permission_async("orders:read")],  # ← FIX
 )
-def get_orders(
+async def get_orders(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=10, ge=1, le=100),
     search: Optional[str] = Query(default=None),
     status: Optional[str] = Query(default=None),
     order_type: Optional[str] = Query(default=None, pattern="^(b2c|b2b)$"),
     customer_id: Optional[int] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    pagination: str = Query(default="offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor của trang trước"),
+    count: str = Query(
+        default="exact",
+        pattern=COUNT_STRATEGY_PATTERN,
+        description="Cách tính total: exact | estimated | cached | none",
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserModel = Depends(get_current_user_async),
 ):
-    """Lấy danh sách đơn hàng"""
+    """
+    Lấy danh sách đơn hàng
+
+    pagination=cursor (hoặc truyền cursor): phân trang keyset theo
+    (created_at, id), không trả total; dùng next_cursor để lấy trang tiếp.
+    """
+    if pagination == "cursor" or cursor:
+        orders, next_cursor = await OrderService.get_orders_keyset_async(
+            db,
+            limit=page_size,
+            cursor=cursor,
+            search=search,
+            status=status,
+            order_type=order_type,
+            customer_id=customer_id,
+        )
+        return PaginatedResponse.create_cursor(
+            items=orders, page_size=page_size, next_cursor=next_cursor
+        )
+
     skip = (page - 1) * page_size
 
-    orders, total = OrderService.get_orders(
-        db=db,
+    orders, total = await OrderService.get_orders_async(
+        db,
         skip=skip,
         limit=page_size,
+        count=count,
         search=search,
         status=status,
         order_type=order_type,
@@ -81,7 +113,11 @@ def get_orders(
     )
 
     return PaginatedResponse.create(
-        items=orders, total=total, page=page, page_size=page_size
+        items=orders,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_is_estimate=is_estimate(count),
     )
 
 
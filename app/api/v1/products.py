@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.db.database import get_db
+from app.db.counting import COUNT_STRATEGY_PATTERN, is_estimate
 from app.schemas.product import (
     Product,
     ProductCreate,
@@ -118,6 +119,11 @@ def get_products(
     search: Optional[str] = Query(default=None),
     category_id: Optional[int] = Query(default=None),
     is_active: Optional[bool] = Query(default=None),
+    count: str = Query(
+        default="exact",
+        pattern=COUNT_STRATEGY_PATTERN,
+        description="Cách tính total: exact | estimated | cached | none",
+    ),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
@@ -133,13 +139,18 @@ def get_products(
         db=db,
         skip=skip,
         limit=page_size,
+        count=count,
         search=search,
         category_id=category_id,
         is_active=is_active,
     )
 
     return PaginatedResponse.create(
-        items=products, total=total, page=page, page_size=page_size
+        items=products,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_is_estimate=is_estimate(count),
     )
 
 
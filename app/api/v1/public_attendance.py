@@ -12,11 +12,12 @@ Endpoints:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date, time
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.schemas.attendance import (
     Attendance,
     AttendanceCheckIn,
@@ -145,9 +146,9 @@ def public_get_employees(
     response_model=Attendance,
     status_code=status.HTTP_201_CREATED,
 )
-def public_check_in(
+async def public_check_in(
     payload: AttendanceCheckIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None,
 ):
     """
@@ -166,7 +167,7 @@ def public_check_in(
     """
     try:
         _ensure_public_auth(request)
-        return AttendanceService.check_in(db, payload)
+        return await AttendanceService.check_in_async(db, payload)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -176,9 +177,9 @@ def public_check_in(
     response_model=Attendance,
     status_code=status.HTTP_200_OK,
 )
-def public_check_out(
+async def public_check_out(
     payload: AttendanceCheckOut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None,
 ):
     """
@@ -197,7 +198,7 @@ def public_check_out(
     """
     try:
         _ensure_public_auth(request)
-        return AttendanceService.check_out(db, payload)
+        return await AttendanceService.check_out_async(db, payload)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -4,9 +4,10 @@ QC (Quality Control) API Endpoints
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Union
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
+from app.schemas.common import PaginatedResponse
 from app.schemas.inventory import QCCheckpoint, QCCheckpointCreate
 from app.schemas.qc import (
     InspectionCreate,
@@ -21,6 +22,7 @@ from app.api.dependencies.permissions import require_permission
 from app.models.user import User as UserModel
 from app.models.inventory import QCCheckpoint as QCCheckpointModel
 from app.services.qc_service import QCService
+from app.services.inventory_service import BatchService
 
 router = APIRouter(prefix="/qc", tags=["QC - Quality Control"]) 
 
@@ -47,16 +49,36 @@ def create_inspection(
 
 @router.get(
     "/inspections",
-    response_model=list[Inspection],
+    response_model=Union[PaginatedResponse[Inspection], list[Inspection]],
     dependencies=[require_permission("qc:perform")],
 )
 def list_inspections(
     batch_id: Optional[int] = Query(default=None),
     type: Optional[str] = Query(default=None, pattern="^(input|inprocess|output|rcq)$"),
     status_: Optional[str] = Query(default=None, alias="status"),
-    db: Session = Depends(get_db),
+    pagination: Optional[str] = Query(default=None, pattern="^cursor$"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor của trang trước"),
+    page_size: int = Query(default=50, ge=1, le=100),
+    db: Session = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
 ):
+    """
+    Mặc định trả về toàn bộ list (như cũ). pagination=cursor (hoặc truyền cursor):
+    trả PaginatedResponse phân trang keyset theo (started_at, id).
+    """
+    if pagination == "cursor" or cursor:
+        items, next_cursor = QCService.list_keyset(
+            db,
+            limit=page_size,
+            cursor=cursor,
+            batch_id=batch_id,
+            type_=type,
+            status=status_,
+        )
+        return PaginatedResponse.create_cursor(
+            items=items, page_size=page_size, next_cursor=next_cursor
+        )
+
     items = QCService.list(db, batch_id=batch_id, type_=type, status=status_)
     return items
 
@@ -214,10 +236,10 @@ def create_qc_checkpoint(
 
         batch = db.query(Batch).filter(Batch.id == checkpoint.batch_id).first()
         if batch:
-            batch.qc_status = checkpoint.status
+            BatchService.set_qc_status(db, batch, checkpoint.status)
             batch.qc_note = f"QC Score: {checkpoint.score}/100"
 
-    db.commit()
+    db.flush()
     db.refresh(db_checkpoint)
 
     return db_checkpoint
@@ -6,7 +6,7 @@ from typing import Optional, List
 from app.db.database import get_db
 
 # Schemas - IMPORT TRƯỚC KHI DÙNG
-from app.schemas.user import User, UserUpdate  # ← User schema (response model)
+from app.schemas.user import User, UserCreate, UserUpdate  # ← User schema (response model)
 from app.schemas.role import Role, RoleAssignment
 from app.schemas.common import PaginatedResponse
 
@@ -23,6 +23,9 @@ from app.models.user import User as UserModel  # ← User model (database)
 # Router
 router = APIRouter(prefix="/users", tags=["User Management"])
 
+# Số user tối đa mỗi request bulk create
+MAX_BULK_USERS = 500
+
 
 @router.get("/", response_model=PaginatedResponse[User])
 def get_users(
@@ -76,6 +79,55 @@ def get_users(
     )
 
 
+@router.post("/bulk", response_model=List[User], status_code=status.HTTP_201_CREATED)
+def create_users_bulk(
+    users: List[UserCreate],
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_superuser),
+):
+    """
+    ## Tạo nhiều user 1 lần
+
+    **Yêu cầu:** Chỉ Superuser/Admin
+
+    **Chức năng:**
+    - Tạo tối đa 500 user trong 1 transaction
+    - Password được hash song song trên password pool (bcrypt)
+
+    **Response:**
+    - `201 Created`: Danh sách user vừa tạo
+    - `400 Bad Request`: Quá số lượng, hoặc username / email bị trùng
+    - `403 Forbidden`: Không phải superuser
+    """
+    if not users:
+        return []
+
+    if len(users) > MAX_BULK_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tối đa {MAX_BULK_USERS} user mỗi lần.",
+        )
+
+    usernames = [u.username for u in users]
+    emails = [u.email for u in users]
+    existing_usernames, existing_emails = UserService.get_existing_identities(
+        db, usernames, emails
+    )
+    duplicated = sorted(
+        existing_usernames
+        | existing_emails
+        | {name for name in usernames if usernames.count(name) > 1}
+        | {email for email in emails if emails.count(email) > 1}
+    )
+    if duplicated:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Username / email đã tồn tại hoặc bị trùng: {', '.join(duplicated)}",
+        )
+
+    return UserService.create_users(db, users)
+
+
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
@@ -3,7 +3,7 @@ Application Configuration
 Load settings from environment variables
 """
 
-from typing import Optional
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,16 +17,78 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # Database connection pool
+    DB_POOL_SIZE: int = 5  # Số connection giữ sẵn trong pool (mỗi worker)
+    DB_MAX_OVERFLOW: int = 10  # Số connection vượt pool_size được phép mở thêm
+    DB_POOL_TIMEOUT: int = 30  # Số giây chờ connection trước khi báo lỗi
+    DB_POOL_RECYCLE: int = 1800  # Recycle connection sau N giây (-1 = tắt)
+    DB_POOL_PRE_PING: bool = True  # Ping connection trước khi dùng (tránh stale sau khi Postgres restart)
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False  # Chạy sau PgBouncer transaction pooling: NullPool + tắt prepared statements
+
+    # Read replicas (endpoint list/report đọc từ replica)
+    DB_REPLICA_URLS: Optional[str] = None  # CSV URL, VD: "postgresql://u:p@replica1:5432/robis,postgresql://u:p@replica2:5432/robis"
+    DB_READ_YOUR_WRITES_SECONDS: int = 5  # Sau khi user ghi, đọc từ primary trong N giây (tránh replica lag)
+
+    # Migrations: chạy `alembic upgrade head` lúc app khởi động (tắt khi deploy đã migrate)
+    RUN_MIGRATIONS_ON_STARTUP: bool = True
+
+    # SQL query stats (Server-Timing header + N+1 detector)
+    SQL_STATS_ENABLED: bool = True
+    SQL_NPLUSONE_THRESHOLD: int = 5  # Cảnh báo khi 1 shape SQL lặp >= N lần trong 1 request
+
+    # Count strategy cho list có phân trang (exact / estimated / cached / none)
+    COUNT_CACHE_TTL_SECONDS: int = 30  # TTL cho strategy "cached"
+    COUNT_CACHE_MAXSIZE: int = 1024  # Số filter set tối đa giữ trong cache
+    COUNT_ESTIMATE_EXACT_BELOW: int = 1000  # "estimated": ước lượng < N dòng thì đếm chính xác
+
+    # Prometheus metrics (GET /metrics)
+    METRICS_ENABLED: bool = True
+
     # JWT Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Cache user + permissions đã xác thực theo token (0 = tắt)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+
+    # Permission bitset: registry tên -> bit reload sau N giây;
+    # bật claim "perms" trong JWT để check quyền không cần load user
+    # (quyền bị thu hồi vẫn còn hiệu lực đến khi token hết hạn)
+    PERMISSION_REGISTRY_TTL_SECONDS: int = 300
+    JWT_PERMISSIONS_CLAIM: bool = False
+
+    # bcrypt hash/verify chạy trên process pool riêng (0 = chạy ngay trong thread gọi)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Đang chạy + đang chờ, vượt quá thì trả 429
+
+    # Số chứng từ (BATCH-, IMP-, ORD-, ...): mỗi worker lấy trước N số / lần
+    # (1 = số tăng dần đúng thứ tự tạo nhưng mỗi chứng từ 1 round-trip, > 1 = ít round-trip hơn)
+    DOCUMENT_NUMBER_BLOCK_SIZE: int = 20
+    DOCUMENT_NUMBER_POOL_SIZE: int = 2  # Pool riêng (mỗi worker) để cấp số, không lấy connection của request
+
+    # Bulk nhập / xuất kho (/stock/movements/bulk): số dòng tối đa mỗi request
+    STOCK_BULK_MAX_LINES: int = 10000
+
+    # Snapshot tồn kho (as-of): snapshot_at phải cũ hơn N giây, chờ các transaction đang ghi movement commit xong
+    STOCK_SNAPSHOT_SETTLE_SECONDS: int = 300
+
+    # Kiểm kê (cycle count): số dòng đếm insert mỗi lượt khi upload (NDJSON đọc theo stream)
+    CYCLE_COUNT_UPLOAD_CHUNK: int = 5000
+
+    # Giá trị tồn kho (FIFO / bình quân): số movement đọc mỗi chunk khi rebuild
+    VALUATION_REBUILD_CHUNK: int = 50000
+
+    # Cập nhật theo version (QC status của batch): số lần thử lại khi bị ghi chen, hết thì trả 409
+    OPTIMISTIC_UPDATE_RETRIES: int = 3
+
     # Application
     APP_NAME: str = "Robis ERP API"
     DEBUG: bool = False
 
     # Google Gemini AI (NEW)
+    AI_ENABLED: bool = True  # Tắt để không đăng ký /ai/* routes
     GOOGLE_API_KEY: Optional[str] = None
     GEMINI_MODEL: str = "gemini-pro"
     GEMINI_MAX_TOKENS: int = 1000
@@ -56,6 +118,25 @@ class Settings(BaseSettings):
         """Construct database URL from components"""
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """Database URL cho async engine (asyncpg)"""
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
+    @property
+    def REPLICA_URLS(self) -> List[str]:
+        """Danh sách URL read replica (rỗng = mọi truy vấn đi primary)"""
+        if not self.DB_REPLICA_URLS:
+            return []
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
+    @property
+    def ASYNC_REPLICA_URLS(self) -> List[str]:
+        """URL read replica cho async engine (asyncpg)"""
+        return [
+            "postgresql+asyncpg://" + url.split("://", 1)[1] for url in self.REPLICA_URLS
+        ]
+
 
 # Create settings instance
 settings = Settings()
@@ -43,3 +43,31 @@ class ResourceNotFoundError(HTTPException):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"{resource_type} với ID {resource_id} không tồn tại.",
         )
+
+
+class InvalidCursorError(HTTPException):
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor phân trang không hợp lệ. Vui lòng tải lại từ trang đầu.",
+        )
+
+
+class TooManyRequestsError(HTTPException):
+
+    def __init__(self, detail: Optional[str] = None, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail or "Hệ thống đang quá tải. Vui lòng thử lại sau giây lát.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ConcurrentUpdateError(HTTPException):
+
+    def __init__(self, resource_type: str, resource_id: int):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{resource_type} với ID {resource_id} vừa được cập nhật bởi thao tác khác. Vui lòng tải lại và thử lại.",
+        )
@@ -0,0 +1,346 @@
+"""
+Metrics - Registry nhỏ theo chuẩn Prometheus text exposition format
+
+Không phụ thuộc prometheus_client: Counter / Gauge / Histogram có labels,
+thread-safe, và collector callback để lấy số liệu tại thời điểm scrape
+(threadpool, connection pool...).
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = data
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = self.header()
+        for key, data in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += data[i]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(data[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(data[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Tập hợp metrics + collector callbacks, render ra text exposition"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ):
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets=buckets or DEFAULT_BUCKETS)
+        )
+
+    def register_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        """Collector được gọi lúc scrape, trả về các metric tạm (thường là Gauge)"""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ============= HTTP =============
+
+http_requests_total = registry.counter(
+    "robis_http_requests_total",
+    "Tổng số HTTP request theo route và status",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "robis_http_request_duration_seconds",
+    "Thời gian xử lý HTTP request (giây)",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = registry.gauge(
+    "robis_http_requests_in_flight",
+    "Số HTTP request đang xử lý",
+    ("method",),
+)
+
+# ============= DATABASE =============
+
+http_request_db_seconds = registry.histogram(
+    "robis_http_request_db_seconds",
+    "Tổng thời gian DB trong 1 HTTP request (giây)",
+    ("method", "route"),
+)
+http_request_db_queries = registry.histogram(
+    "robis_http_request_db_queries",
+    "Số câu SQL trong 1 HTTP request",
+    ("method", "route"),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+# ============= INVENTORY =============
+
+# Chỉ các lần ghi có kiểm tra version (QC status của batch): conflict = bị ghi chen
+# rồi thử lại, exhausted = hết lượt thử (409), rejected = version client đã cũ (409).
+# Cộng / trừ số lượng tồn là UPDATE cộng dồn nguyên tử, không xung đột nên không đếm.
+optimistic_updates_total = registry.counter(
+    "robis_optimistic_updates_total",
+    "Số lần ghi có kiểm tra version theo kết quả (applied / conflict / exhausted / rejected)",
+    ("entity", "outcome"),
+)
+
+# ============= LLM =============
+
+llm_request_duration_seconds = registry.histogram(
+    "robis_llm_request_duration_seconds",
+    "Thời gian gọi LLM (Gemini) theo operation và kết quả",
+    ("operation", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0),
+)
+
+# ============= AUTH =============
+
+principal_cache_requests_total = registry.counter(
+    "robis_principal_cache_requests_total",
+    "Số lần tra principal cache theo kết quả (hit / miss)",
+    ("result",),
+)
+
+password_hash_seconds = registry.histogram(
+    "robis_password_hash_seconds",
+    "Thời gian CPU của 1 lần bcrypt hash / verify (đo trong worker)",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+password_hash_rejected_total = registry.counter(
+    "robis_password_hash_rejected_total",
+    "Số request bị trả 429 vì password hash pool đầy",
+    ("operation",),
+)
+
+
+# ============= SCRAPE-TIME COLLECTORS =============
+
+
+@registry.register_collector
+def _collect_threadpool():
+    """Độ bão hòa threadpool của anyio (route `def` sync chạy trong đây)"""
+    import anyio.to_thread
+
+    borrowed = Gauge(
+        "robis_threadpool_borrowed_tokens", "Số thread đang được dùng trong threadpool"
+    )
+    total = Gauge("robis_threadpool_total_tokens", "Kích thước threadpool")
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        # Không chạy trong event loop (VD: gọi từ script)
+        return []
+    borrowed.set(limiter.borrowed_tokens)
+    total.set(limiter.total_tokens)
+    return [borrowed, total]
+
+
+@registry.register_collector
+def _collect_db_pools():
+    """Trạng thái connection pool của mọi engine đang hoạt động"""
+    from app.db.database import get_engines
+    from app.db.pool import pool_status
+
+    fields = {
+        "checked_out": ("robis_db_pool_checked_out", "Số connection đang checkout", Gauge),
+        "overflow": ("robis_db_pool_overflow", "Số connection overflow đang mở", Gauge),
+        "size": ("robis_db_pool_size", "pool_size cấu hình", Gauge),
+        "checkouts_total": ("robis_db_pool_checkouts_total", "Tổng số lần checkout", Counter),
+        "timeouts_total": (
+            "robis_db_pool_timeouts_total",
+            "Tổng số lần checkout bị timeout",
+            Counter,
+        ),
+        "wait_seconds_total": (
+            "robis_db_pool_wait_seconds_total",
+            "Tổng thời gian chờ checkout (giây)",
+            Counter,
+        ),
+    }
+    metrics = {
+        key: cls(name, doc, ("engine",)) for key, (name, doc, cls) in fields.items()
+    }
+    for engine_name, engine in get_engines().items():
+        status = pool_status(engine)
+        for key, metric in metrics.items():
+            if key not in status:
+                continue
+            if isinstance(metric, Counter):
+                metric.inc(status[key], engine=engine_name)
+            else:
+                metric.set(status[key], engine=engine_name)
+    return list(metrics.values())
+
+
+@registry.register_collector
+def _collect_password_pool():
+    """Hàng đợi của password hash pool"""
+    from app.core.password_pool import password_pool
+
+    pending = Gauge(
+        "robis_password_hash_pending", "Số job bcrypt đang chạy + đang chờ trong pool"
+    )
+    workers = Gauge("robis_password_hash_workers", "Số process của password hash pool")
+    pending.set(password_pool.pending)
+    workers.set(password_pool.workers)
+    return [pending, workers]
@@ -0,0 +1,162 @@
+"""
+ASGI Middlewares - Đo đạc request (SQL stats, Server-Timing, Prometheus metrics)
+và đánh dấu read-your-writes cho read replica
+"""
+
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.core import metrics
+from app.core.config import settings
+from app.db import replicas
+from app.db.query_stats import (
+    get_request_stats,
+    install_query_hooks,
+    start_request_stats,
+    stop_request_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Đếm số câu SQL + thời gian DB cho mỗi request
+
+    - Trả về header `Server-Timing: db;dur=..;desc="N queries", app;dur=..`
+    - Log cảnh báo khi 1 shape SQL lặp lại >= SQL_NPLUSONE_THRESHOLD lần (N+1)
+    """
+
+    def __init__(self, app):
+        self.app = app
+        install_query_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request_stats()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", f"{stats.server_timing()}, app;dur={elapsed_ms:.2f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_request_stats(token)
+            for shape, count in stats.repeated_shapes(settings.SQL_NPLUSONE_THRESHOLD):
+                logger.warning(
+                    "Possible N+1 on %s %s: %dx %s",
+                    scope.get("method"),
+                    scope.get("path"),
+                    count,
+                    shape[:300],
+                )
+
+
+class MetricsMiddleware:
+    """
+    Ghi Prometheus metrics cho mỗi request
+
+    Label `route` là path template (VD: /api/v1/orders/{order_id}) lấy từ
+    route đã match, để số series không phụ thuộc vào id trong URL. Request
+    không match route nào được gom vào "unmatched".
+
+    Phải nằm bên trong QueryStatsMiddleware để đọc được SQL stats của request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_requests_in_flight.inc(method=method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.http_requests_in_flight.dec(method=method)
+            self._observe(scope, method, status_code, time.perf_counter() - start)
+
+    @staticmethod
+    def _observe(scope, method: str, status_code: int, elapsed: float) -> None:
+        route = scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        if route_path == "/metrics":
+            return
+
+        labels = {"method": method, "route": route_path, "status": str(status_code)}
+        metrics.http_requests_total.inc(**labels)
+        metrics.http_request_duration_seconds.observe(elapsed, **labels)
+
+        stats = get_request_stats()
+        if stats is not None:
+            metrics.http_request_db_seconds.observe(
+                stats.duration, method=method, route=route_path
+            )
+            metrics.http_request_db_queries.observe(
+                stats.count, method=method, route=route_path
+            )
+
+
+class ReadYourWritesMiddleware:
+    """
+    Đánh dấu principal vừa ghi dữ liệu (POST/PUT/PATCH/DELETE thành công)
+
+    Trong DB_READ_YOUR_WRITES_SECONDS giây sau đó, get_read_db /
+    get_async_read_db của cùng principal đọc từ primary thay vì replica.
+    """
+
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope.get("method") in self.SAFE_METHODS
+            or not replicas.replicas_enabled()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = None
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                key = replicas.principal_key(value.decode("latin-1"))
+                break
+
+        async def send_and_mark(message):
+            # Đánh dấu trước khi gửi response để request đọc ngay sau đó thấy được
+            if (
+                message["type"] == "http.response.start"
+                and key is not None
+                and message["status"] < 400
+            ):
+                replicas.read_your_writes.mark_write(key)
+            await send(message)
+
+        await self.app(scope, receive, send_and_mark)
@@ -0,0 +1,167 @@
+"""
+Document numbering - cấp số chứng từ (BATCH-, IMP-, ORD-, B2C-, EMP...)
+
+Trước đây mỗi lần tạo chứng từ chạy COUNT(*) ... LIKE 'PREFIX-YYYYMMDD-%':
+quét range ngày càng lớn, và 2 request đồng thời nhận cùng số rồi lỗi unique.
+
+Bộ đếm lưu ở bảng document_counters (scope, period), cấp phát bằng
+1 câu INSERT ... ON CONFLICT DO UPDATE ... RETURNING (row lock, không race):
+
+- Chạy trên engine riêng (pool nhỏ, autocommit - app.db.database.get_counter_engine):
+  không giữ row lock đến hết transaction của request, và không tranh
+  connection với pool của request. Request rollback thì số đã cấp bị bỏ
+  (có lỗ hổng số, không bao giờ trùng)
+- Gọi trong AsyncSession.run_sync (session truyền vào dùng asyncpg): cấp qua
+  engine asyncpg riêng, không chặn event loop bằng I/O đồng bộ
+- threading.Lock chỉ bảo vệ block trong bộ nhớ, không giữ trong lúc gọi DB
+- DOCUMENT_NUMBER_BLOCK_SIZE > 1: mỗi worker lấy trước 1 block số, các lần
+  sau cấp trong process không cần round-trip. Đổi lại số giữa các worker
+  không còn tăng dần theo thời gian tạo
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+_ALLOCATE_SQL = text(
+    """
+    INSERT INTO document_counters (scope, period, last_value)
+    VALUES (:scope, :period, :count)
+    ON CONFLICT (scope, period)
+    DO UPDATE SET last_value = document_counters.last_value + EXCLUDED.last_value
+    RETURNING last_value
+    """
+)
+
+# (bảng, cột, regex (scope, period, số)) - dùng để đồng bộ bộ đếm từ dữ liệu có sẵn
+COUNTER_SOURCES = [
+    ("batches", "batch_number", r"^(BATCH)-(\d{8})-(\d+)$"),
+    ("stock_movements", "movement_number", r"^([A-Z]{3})-(\d{8})-(\d+)$"),
+    ("orders", "order_number", r"^(ORD-B2[BC])-(\d{8})-(\d+)$"),
+    ("customers", "customer_code", r"^(B2[BC])-(\d{8})-(\d+)$"),
+    ("employees", "employee_code", r"^(EMP)()(\d+)$"),
+    ("cycle_counts", "count_number", r"^(CC)-(\d{8})-(\d+)$"),
+]
+
+
+def sync_counters_sql() -> str:
+    """
+    SQL nâng document_counters lên số lớn nhất đang có trong các bảng
+    (sau khi import / sinh dữ liệu trực tiếp vào DB). Không bao giờ giảm.
+    """
+    selects = " UNION ALL ".join(
+        f"SELECT m[1] AS scope, m[2] AS period, m[3]::bigint AS value "
+        f"FROM (SELECT regexp_match({column}, '{pattern}') AS m FROM {table}) s "
+        f"WHERE m IS NOT NULL"
+        for table, column, pattern in COUNTER_SOURCES
+    )
+    return (
+        "INSERT INTO document_counters (scope, period, last_value) "
+        f"SELECT scope, period, MAX(value) FROM ({selects}) existing "
+        "GROUP BY scope, period "
+        "ON CONFLICT (scope, period) DO UPDATE "
+        "SET last_value = GREATEST(document_counters.last_value, EXCLUDED.last_value)"
+    )
+
+
+class DocumentNumberAllocator:
+    """Cấp số theo (scope, period), giữ block số đã lấy trước trong process (thread-safe)"""
+
+    def __init__(self, block_size: int):
+        self.block_size = max(block_size, 1)
+        # (scope, period) -> (số tiếp theo, số cuối của block)
+        self._blocks: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, scope: str, period: str, count: int, db: Optional[Session]) -> int:
+        """Lấy thêm `count` số từ DB, trả về số cuối cùng"""
+        # Import muộn để app.core không phụ thuộc vòng vào app.db
+        from app.db.database import get_async_counter_engine, get_counter_engine
+
+        if db is not None and db.get_bind().dialect.is_async:
+            # Đang trong run_sync (greenlet): sync_engine của engine asyncpg
+            # chờ I/O bằng cách nhả event loop, không chặn
+            engine = get_async_counter_engine().sync_engine
+        else:
+            engine = get_counter_engine()
+
+        with engine.connect() as connection:
+            return connection.execute(
+                _ALLOCATE_SQL, {"scope": scope, "period": period, "count": count}
+            ).scalar_one()
+
+    def next_values(
+        self, scope: str, count: int, period: str = "", db: Optional[Session] = None
+    ) -> List[int]:
+        """
+        Cấp `count` số tăng dần (tối đa 1 round-trip cho cả lô, dùng cho bulk)
+
+        db: session của request, chỉ để biết đang chạy sync hay trong run_sync
+        (không cấp số trong transaction của request)
+        """
+        key = (scope, period)
+        with self._lock:
+            start, end = self._blocks.get(key, (1, 0))
+            values = list(range(start, min(start + count, end + 1)))
+            self._blocks[key] = (start + len(values), end)
+
+        missing = count - len(values)
+        if missing == 0:
+            return values
+
+        reserve = max(missing, self.block_size)
+        end = self._reserve(scope, period, reserve, db)
+        start = end - reserve + 1
+        values.extend(range(start, start + missing))
+
+        with self._lock:
+            # Sang ngày mới: bỏ block của các ngày trước cùng scope
+            for old in [k for k in self._blocks if k[0] == scope and k != key]:
+                del self._blocks[old]
+            # Thread khác vừa lấy block mới và còn số thì giữ block đó,
+            # phần dư của block này bị bỏ (lỗ hổng số, không trùng)
+            current_start, current_end = self._blocks.get(key, (1, 0))
+            if current_start > current_end:
+                self._blocks[key] = (start + missing, end)
+        return values
+
+    def next_value(self, scope: str, period: str = "", db: Optional[Session] = None) -> int:
+        return self.next_values(scope, 1, period, db)[0]
+
+    def next_numbers(
+        self,
+        prefix: str,
+        width: int,
+        count: int,
+        day: Optional[datetime] = None,
+        db: Optional[Session] = None,
+    ) -> List[str]:
+        """`count` số chứng từ tăng dần trong ngày: PREFIX-YYYYMMDD-0001..."""
+        period = (day or datetime.now()).strftime("%Y%m%d")
+        return [
+            f"{prefix}-{period}-{value:0{width}d}"
+            for value in self.next_values(prefix, count, period, db)
+        ]
+
+    def next_number(
+        self,
+        prefix: str,
+        width: int,
+        day: Optional[datetime] = None,
+        db: Optional[Session] = None,
+    ) -> str:
+        """Số chứng từ reset theo ngày: PREFIX-YYYYMMDD-0001"""
+        return self.next_numbers(prefix, width, 1, day, db)[0]
+
+    def reset(self) -> None:
+        """Bỏ các block đang giữ (sau khi sync / sửa bộ đếm trực tiếp trong DB)"""
+        with self._lock:
+            self._blocks.clear()
+
+
+document_numbers = DocumentNumberAllocator(block_size=settings.DOCUMENT_NUMBER_BLOCK_SIZE)
@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination
+
+Thay vì OFFSET (càng về sau càng chậm vì Postgres phải bỏ qua N dòng),
+mỗi trang lọc theo vị trí của dòng cuối trang trước:
+
+    WHERE (created_at, id) < (:last_created_at, :last_id)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :page_size + 1
+
+nên trang N tốn chi phí như trang 1 (cần index trên các cột sort).
+
+Cursor là base64 của JSON [giá trị sort..., id], client coi như chuỗi mờ.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.core.exceptions import InvalidCursorError
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(raw: Any, column) -> Any:
+    if raw is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    if python_type is date:
+        return date.fromisoformat(raw)
+    return python_type(raw)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Mã hóa giá trị các cột sort của 1 dòng thành cursor"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple[Any, ...]:
+    """Giải mã cursor theo kiểu dữ liệu của các cột sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return tuple(_decode_value(v, c) for v, c in zip(raw, columns))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursorError()
+
+
+def paginate_keyset(
+    query: Query,
+    columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Lấy 1 trang theo keyset, sắp xếp giảm dần theo `columns`
+
+    Args:
+        query: Query đã áp filter (chưa order/limit)
+        columns: Các cột sort, cột cuối phải unique (thường là id)
+        limit: Số item mỗi trang
+        cursor: Cursor trả về từ trang trước (None = trang đầu)
+
+    Returns:
+        (items, next_cursor) - next_cursor None khi đã hết dữ liệu
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(tuple_(*columns) < tuple_(*values))
+
+    rows = query.order_by(*[c.desc() for c in columns]).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+
+    return rows, next_cursor
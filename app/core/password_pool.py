@@ -0,0 +1,164 @@
+"""
+Password hash pool - bcrypt hash / verify trên process pool riêng
+
+bcrypt tốn ~50-300ms CPU mỗi lần. Chạy trong threadpool thì 1 đợt login đầu
+ca chiếm hết CPU (GIL) và thread slot, các route khác bị treo theo. Pool:
+
+- PASSWORD_HASH_WORKERS process (spawn), CPU dành cho bcrypt bị giới hạn
+- Tối đa PASSWORD_HASH_MAX_PENDING job (đang chạy + đang chờ), vượt quá thì
+  trả 429 ngay thay vì xếp hàng đến timeout
+- Thời gian mỗi lần hash đo trong worker (robis_password_hash_seconds)
+
+Route async dùng *_async để không giữ thread slot khi chờ. Bulk (hash_many)
+không bị 429 nhưng chỉ giữ tối đa PASSWORD_HASH_WORKERS job trong hàng đợi
+để login vẫn chen vào được.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.exceptions import TooManyRequestsError
+
+
+def _hash_job(password: str) -> Tuple[str, float]:
+    """Chạy trong worker process: (hash, số giây)"""
+    from app.core.security import get_password_hash
+
+    started = time.perf_counter()
+    hashed = get_password_hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _verify_job(plain_password: str, hashed_password: str) -> Tuple[bool, float]:
+    """Chạy trong worker process: (đúng/sai, số giây)"""
+    from app.core.security import verify_password
+
+    started = time.perf_counter()
+    ok = verify_password(plain_password, hashed_password)
+    return ok, time.perf_counter() - started
+
+
+class PasswordHashPool:
+    """ProcessPoolExecutor + giới hạn số job đang chờ (thread-safe)"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        """Tạo executor (idempotent), gọi lúc startup để login đầu tiên không phải chờ"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._executor is None:
+                # spawn: không fork process đang giữ connection DB / event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, operation: str, fn, *args, reject: bool = True) -> Future:
+        self.start()
+        with self._lock:
+            if reject and self._pending >= self.max_pending:
+                metrics.password_hash_rejected_total.inc(operation=operation)
+                raise TooManyRequestsError(
+                    detail="Hệ thống đang xử lý nhiều lượt đăng nhập. Vui lòng thử lại sau giây lát."
+                )
+            self._pending += 1
+            executor = self._executor
+
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        future.add_done_callback(lambda f: self._finished(operation, f))
+        return future
+
+    def _finished(self, operation: str, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            metrics.password_hash_seconds.observe(future.result()[1], operation=operation)
+
+    def _run_inline(self, operation: str, fn, *args):
+        result, elapsed = fn(*args)
+        metrics.password_hash_seconds.observe(elapsed, operation=operation)
+        return result
+
+    # ============= SYNC (route `def`, script) =============
+
+    def hash(self, password: str) -> str:
+        if not self.enabled:
+            return self._run_inline("hash", _hash_job, password)
+        return self._submit("hash", _hash_job, password).result()[0]
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if not self.enabled:
+            return self._run_inline("verify", _verify_job, plain_password, hashed_password)
+        return self._submit("verify", _verify_job, plain_password, hashed_password).result()[0]
+
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """Hash song song (bulk tạo user), giữ thứ tự input"""
+        if not self.enabled:
+            return [self._run_inline("hash", _hash_job, p) for p in passwords]
+
+        hashed: List[str] = []
+        for start in range(0, len(passwords), self.workers):
+            futures = [
+                self._submit("hash", _hash_job, password, reject=False)
+                for password in passwords[start : start + self.workers]
+            ]
+            hashed.extend(future.result()[0] for future in futures)
+        return hashed
+
+    # ============= ASYNC (route `async def`) =============
+
+    async def hash_async(self, password: str) -> str:
+        if not self.enabled:
+            return await run_in_threadpool(self._run_inline, "hash", _hash_job, password)
+        result = await asyncio.wrap_future(self._submit("hash", _hash_job, password))
+        return result[0]
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        if not self.enabled:
+            return await run_in_threadpool(
+                self._run_inline, "verify", _verify_job, plain_password, hashed_password
+            )
+        result = await asyncio.wrap_future(
+            self._submit("verify", _verify_job, plain_password, hashed_password)
+        )
+        return result[0]
+
+
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
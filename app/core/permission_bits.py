@@ -0,0 +1,133 @@
+"""
+Permission bitset - quyền hiệu lực của user dạng 1 số nguyên
+
+Bit thứ N = permission có id N (id ổn định giữa các worker và với giá trị
+đã lưu ở users.permission_bits). Check quyền = 1 phép test bit, registry
+chỉ dùng để đổi tên permission -> bit.
+
+Registry load từ bảng permissions ở startup (threadpool, không chặn event
+loop). Lookup chỉ đọc snapshot trong bộ nhớ, không bao giờ query DB:
+- PermissionService tạo / sửa / xóa permission -> invalidate, reload nền
+- Snapshot quá PERMISSION_REGISTRY_TTL_SECONDS (worker khác) -> reload nền,
+  trong lúc chờ vẫn dùng snapshot cũ
+- Tên permission chưa biết: trả None tới lần reload sau, không reload theo
+  từng lần miss
+Reload xong thì thay cả snapshot bằng 1 phép gán (không có trạng thái nửa cũ
+nửa mới giữa 2 dict bits / names).
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def mask_of(permission_ids: Iterable[int]) -> int:
+    """Bitset từ danh sách permission id"""
+    bits = 0
+    for permission_id in permission_ids:
+        bits |= 1 << permission_id
+    return bits
+
+
+def has_bit(bits: int, bit: Optional[int]) -> bool:
+    return bit is not None and (bits >> bit) & 1 == 1
+
+
+class _Snapshot(NamedTuple):
+    bits: Dict[str, int]
+    names: Dict[int, str]
+    loaded_at: float
+
+
+class PermissionRegistry:
+    """Map permission name <-> bit (permission.id), thread-safe"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._stale = False
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load() -> _Snapshot:
+        # Import muộn để app.core không phụ thuộc vòng vào app.db / app.models
+        from app.db.database import SessionLocal
+        from app.models.role import Permission
+
+        db = SessionLocal()
+        try:
+            rows = db.query(Permission.id, Permission.name).all()
+        finally:
+            db.close()
+
+        return _Snapshot(
+            bits={name: permission_id for permission_id, name in rows},
+            names={permission_id: name for permission_id, name in rows},
+            loaded_at=time.monotonic(),
+        )
+
+    def refresh(self) -> None:
+        """Load lại (blocking, gọi từ thread / script), query chạy ngoài lock"""
+        with self._lock:
+            self._stale = False
+        self._snapshot = self._load()
+
+    async def refresh_async(self) -> None:
+        """Load lại trong threadpool (startup)"""
+        await run_in_threadpool(self.refresh)
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("permission registry reload failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Chưa qua startup (script / shell): load đồng bộ 1 lần
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load()
+            return self._snapshot
+
+        if self._stale or time.monotonic() - snapshot.loaded_at > self.ttl:
+            with self._lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(
+                    target=self._refresh_in_background,
+                    name="permission-registry-reload",
+                    daemon=True,
+                ).start()
+        return snapshot
+
+    def bit(self, name: str) -> Optional[int]:
+        """Bit của permission, None nếu không tồn tại"""
+        return self._current().bits.get(name)
+
+    def names(self, bits: int) -> List[str]:
+        """Tên các permission trong bitset (chỉ dùng cho message lỗi / hiển thị)"""
+        return sorted(
+            name for bit, name in self._current().names.items() if has_bit(bits, bit)
+        )
+
+    def invalidate(self) -> None:
+        """Đánh dấu cần reload, lần lookup kế tiếp reload nền"""
+        with self._lock:
+            self._stale = True
+
+
+permission_registry = PermissionRegistry(ttl=settings.PERMISSION_REGISTRY_TTL_SECONDS)
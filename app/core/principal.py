@@ -0,0 +1,117 @@
+"""
+Principal cache - User đã xác thực + permission, cache trong process
+
+Trước đây mỗi request có JWT đều query User rồi lazy load roles ->
+permissions để check quyền. Principal là snapshot (không gắn session) gồm
+flags của user và bitset quyền hiệu lực (users.permission_bits), cache
+theo token:
+
+- TTL ngắn (PRINCIPAL_CACHE_TTL_SECONDS): mỗi worker có cache riêng nên
+  thay đổi ở worker khác chỉ có hiệu lực sau tối đa TTL giây
+- UserService / RoleService / PermissionService invalidate ngay trong
+  worker xử lý thay đổi (theo user, hoặc toàn bộ khi đổi role/permission)
+
+JWT vẫn được decode mỗi request (kiểm tra chữ ký + hết hạn), chỉ bỏ phần SQL.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from cachetools import TTLCache
+
+from app.core import metrics
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """User đã xác thực, dùng thay ORM User trong dependency auth"""
+
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    permission_bits: int  # users.permission_bits
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        """Tạo từ ORM User (chỉ cần row users, không load roles)"""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            permission_bits=user.permission_bits or 0,
+        )
+
+
+class PrincipalCache:
+    """
+    Cache token -> Principal (thread-safe)
+
+    Generation tăng mỗi lần invalidate: principal load từ DB trước lúc
+    invalidate sẽ không được ghi vào cache (tránh ghi đè dữ liệu cũ).
+    """
+
+    def __init__(self, ttl: int, maxsize: int):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.enabled = ttl > 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, token: str) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            principal = self._entries.get(self.key(token))
+        metrics.principal_cache_requests_total.inc(result="hit" if principal else "miss")
+        return principal
+
+    def put(self, token: str, principal: Principal, generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._entries[self.key(token)] = principal
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Xóa các principal của 1 user (user bị sửa, khóa, đổi role)"""
+        self.invalidate_users([user_id])
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        """Xóa principal của nhiều user (role của họ đổi quyền)"""
+        user_ids = set(user_ids)
+        with self._lock:
+            self._generation += 1
+            for key in [k for k, p in self._entries.items() if p.id in user_ids]:
+                self._entries.pop(key, None)
+
+    def invalidate_all(self) -> None:
+        """Xóa toàn bộ (role / permission thay đổi ảnh hưởng nhiều user)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS, maxsize=settings.PRINCIPAL_CACHE_MAXSIZE
+)
@@ -16,10 +16,29 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def permission_claims(user) -> dict:
+    """
+    Claim quyền cho JWT khi bật JWT_PERMISSIONS_CLAIM:
+    su = superuser, perms = users.permission_bits dạng hex
+    """
+    if not settings.JWT_PERMISSIONS_CLAIM:
+        return {}
+    return {
+        "su": bool(user.is_superuser),
+        "perms": format(user.permission_bits or 0, "x"),
+    }
+
+
+def create_access_token(
+    data: dict, expires_delta: Optional[timedelta] = None, user=None
+) -> str:
 
     to_encode = data.copy()
 
+    # Kèm bitset quyền để require_permission không cần load user
+    if user is not None:
+        to_encode.update(permission_claims(user))
+
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
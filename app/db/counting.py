@@ -0,0 +1,125 @@
+"""
+Count strategies cho list có phân trang
+
+`query.count()` trên bảng lớn không filter là 1 lần full scan mỗi request,
+thường tốn hơn cả việc lấy 1 trang. Các strategy:
+
+- exact: COUNT(*) như cũ
+- estimated: ước lượng của planner - `pg_class.reltuples` khi không có filter,
+  `EXPLAIN` row estimate khi có filter; nếu ước lượng nhỏ hơn
+  COUNT_ESTIMATE_EXACT_BELOW thì đếm chính xác luôn (rẻ)
+- cached: COUNT(*) chính xác, cache theo câu SQL + params trong
+  COUNT_CACHE_TTL_SECONDS giây
+- none: không đếm (infinite scroll)
+"""
+
+import enum
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+
+
+class CountStrategy(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    NONE = "none"
+
+
+# Pattern dùng cho Query param `count` ở các list endpoint
+COUNT_STRATEGY_PATTERN = "^(exact|estimated|cached|none)$"
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <statement> - compile được với mọi driver Postgres"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+_count_cache: TTLCache = TTLCache(
+    maxsize=settings.COUNT_CACHE_MAXSIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS
+)
+_count_cache_lock = threading.Lock()
+
+
+def _cache_key(query: Query) -> str:
+    """Key = câu SQL + params (cùng filter set => cùng key)"""
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    params = json.dumps(compiled.params, sort_keys=True, default=str)
+    return hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()
+
+
+def _table_estimate(query: Query) -> Optional[int]:
+    """reltuples của bảng chính (None nếu bảng chưa được ANALYZE)"""
+    table = query.column_descriptions[0]["entity"].__table__
+    estimate = query.session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+        {"table": table.name},
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def _explain_estimate(query: Query) -> int:
+    """Số dòng planner ước lượng cho query (đã áp filter)"""
+    plan = query.session.execute(_Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(query: Query) -> int:
+    if query.whereclause is None:
+        estimate = _table_estimate(query)
+    else:
+        estimate = _explain_estimate(query)
+
+    if estimate is None or estimate < settings.COUNT_ESTIMATE_EXACT_BELOW:
+        return query.count()
+    return estimate
+
+
+def cached_count(query: Query) -> int:
+    key = _cache_key(query)
+    with _count_cache_lock:
+        total = _count_cache.get(key)
+    if total is None:
+        total = query.count()
+        with _count_cache_lock:
+            _count_cache[key] = total
+    return total
+
+
+def count_total(query: Query, strategy: str = CountStrategy.EXACT) -> Optional[int]:
+    """Đếm tổng số dòng của query theo strategy (None khi strategy=none)"""
+    strategy = CountStrategy(strategy)
+    if strategy == CountStrategy.NONE:
+        return None
+    if strategy == CountStrategy.ESTIMATED:
+        return estimate_count(query)
+    if strategy == CountStrategy.CACHED:
+        return cached_count(query)
+    return query.count()
+
+
+def is_estimate(strategy: str) -> bool:
+    """Total có thể không chính xác tuyệt đối (ước lượng hoặc lấy từ cache)"""
+    return CountStrategy(strategy) in (CountStrategy.ESTIMATED, CountStrategy.CACHED)
@@ -1,16 +1,170 @@
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import engine_options
+from app.db import replicas
+from app.db import unit_of_work  # noqa: F401 - đăng ký listener after_commit
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Session đọc từ replica: bind engine replica lúc tạo session
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# Async engine (opt-in): chỉ được tạo khi có route/service async dùng tới,
+# để môi trường chưa cài asyncpg vẫn import app bình thường.
+_async_engine = None
+_AsyncSessionLocal = None
+_AsyncReplicaSessionLocal = None
+
+# Engine cấp số chứng từ (app.core.numbering): pool nhỏ riêng, autocommit
+_counter_engine = None
+_async_counter_engine = None
+
+
+def get_async_engine():
+    """Lấy (hoặc tạo lần đầu) async engine dùng driver asyncpg"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL, **engine_options(is_async=True)
+        )
+    return _async_engine
+
+
+def _counter_engine_options(is_async: bool = False) -> dict:
+    options = engine_options(is_async)
+    if "pool_size" in options:
+        options.update(pool_size=settings.DOCUMENT_NUMBER_POOL_SIZE, max_overflow=0)
+    options["isolation_level"] = "AUTOCOMMIT"
+    return options
+
+
+def get_counter_engine():
+    """Engine riêng cấp số chứng từ: không tranh connection với pool của request"""
+    global _counter_engine
+    if _counter_engine is None:
+        _counter_engine = create_engine(settings.DATABASE_URL, **_counter_engine_options())
+    return _counter_engine
+
+
+def get_async_counter_engine():
+    """Như get_counter_engine, driver asyncpg (cấp số trong AsyncSession.run_sync)"""
+    global _async_counter_engine
+    if _async_counter_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_counter_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL, **_counter_engine_options(is_async=True)
+        )
+    return _async_counter_engine
+
+
+def get_engines() -> dict:
+    """Các engine đang hoạt động (dùng cho pool metrics)"""
+    engines = {"primary": engine}
+    if _async_engine is not None:
+        engines["primary_async"] = _async_engine.sync_engine
+    if _counter_engine is not None:
+        engines["document_numbers"] = _counter_engine
+    if _async_counter_engine is not None:
+        engines["document_numbers_async"] = _async_counter_engine.sync_engine
+    engines.update(replicas.active_replica_engines())
+    return engines
+
+
+def get_async_sessionmaker():
+    """Lấy async_sessionmaker gắn với async engine"""
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _AsyncSessionLocal
+
 
 def get_db():
+    """
+    Database session dependency (unit of work của request)
+
+    Mọi dependency trong 1 request nhận cùng 1 session. Endpoint chạy xong
+    (kể cả serialize response) thì commit 1 lần, lỗi thì rollback.
+    Service chỉ flush(), không tự commit.
+    """
     db = SessionLocal()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async database session dependency (unit of work, giống get_db)
+
+    Dùng cho các route `async def` để không chiếm slot threadpool
+    trong lúc chờ Postgres.
+    """
+    async with get_async_sessionmaker()() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+def _use_replica(request: Request) -> bool:
+    """Đi replica nếu có cấu hình và user không vừa ghi dữ liệu (read-your-writes)"""
+    if not replicas.replicas_enabled():
+        return False
+    key = replicas.principal_key(request.headers.get("authorization"))
+    return not replicas.read_your_writes.should_read_primary(key)
+
+
+def get_read_db(request: Request):
+    """
+    Database session cho endpoint chỉ đọc (list/report)
+
+    Đọc từ read replica khi có DB_REPLICA_URLS, ngược lại dùng primary.
+    Không được ghi qua session này.
+    """
+    if _use_replica(request):
+        db = ReplicaSessionLocal(bind=replicas.choose_replica(replicas.get_replica_engines()))
+    else:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Async session cho endpoint chỉ đọc, đọc từ read replica nếu có"""
+    if not _use_replica(request):
+        async with get_async_sessionmaker()() as db:
+            yield db
+        return
+
+    global _AsyncReplicaSessionLocal
+    if _AsyncReplicaSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _AsyncReplicaSessionLocal = async_sessionmaker(
+            autoflush=False, expire_on_commit=False
+        )
+    bind = replicas.choose_replica(replicas.get_async_replica_engines())
+    async with _AsyncReplicaSessionLocal(bind=bind) as db:
+        yield db
@@ -0,0 +1,112 @@
+"""
+Database migrations lúc khởi động app
+
+- Kiểm tra nhanh "đã ở head chưa": so bảng alembic_version với head của
+  thư mục script, không load env.py / chạy upgrade nếu không cần
+- Upgrade chạy dưới Postgres advisory lock: nhiều worker khởi động cùng lúc
+  thì chỉ 1 process migrate, các process khác chờ rồi thấy đã ở head
+- RUN_MIGRATIONS_ON_STARTUP=false để tắt hẳn (migrate bằng `alembic upgrade head`
+  trong bước deploy)
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Key cố định cho pg_advisory_lock (dùng chung giữa app và CLI alembic)
+MIGRATION_LOCK_KEY = 726_590_001
+
+PROJECT_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ALEMBIC_INI = os.path.join(PROJECT_ROOT, "alembic.ini")
+
+
+def _alembic_config():
+    from alembic.config import Config as AlembicConfig
+
+    if not os.path.exists(ALEMBIC_INI):
+        # Fallback về CWD nếu app được cài ở nơi khác
+        return AlembicConfig("alembic.ini")
+
+    cfg = AlembicConfig(ALEMBIC_INI)
+    # script_location trong alembic.ini là đường dẫn tương đối theo CWD
+    cfg.set_main_option("script_location", os.path.join(PROJECT_ROOT, "alembic"))
+    return cfg
+
+
+def script_heads(cfg) -> Set[str]:
+    """Các revision head trong alembic/versions"""
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(cfg).get_heads())
+
+
+def current_revisions(connection) -> Set[str]:
+    """Các revision đang ghi trong bảng alembic_version (rỗng nếu chưa có bảng)"""
+    try:
+        with connection.begin_nested():
+            rows = connection.execute(text("SELECT version_num FROM alembic_version"))
+            return {row[0] for row in rows}
+    except ProgrammingError:
+        return set()
+
+
+@contextmanager
+def migration_lock(connection):
+    """Giữ pg_advisory_lock (session-level) trong suốt quá trình migrate"""
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    connection.commit()
+    try:
+        yield connection
+    finally:
+        connection.rollback()
+        connection.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        )
+        connection.commit()
+
+
+def run_db_migrations(engine=None) -> bool:
+    """
+    Upgrade database lên head nếu cần
+
+    Returns:
+        True nếu đã chạy upgrade, False nếu bỏ qua (tắt / đã ở head / lỗi)
+    """
+    if not settings.RUN_MIGRATIONS_ON_STARTUP:
+        logger.info("[Startup] RUN_MIGRATIONS_ON_STARTUP=false, skip migrations")
+        return False
+
+    if engine is None:
+        from app.db.database import engine
+
+    try:
+        cfg = _alembic_config()
+        heads = script_heads(cfg)
+
+        with engine.connect() as connection:
+            if current_revisions(connection) == heads:
+                return False
+
+            with migration_lock(connection):
+                # Process khác có thể đã migrate xong trong lúc chờ lock
+                if current_revisions(connection) == heads:
+                    return False
+
+                from alembic import command as alembic_command
+
+                cfg.attributes["connection"] = connection
+                alembic_command.upgrade(cfg, "head")
+                connection.commit()
+                return True
+    except Exception as e:
+        # Log và tiếp tục khởi động, không chặn app vì lỗi migration
+        logger.error("[Startup] Alembic migration skipped/error: %s", e)
+        return False
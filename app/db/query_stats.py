@@ -0,0 +1,143 @@
+"""
+SQL Query Stats - Đếm số câu SQL và thời gian DB theo từng request
+
+- Hook `before_cursor_execute` / `after_cursor_execute` trên mọi Engine
+  (sync, async, replica) ghi vào stats của request hiện tại (contextvar)
+- Phát hiện N+1: cùng 1 "shape" câu SQL lặp lại nhiều lần trong 1 request
+- `query_budget()`: helper cho test, assert số câu SQL tối đa của 1 endpoint
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Gộp danh sách placeholder của IN (...) để IN 2 phần tử và IN 20 phần tử
+# được tính là cùng 1 shape
+_PLACEHOLDER_LIST_RE = re.compile(
+    r"\(\s*(?:%\([^)]+\)s|\$\d+|\?|:\w+)(?:\s*,\s*(?:%\([^)]+\)s|\$\d+|\?|:\w+))+\s*\)"
+)
+
+
+def statement_shape(statement: str) -> str:
+    """Chuẩn hóa câu SQL thành shape (bỏ khác biệt whitespace, độ dài IN-list)"""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST_RE.sub("(?)", shape)
+
+
+class RequestQueryStats:
+    """Thống kê SQL của 1 request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[shape] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        """Các shape lặp lại >= threshold lần (nghi N+1)"""
+        with self._lock:
+            return [
+                (shape, n) for shape, n in self.shapes.most_common() if n >= threshold
+            ]
+
+    def server_timing(self) -> str:
+        """Giá trị header Server-Timing cho phần DB"""
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "robis_query_stats", default=None
+)
+
+
+def start_request_stats() -> Tuple[RequestQueryStats, object]:
+    """Bắt đầu đếm cho request hiện tại, trả về (stats, token để reset)"""
+    stats = RequestQueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def stop_request_stats(token) -> None:
+    _current_stats.reset(token)
+
+
+def get_request_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("robis_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("robis_query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+_hooks_installed = False
+
+
+def install_query_hooks() -> None:
+    """Gắn hook vào class Engine (áp dụng cho mọi engine, gọi nhiều lần vẫn an toàn)"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _hooks_installed = True
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Test helper: assert số câu SQL chạy trong block không vượt quá max_queries
+
+    Đếm trên toàn process (không phụ thuộc contextvar) nên dùng được với
+    TestClient, nơi request chạy ở thread khác.
+
+    Example:
+        with query_budget(3):
+            client.get("/api/v1/orders/", headers=auth_headers)
+    """
+    captured = RequestQueryStats()
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.record(statement, 0.0)
+
+    event.listen(Engine, "before_cursor_execute", _capture)
+    try:
+        yield captured
+    finally:
+        event.remove(Engine, "before_cursor_execute", _capture)
+
+    if captured.count > max_queries:
+        details = "\n".join(
+            f"  {n}x {shape[:200]}" for shape, n in captured.shapes.most_common()
+        )
+        raise QueryBudgetExceeded(
+            f"Query budget exceeded: {captured.count} > {max_queries}\n{details}"
+        )
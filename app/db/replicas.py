@@ -0,0 +1,113 @@
+"""
+Read Replica Routing
+
+- Engine (sync + async) cho từng URL trong DB_REPLICA_URLS, chọn round-robin
+- Read-your-writes: sau khi 1 user ghi dữ liệu, các request đọc của chính
+  user đó đi primary trong DB_READ_YOUR_WRITES_SECONDS giây để không thấy
+  dữ liệu cũ do replica lag
+
+Tracker nằm trong memory của từng process: chạy nhiều worker thì request
+đọc sau khi ghi có thể rơi vào worker khác và vẫn đi replica.
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.db.pool import engine_options
+
+
+class ReadYourWritesTracker:
+    """Ghi nhớ thời điểm ghi gần nhất theo principal (thread-safe)"""
+
+    # Dọn các entry hết hạn khi dict vượt ngưỡng này
+    _PRUNE_THRESHOLD = 10000
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._expires_at: Dict[str, float] = {}
+
+    def mark_write(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._expires_at[key] = now + self.window_seconds
+            if len(self._expires_at) > self._PRUNE_THRESHOLD:
+                self._expires_at = {
+                    k: v for k, v in self._expires_at.items() if v > now
+                }
+
+    def should_read_primary(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            expires_at = self._expires_at.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+
+
+read_your_writes = ReadYourWritesTracker(settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+def principal_key(authorization: Optional[str]) -> Optional[str]:
+    """Key của principal từ header Authorization (hash, không lưu token gốc)"""
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def replicas_enabled() -> bool:
+    return bool(settings.REPLICA_URLS)
+
+
+_replica_engines: Optional[List] = None
+_async_replica_engines: Optional[List] = None
+_lock = threading.Lock()
+_round_robin = itertools.count()
+
+
+def get_replica_engines() -> List:
+    """Sync engine của các replica (tạo lần đầu khi cần)"""
+    global _replica_engines
+    if _replica_engines is None:
+        with _lock:
+            if _replica_engines is None:
+                _replica_engines = [
+                    create_engine(url, **engine_options())
+                    for url in settings.REPLICA_URLS
+                ]
+    return _replica_engines
+
+
+def get_async_replica_engines() -> List:
+    """Async engine (asyncpg) của các replica (tạo lần đầu khi cần)"""
+    global _async_replica_engines
+    if _async_replica_engines is None:
+        with _lock:
+            if _async_replica_engines is None:
+                from sqlalchemy.ext.asyncio import create_async_engine
+
+                _async_replica_engines = [
+                    create_async_engine(url, **engine_options(is_async=True))
+                    for url in settings.ASYNC_REPLICA_URLS
+                ]
+    return _async_replica_engines
+
+
+def choose_replica(engines: List):
+    """Chọn replica theo round-robin"""
+    return engines[next(_round_robin) % len(engines)]
+
+
+def active_replica_engines() -> Dict[str, object]:
+    """Các replica engine đã được tạo (dùng cho pool metrics)"""
+    engines: Dict[str, object] = {}
+    for i, engine in enumerate(_replica_engines or []):
+        engines[f"replica_{i}"] = engine
+    for i, engine in enumerate(_async_replica_engines or []):
+        engines[f"replica_{i}_async"] = engine.sync_engine
+    return engines
@@ -0,0 +1,56 @@
+"""
+Unit of work - 1 session / 1 transaction cho mỗi request
+
+get_db / get_async_db (app/db/database.py) tạo 1 session cho cả request
+(FastAPI cache dependency theo request nên mọi dependency dùng chung 1
+connection), commit 1 lần khi endpoint chạy xong, rollback nếu có lỗi.
+Service chỉ flush() để lấy id / kiểm tra constraint, không tự commit.
+
+Việc chỉ được làm khi dữ liệu đã commit (invalidate cache trong process...)
+đăng ký qua after_commit(); transaction bị rollback thì bỏ qua.
+"""
+
+import logging
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_CALLBACKS_KEY = "after_commit_callbacks"
+
+
+def _sync_session(db) -> Session:
+    # AsyncSession bọc 1 Session thường, callback gắn vào session bên trong
+    return getattr(db, "sync_session", db)
+
+
+def after_commit(db, callback: Callable[[], None]) -> None:
+    """
+    Chạy callback sau khi transaction hiện tại của session commit thành công
+
+    Args:
+        db: Session hoặc AsyncSession
+        callback: Hàm không tham số (VD: invalidate principal cache)
+    """
+    _sync_session(db).info.setdefault(_CALLBACKS_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_CALLBACKS_KEY, []):
+        try:
+            callback()
+        except Exception:
+            # Dữ liệu đã commit, lỗi callback không được làm fail request
+            logger.exception("after_commit callback failed")
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_rollback(session: Session, transaction) -> None:
+    # Chỉ khi transaction ngoài cùng kết thúc: after_rollback cũng chạy khi
+    # rollback SAVEPOINT (VD: allocate_fefo), không được bỏ callback đã đăng ký
+    # trước đó. Commit thì _run_after_commit đã lấy hết, còn lại = rollback
+    if transaction.parent is None:
+        session.info.pop(_CALLBACKS_KEY, None)
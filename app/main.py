@@ -1,9 +1,17 @@
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core import metrics
+from app.core.middleware import (
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+    ReadYourWritesMiddleware,
+)
 from app.api.v1 import (
+    admin,
     auth,
     users,
     roles,
@@ -18,26 +26,10 @@ from app.api.v1 import (
     performance,
     public_attendance,
 )
-from app.api.v1.endpoints import ai
-
-# Auto-run Alembic migrations on startup (safe if already at head)
-import os
-from alembic import command as alembic_command
-from alembic.config import Config as AlembicConfig
-
-def run_db_migrations():
-    try:
-        # Resolve alembic.ini relative to project root
-        current_dir = os.path.dirname(__file__)  # app/
-        alembic_ini = os.path.normpath(os.path.join(current_dir, "..", "alembic.ini"))
-        if not os.path.exists(alembic_ini):
-            # Fallback to CWD
-            alembic_ini = "alembic.ini"
-        cfg = AlembicConfig(alembic_ini)
-        alembic_command.upgrade(cfg, "head")
-    except Exception as e:
-        # Log and continue startup; avoids blocking app if migration is no-op or already applied
-        print(f"[Startup] Alembic migration skipped/error: {e}")
+from app.db.migrations import run_db_migrations
+from app.core.password_pool import password_pool
+from app.core.permission_bits import permission_registry
+
 
 app = FastAPI(
     title="Robis ERP Backend API",
@@ -72,11 +64,33 @@ Hệ thống sử dụng Role-Based Access Control (RBAC):
     redoc_url="/redoc",
 )
 
-# Run DB migrations automatically on startup (idempotent)
+# Run DB migrations on startup (idempotent, advisory lock; tắt bằng RUN_MIGRATIONS_ON_STARTUP=false)
 @app.on_event("startup")
 async def _run_migrations_on_startup():
     run_db_migrations()
 
+
+# Permission registry (name -> bit) load 1 lần ở startup, xem app/core/permission_bits.py
+@app.on_event("startup")
+async def _load_permission_registry():
+    await permission_registry.refresh_async()
+
+
+# Process pool cho bcrypt (login / tạo user), xem app/core/password_pool.py
+@app.on_event("startup")
+async def _start_password_pool():
+    password_pool.start()
+
+
+@app.on_event("shutdown")
+async def _stop_password_pool():
+    password_pool.shutdown()
+
+# MetricsMiddleware thêm trước => nằm trong QueryStatsMiddleware, đọc được SQL stats
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -90,7 +104,8 @@ app.add_middleware(
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={"detail": "Dữ liệu không hợp lệ", "errors": exc.errors()},
+        # errors() có thể chứa exception (ctx của validator): encode như handler mặc định
+        content={"detail": "Dữ liệu không hợp lệ", "errors": jsonable_encoder(exc.errors())},
     )
 
 
@@ -109,8 +124,13 @@ app.include_router(attendance.router, prefix="/api/v1", tags=["Attendance"])
 app.include_router(performance.router, prefix="/api/v1", tags=["Performance Reviews"])
 # Public Attendance Routes (QR/Kiosk - NEW)
 app.include_router(public_attendance.router)
-# AI Module Routes (NEW)
-app.include_router(ai.router, prefix="/api/v1", tags=["AI Assistant"])
+# Admin / Operations Routes
+app.include_router(admin.router, prefix="/api/v1")
+# AI Module Routes (NEW) - Gemini SDK chỉ được import ở lần chat đầu tiên
+if settings.AI_ENABLED:
+    from app.api.v1.endpoints import ai
+
+    app.include_router(ai.router, prefix="/api/v1", tags=["AI Assistant"])
 
 
 @app.get("/")
@@ -121,3 +141,13 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition format (async để đọc được threadpool limiter)"""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
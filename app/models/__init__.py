@@ -12,9 +12,17 @@ from app.models.order import (
 from app.models.product import Product, ProductCategory
 from app.models.inventory import (
     Batch,
+    BatchStock,
+    CostLayer,
+    CycleCount,
+    CycleCountLine,
+    InventoryValuation,
+    ProductStockSummary,
     Warehouse,
     Stock,
     StockMovement,
+    StockSnapshot,
+    StockSnapshotLine,
     QCCheckpoint,
     MovementType,
     QCCheckpointType,
@@ -32,6 +40,7 @@ from app.models.attendance import (
     LeaveType,
 )
 from app.models.performance import PerformanceReview
+from app.models.document_counter import DocumentCounter
 
 
 
@@ -50,9 +59,17 @@ __all__ = [
     "Product",
     "ProductCategory",
     "Batch",
+    "BatchStock",
+    "CostLayer",
+    "CycleCount",
+    "CycleCountLine",
+    "InventoryValuation",
+    "ProductStockSummary",
     "Warehouse",
     "Stock",
     "StockMovement",
+    "StockSnapshot",
+    "StockSnapshotLine",
     "QCCheckpoint",
     "MovementType",
     "QCCheckpointType",
@@ -65,4 +82,5 @@ __all__ = [
     "AttendanceStatus",
     "LeaveType",
     "PerformanceReview",
+    "DocumentCounter",
 ]
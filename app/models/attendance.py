@@ -14,6 +14,7 @@ from sqlalchemy import (
     Numeric,
     Boolean,
     Enum,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -45,6 +46,10 @@ class Attendance(Base):
     """Chấm công"""
 
     __tablename__ = "attendance"
+    __table_args__ = (
+        # Check-in / check-out tìm theo (employee_id, date), lịch sử theo nhân viên
+        Index("ix_attendance_employee_date", "employee_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -0,0 +1,17 @@
+"""
+DocumentCounter Model - Bộ đếm số chứng từ (batch, phiếu kho, đơn hàng, ...)
+"""
+
+from sqlalchemy import BigInteger, Column, String
+from app.db.database import Base
+
+
+class DocumentCounter(Base):
+    __tablename__ = "document_counters"
+
+    # VD: scope "ORD-B2C", period "20250101" -> ORD-B2C-20250101-0001
+    scope = Column(String(50), primary_key=True)
+    period = Column(String(8), primary_key=True, default="")  # "" = không reset theo ngày
+
+    # Số lớn nhất đã cấp phát (kể cả số đang giữ trong block của worker)
+    last_value = Column(BigInteger, nullable=False, default=0)
@@ -13,6 +13,9 @@ from sqlalchemy import (
     Text,
     Boolean,
     Date,
+    Index,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
@@ -24,6 +27,19 @@ class Batch(Base):
     """Lô hàng"""
 
     __tablename__ = "batches"
+    __table_args__ = (
+        Index("ix_batches_product_id", "product_id"),
+        # FEFO: chỉ batch xuất được, sắp theo hạn dùng (NULL cuối như ORDER BY)
+        Index(
+            "ix_batches_fefo",
+            "product_id",
+            "expiry_date",
+            "id",
+            postgresql_where=text(
+                "qc_status = 'passed' AND is_active AND current_quantity > 0"
+            ),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -46,6 +62,9 @@ class Batch(Base):
     # Status
     is_active = Column(Boolean, default=True)
 
+    # Tăng 1 mỗi lần ghi (số lượng, QC status): cập nhật có điều kiện theo version
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Audit
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=datetime.utcnow)
@@ -75,6 +94,9 @@ class Stock(Base):
     """Tồn kho theo kho và sản phẩm"""
 
     __tablename__ = "stocks"
+    __table_args__ = (
+        UniqueConstraint("warehouse_id", "product_id", name="uq_stocks_warehouse_product"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -82,6 +104,7 @@ class Stock(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
 
     quantity = Column(Float, default=0)  # Tổng tồn kho
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Tăng 1 mỗi lần ghi
 
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -90,6 +113,57 @@ class Stock(Base):
     product = relationship("Product", back_populates="stocks")
 
 
+class BatchStock(Base):
+    """Tồn kho theo lô trong từng kho (xuất kho FEFO lock các dòng này)"""
+
+    __tablename__ = "batch_stocks"
+    __table_args__ = (
+        UniqueConstraint("batch_id", "warehouse_id", name="uq_batch_stocks_batch_warehouse"),
+        Index("ix_batch_stocks_warehouse_product", "warehouse_id", "product_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    batch_id = Column(Integer, ForeignKey("batches.id"), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)  # = batch.product_id
+
+    quantity = Column(Float, nullable=False, default=0)  # Số lượng của batch đang nằm ở kho này
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    batch = relationship("Batch")
+    warehouse = relationship("Warehouse")
+
+
+class ProductStockSummary(Base):
+    """Tổng hợp tồn kho theo sản phẩm (read model, cập nhật cùng transaction với phiếu kho)"""
+
+    __tablename__ = "product_stock_summaries"
+    __table_args__ = (
+        Index(
+            "ix_product_stock_summaries_low_stock",
+            "product_id",
+            postgresql_where=text("is_low_stock"),
+        ),
+    )
+
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    on_hand = Column(Float, nullable=False, default=0)  # Tổng tồn mọi kho (= SUM(stocks.quantity))
+    available = Column(Float, nullable=False, default=0)  # Tồn trong batch QC passed, active (xuất FEFO được)
+    is_low_stock = Column(Boolean, nullable=False, default=False)  # on_hand < products.min_stock
+
+    last_movement_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    product = relationship("Product")
+
+
 class MovementType(str, enum.Enum):
     """Loại phiếu kho"""
 
@@ -104,6 +178,18 @@ class StockMovement(Base):
     """Nhập/Xuất/Kiểm kho"""
 
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Lịch sử theo sản phẩm / kho, ORDER BY created_at DESC, id DESC
+        Index("ix_stock_movements_product_created_at", "product_id", "created_at", "id"),
+        Index("ix_stock_movements_warehouse_created_at", "warehouse_id", "created_at", "id"),
+        Index(
+            "ix_stock_movements_to_warehouse_created_at",
+            "to_warehouse_id",
+            "created_at",
+            "id",
+            postgresql_where=text("to_warehouse_id IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -115,11 +201,13 @@ class StockMovement(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     batch_id = Column(Integer, ForeignKey("batches.id"))
 
-    # Warehouse
+    # Warehouse (transfer: kho nguồn -> to_warehouse_id)
     warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    to_warehouse_id = Column(Integer, ForeignKey("warehouses.id"))  # Chỉ có với TRANSFER
 
-    # Quantity
+    # Quantity (ADJUST: có dấu, + thừa / - thiếu)
     quantity = Column(Float, nullable=False)
+    unit_cost = Column(Float)  # Giá vốn / đơn vị của hàng vào kho (IMPORT, ADJUST +)
 
     # Reference
     reference_type = Column(String(50))  # VD: "order", "purchase_order"
@@ -135,10 +223,160 @@ class StockMovement(Base):
     # Relationships
     product = relationship("Product")
     batch = relationship("Batch", back_populates="stock_movements")
-    warehouse = relationship("Warehouse")
+    warehouse = relationship("Warehouse", foreign_keys=[warehouse_id])
+    to_warehouse = relationship("Warehouse", foreign_keys=[to_warehouse_id])
     created_by_user = relationship("User", foreign_keys=[created_by])
 
 
+class InventoryValuation(Base):
+    """Giá trị tồn theo (kho, sản phẩm): FIFO và bình quân gia quyền, cập nhật cùng transaction với phiếu kho"""
+
+    __tablename__ = "inventory_valuations"
+    __table_args__ = (
+        UniqueConstraint(
+            "warehouse_id", "product_id", name="uq_inventory_valuations_warehouse_product"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+
+    quantity = Column(Float, nullable=False, default=0)  # Số lượng theo movement
+    fifo_value = Column(Float, nullable=False, default=0)  # = SUM(remaining * unit_cost) các cost_layers
+    average_value = Column(Float, nullable=False, default=0)  # Giá trị theo bình quân gia quyền
+    average_cost = Column(Float, nullable=False, default=0)  # Giá bình quân hiện tại (giữ lại khi tồn về 0)
+
+    last_movement_id = Column(Integer)  # Movement mới nhất đã tính
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    warehouse = relationship("Warehouse")
+    product = relationship("Product")
+
+
+class CostLayer(Base):
+    """Lớp giá FIFO: 1 lần hàng vào kho với 1 đơn giá, xuất kho trừ dần lớp cũ nhất"""
+
+    __tablename__ = "cost_layers"
+    __table_args__ = (
+        # Lớp còn hàng của (kho, sản phẩm) theo thứ tự vào kho
+        Index(
+            "ix_cost_layers_open",
+            "warehouse_id",
+            "product_id",
+            "id",
+            postgresql_where=text("remaining_quantity > 0"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    movement_id = Column(Integer, ForeignKey("stock_movements.id", ondelete="CASCADE"))  # Movement tạo lớp
+
+    unit_cost = Column(Float, nullable=False)
+    quantity = Column(Float, nullable=False)  # Số lượng vào
+    remaining_quantity = Column(Float, nullable=False)  # Số lượng còn lại
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StockSnapshot(Base):
+    """Snapshot tồn kho tại 1 thời điểm (gồm các movement có created_at < snapshot_at)"""
+
+    __tablename__ = "stock_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_at = Column(DateTime, unique=True, nullable=False)
+    line_count = Column(Integer, default=0)  # Số dòng (kho, sản phẩm, batch) tồn khác 0
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    lines = relationship(
+        "StockSnapshotLine", back_populates="snapshot", cascade="all, delete-orphan"
+    )
+
+
+class StockSnapshotLine(Base):
+    """Tồn theo (kho, sản phẩm, batch) tại thời điểm snapshot"""
+
+    __tablename__ = "stock_snapshot_lines"
+    __table_args__ = (
+        Index(
+            "ix_stock_snapshot_lines_snapshot_warehouse_product",
+            "snapshot_id",
+            "warehouse_id",
+            "product_id",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    snapshot_id = Column(
+        Integer, ForeignKey("stock_snapshots.id", ondelete="CASCADE"), nullable=False
+    )
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    batch_id = Column(Integer, ForeignKey("batches.id"))  # NULL = movement không gắn batch
+
+    quantity = Column(Float, nullable=False)
+
+    # Relationships
+    snapshot = relationship("StockSnapshot", back_populates="lines")
+
+
+class CycleCount(Base):
+    """Phiếu kiểm kê 1 kho: nhận số đếm, xem chênh lệch, duyệt thì ghi ADJUST"""
+
+    __tablename__ = "cycle_counts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    count_number = Column(String(50), unique=True, index=True, nullable=False)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+
+    status = Column(String(20), nullable=False, default="open")  # open, approved
+    note = Column(Text)
+    line_count = Column(Integer, nullable=False, default=0)  # Số dòng đếm đã nhận
+    adjustment_count = Column(Integer)  # Số movement ADJUST đã ghi khi duyệt
+
+    # Audit
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    approved_by = Column(Integer, ForeignKey("users.id"))
+    approved_at = Column(DateTime)
+
+    # Relationships
+    warehouse = relationship("Warehouse")
+    lines = relationship(
+        "CycleCountLine", back_populates="cycle_count", cascade="all, delete-orphan"
+    )
+
+
+class CycleCountLine(Base):
+    """1 dòng đếm (kho, sản phẩm, batch); cùng batch đếm ở nhiều vị trí thì cộng dồn"""
+
+    __tablename__ = "cycle_count_lines"
+    __table_args__ = (
+        Index("ix_cycle_count_lines_count_product", "cycle_count_id", "product_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    cycle_count_id = Column(
+        Integer, ForeignKey("cycle_counts.id", ondelete="CASCADE"), nullable=False
+    )
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    batch_id = Column(Integer, ForeignKey("batches.id", ondelete="CASCADE"))  # NULL = hàng không theo lô
+
+    counted_quantity = Column(Float, nullable=False)
+
+    # Relationships
+    cycle_count = relationship("CycleCount", back_populates="lines")
+
+
 class QCCheckpointType(str, enum.Enum):
     """Điểm kiểm QC"""
 
@@ -1,9 +1,25 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from decimal import Decimal
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from app.db.database import Base
 
 
+class PermissionBits(TypeDecorator):
+    """Bitset quyền (int Python không giới hạn bit) lưu dạng NUMERIC"""
+
+    impl = Numeric
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else Decimal(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else int(value)
+
+
 class User(Base):
     """User model"""
 
@@ -16,6 +32,8 @@ class User(Base):
     full_name = Column(String(100))
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # Quyền hiệu lực từ các role active (bit N = permission id N), xem app/core/permission_bits.py
+    permission_bits = Column(PermissionBits, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Generic, TypeVar, List
+from typing import Generic, TypeVar, List, Optional
 
 # Type variable cho generic pagination
 T = TypeVar("T")
@@ -25,20 +25,40 @@ class PaginationParams(BaseModel):
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
-    """Generic paginated response"""
+    """
+    Generic paginated response
+
+    - Offset mode (page/page_size): có total, total_pages; total_is_estimate=true
+      khi total là ước lượng/cache (count=estimated|cached)
+    - Cursor mode (pagination=cursor): dùng next_cursor để lấy trang tiếp,
+      total/total_pages/page là null
+    """
 
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
     @classmethod
     def create(
-        cls, items: List[T], total: int, page: int, page_size: int
+        cls,
+        items: List[T],
+        total: Optional[int],
+        page: int,
+        page_size: int,
+        total_is_estimate: bool = False,
     ) -> "PaginatedResponse[T]":
-        """Helper method to create paginated response"""
-        total_pages = (total + page_size - 1) // page_size  # Ceiling division
+        """
+        Helper method to create paginated response
+
+        total=None khi client chọn count=none (không đếm)
+        """
+        total_pages = None
+        if total is not None:
+            total_pages = (total + page_size - 1) // page_size  # Ceiling division
 
         return cls(
             items=items,
@@ -46,4 +66,12 @@ class PaginatedResponse(BaseModel, Generic[T]):
             page=page,
             page_size=page_size,
             total_pages=total_pages,
+            total_is_estimate=total_is_estimate and total is not None,
         )
+
+    @classmethod
+    def create_cursor(
+        cls, items: List[T], page_size: int, next_cursor: Optional[str]
+    ) -> "PaginatedResponse[T]":
+        """Helper tạo response cho cursor (keyset) pagination"""
+        return cls(items=items, page_size=page_size, next_cursor=next_cursor)
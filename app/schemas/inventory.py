@@ -58,6 +58,7 @@ class BatchUpdate(BaseModel):
     qc_status: Optional[str] = Field(None, pattern="^(pending|passed|failed)$")
     qc_note: Optional[str] = None
     is_active: Optional[bool] = None
+    version: Optional[int] = None  # Version client đang có; batch đã đổi thì trả 409
 
 
 class Batch(BatchBase):
@@ -67,6 +68,7 @@ class Batch(BatchBase):
     qc_status: str
     qc_note: Optional[str] = None
     is_active: bool
+    version: int
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -82,6 +84,7 @@ class Stock(BaseModel):
     warehouse_id: int
     product_id: int
     quantity: float
+    version: int
     updated_at: datetime
 
     class Config:
@@ -95,9 +98,37 @@ class StockSummary(BaseModel):
     product_sku: str
     product_name: str
     total_quantity: float
+    available_quantity: float = 0  # Trong batch QC passed, xuất được
+    is_low_stock: bool = False  # total_quantity < min_stock
+    last_movement_at: Optional[datetime] = None
     warehouses: list[dict]  # [{warehouse_id, warehouse_name, quantity}]
 
 
+class StockSnapshot(BaseModel):
+    id: int
+    snapshot_at: datetime
+    line_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StockAsOfItem(BaseModel):
+    warehouse_id: int
+    product_id: int
+    batch_id: Optional[int] = None  # Chỉ có khi by_batch=true
+    quantity: float
+
+
+class StockAsOf(BaseModel):
+    """Tồn kho tại 1 thời điểm"""
+
+    at: datetime
+    snapshot_at: Optional[datetime] = None  # Snapshot dùng làm gốc (None = tính từ đầu)
+    items: list[StockAsOfItem]
+
+
 # ============= STOCK MOVEMENT =============
 
 
@@ -107,6 +138,7 @@ class StockMovementBase(BaseModel):
     batch_id: Optional[int] = None
     warehouse_id: int
     quantity: float = Field(..., gt=0)
+    unit_cost: Optional[float] = Field(None, ge=0)  # Giá vốn / đơn vị khi nhập (None = cost_price)
     reference_type: Optional[str] = Field(None, max_length=50)
     reference_id: Optional[int] = None
     note: Optional[str] = None
@@ -119,6 +151,8 @@ class StockMovementCreate(StockMovementBase):
 class StockMovement(StockMovementBase):
     id: int
     movement_number: str
+    quantity: float  # adjust: có dấu (+ thừa / - thiếu so với sổ)
+    to_warehouse_id: Optional[int] = None  # Kho đích, chỉ có với transfer
     created_by: int
     created_at: datetime
 
@@ -135,6 +169,151 @@ class StockMovementWithDetails(StockMovement):
     created_by_user: Optional[dict] = None
 
 
+class StockMovementBulkLine(BaseModel):
+    """Kết quả 1 dòng của bulk nhập / xuất"""
+
+    line: int  # Thứ tự dòng trong request, bắt đầu từ 1
+    success: bool
+    movement_ids: list[int] = []  # Xuất FEFO qua nhiều batch -> nhiều movement
+    movement_numbers: list[str] = []
+    error: Optional[str] = None
+
+
+class StockMovementBulkResult(BaseModel):
+    """Kết quả bulk nhập / xuất: dòng lỗi bị bỏ qua, các dòng còn lại đã ghi"""
+
+    total: int
+    succeeded: int
+    failed: int
+    results: list[StockMovementBulkLine]
+
+
+class StockTransferCreate(BaseModel):
+    """Chuyển kho: rời kho nguồn và vào kho đích trong cùng 1 transaction"""
+
+    product_id: int
+    from_warehouse_id: int
+    to_warehouse_id: int
+    batch_id: Optional[int] = None  # None = chia FEFO như xuất kho
+    quantity: float = Field(..., gt=0)
+    reference_type: Optional[str] = Field(None, max_length=50)
+    reference_id: Optional[int] = None
+    note: Optional[str] = None
+
+    @validator("to_warehouse_id")
+    def validate_to_warehouse(cls, v, values):
+        if v == values.get("from_warehouse_id"):
+            raise ValueError("Kho đích phải khác kho nguồn")
+        return v
+
+
+# ============= CYCLE COUNT =============
+
+
+class CycleCountCreate(BaseModel):
+    warehouse_id: int
+    note: Optional[str] = None
+
+
+class CycleCount(BaseModel):
+    id: int
+    count_number: str
+    warehouse_id: int
+    status: str
+    note: Optional[str] = None
+    line_count: int
+    adjustment_count: Optional[int] = None
+    created_by: int
+    created_at: datetime
+    approved_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CycleCountLineCreate(BaseModel):
+    """1 dòng đếm; cùng (sản phẩm, batch) ở nhiều vị trí thì gửi nhiều dòng, được cộng dồn"""
+
+    product_id: int
+    batch_id: Optional[int] = None  # None = hàng không theo lô
+    counted_quantity: float = Field(..., ge=0)
+
+
+class CycleCountLineError(BaseModel):
+    line: int  # Thứ tự dòng trong request, bắt đầu từ 1
+    error: str
+
+
+class CycleCountUploadResult(BaseModel):
+    """Kết quả upload số đếm: dòng lỗi bị bỏ qua, các dòng còn lại đã lưu"""
+
+    received: int
+    accepted: int
+    failed: int
+    errors: list[CycleCountLineError]  # Tối đa 100 lỗi đầu tiên
+
+
+class CycleCountVarianceItem(BaseModel):
+    product_id: int
+    batch_id: Optional[int] = None
+    expected_quantity: float  # Theo sổ lúc mở phiếu: batch_stocks, hoặc phần stocks không theo lô
+    counted_quantity: float
+    variance: float  # counted - expected
+
+
+class CycleCountVariance(BaseModel):
+    """Chênh lệch kiểm kê (preview trước khi duyệt)"""
+
+    cycle_count_id: int
+    warehouse_id: int
+    status: str
+    items_total: int  # Số (sản phẩm, batch) trong phạm vi kiểm kê
+    items_with_variance: int
+    total_expected: float
+    total_counted: float
+    net_variance: float
+    gross_variance: float  # Tổng |variance|
+    items: list[CycleCountVarianceItem]
+
+
+# ============= VALUATION =============
+
+
+class InventoryValuationGroup(BaseModel):
+    """1 nhóm của báo cáo giá trị tồn (theo kho / danh mục)"""
+
+    warehouse_id: Optional[int] = None
+    warehouse_name: Optional[str] = None
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    product_count: int  # Số sản phẩm còn tồn
+    quantity: float
+    value: float
+
+
+class InventoryValuationReport(BaseModel):
+    method: str  # fifo | average
+    group_by: str  # warehouse | category | warehouse_category
+    total_quantity: float
+    total_value: float
+    items: list[InventoryValuationGroup]
+
+
+class InventoryValuationItem(BaseModel):
+    """Giá trị tồn của 1 (kho, sản phẩm)"""
+
+    warehouse_id: int
+    product_id: int
+    product_sku: str
+    product_name: str
+    quantity: float
+    fifo_value: float
+    average_value: float
+    average_cost: float  # Giá bình quân gia quyền hiện tại
+    updated_at: Optional[datetime] = None
+
+
 # ============= QC CHECKPOINT =============
 
 
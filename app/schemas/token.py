@@ -13,3 +13,6 @@ class TokenData(BaseModel):
     """Schema cho data decode từ JWT token"""
 
     username: Optional[str] = None
+    # Chỉ có khi token được mint với JWT_PERMISSIONS_CLAIM
+    is_superuser: Optional[bool] = None
+    permission_bits: Optional[int] = None
@@ -0,0 +1,225 @@
+"""
+Query plan check - EXPLAIN các query nóng, báo lỗi nếu có Seq Scan
+
+Chạy đúng code service (FEFO, tìm stock, lịch sử movement, chấm công, as-of,
+cập nhật giá trị tồn)
+trong 1 transaction rồi rollback, ghi lại các câu SELECT đã gửi xuống DB và
+EXPLAIN từng câu với enable_seqscan = off: planner vẫn chọn Seq Scan nghĩa là
+không có index dùng được cho filter / ORDER BY đó (dữ liệu seed nhỏ cũng thấy).
+
+Exit code 1 nếu có Seq Scan, dùng được trong CI sau `alembic upgrade head`
+và seed dữ liệu (seed_data / generate_data / benchmarks).
+
+Usage:
+    python -m app.scripts.check_query_plans
+    python -m app.scripts.check_query_plans --verbose   # in cả plan
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.database import engine
+from app.models.attendance import Attendance
+from app.models.hr import Employee
+from app.models.inventory import BatchStock, Stock, StockMovement
+from app.schemas.attendance import AttendanceCheckIn
+from app.services.attendance_service import AttendanceService
+from app.services.inventory_service import (
+    BatchService,
+    StockMovementService,
+    StockService,
+)
+from app.services.stock_ledger_service import StockLedgerService
+from app.services.valuation_service import ValuationService
+
+
+@dataclass
+class Sample:
+    """ID mẫu lấy từ dữ liệu đã seed (không có thì dùng 1)"""
+
+    product_id: int = 1
+    warehouse_id: int = 1
+    employee_id: int = 1
+    movement_id: int = 1
+
+
+# (tên, hàm chạy query qua service)
+HOT_QUERIES: List[Tuple[str, Callable[[Session, Sample], Any]]] = [
+    (
+        "batches_fefo",
+        lambda db, s: BatchService.get_batches_fefo(db, s.product_id),
+    ),
+    (
+        "allocate_fefo",
+        lambda db, s: BatchService.allocate_fefo(db, s.product_id, s.warehouse_id, 1),
+    ),
+    (
+        "stock_lookup",
+        lambda db, s: StockService.get_stock(
+            db, s.warehouse_id, s.product_id, for_update=True
+        ),
+    ),
+    (
+        "movements_by_product",
+        lambda db, s: StockMovementService.get_movements(db, product_id=s.product_id),
+    ),
+    (
+        "movements_by_warehouse",
+        lambda db, s: StockMovementService.get_movements_keyset(
+            db, warehouse_id=s.warehouse_id
+        ),
+    ),
+    (
+        "stock_as_of_product",
+        lambda db, s: StockLedgerService.get_stock_as_of(
+            db, datetime.utcnow(), product_id=s.product_id
+        ),
+    ),
+    (
+        "valuation_apply",
+        lambda db, s: ValuationService.apply_movements(db, [s.movement_id]),
+    ),
+    (
+        "attendance_check_in",
+        lambda db, s: AttendanceService.check_in(
+            db, AttendanceCheckIn(employee_id=s.employee_id, check_in=time(8, 0))
+        ),
+    ),
+    (
+        "attendance_by_employee",
+        lambda db, s: AttendanceService.get_attendance_records(
+            db, employee_id=s.employee_id
+        ),
+    ),
+]
+
+
+def load_sample() -> Sample:
+    """Lấy product / kho có tồn theo lô, movement mới nhất của product và 1 nhân viên có chấm công"""
+    sample = Sample()
+    with Session(engine) as db:
+        batch_stock = db.query(BatchStock.product_id, BatchStock.warehouse_id).first()
+        if batch_stock is None:
+            batch_stock = db.query(Stock.product_id, Stock.warehouse_id).first()
+        if batch_stock is not None:
+            sample.product_id, sample.warehouse_id = batch_stock
+
+        movement_id = (
+            db.query(func.max(StockMovement.id))
+            .filter(StockMovement.product_id == sample.product_id)
+            .scalar()
+        )
+        if movement_id is not None:
+            sample.movement_id = movement_id
+
+        employee_id = db.query(Attendance.employee_id).first() or db.query(Employee.id).first()
+        if employee_id is not None:
+            sample.employee_id = employee_id[0]
+    return sample
+
+
+def capture_selects(
+    run: Callable[[Session, Sample], Any], sample: Sample
+) -> List[Tuple[str, Any]]:
+    """Chạy run trong transaction rồi rollback, trả về các câu SELECT (sql, params)"""
+    statements: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    with engine.connect() as conn:
+        event.listen(conn, "before_cursor_execute", before_cursor_execute)
+        trans = conn.begin()
+        db = Session(bind=conn)
+        try:
+            run(db, sample)
+        except (ValueError, SQLAlchemyError):
+            # Không đủ hàng / đã check-in...: chỉ cần các câu đã chạy
+            pass
+        finally:
+            db.close()
+            trans.rollback()
+    return statements
+
+
+def explain(sql: str, parameters: Any) -> Dict[str, Any]:
+    """Plan JSON của câu SQL, planner bị tắt Seq Scan nếu có cách khác"""
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, parameters)
+                return cursor.fetchone()[0][0]["Plan"]
+            finally:
+                cursor.close()
+
+
+def seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """Tên bảng bị Seq Scan trong plan (đệ quy cả node con)"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def format_plan(plan: Dict[str, Any], depth: int = 0) -> List[str]:
+    """Plan dạng cây rút gọn: node type + bảng / index"""
+    label = plan["Node Type"]
+    if "Index Name" in plan:
+        label += f" using {plan['Index Name']}"
+    if "Relation Name" in plan:
+        label += f" on {plan['Relation Name']}"
+    lines = ["    " + "  " * depth + "-> " + label]
+    for child in plan.get("Plans", []):
+        lines.extend(format_plan(child, depth + 1))
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN các query nóng, lỗi nếu có Seq Scan")
+    parser.add_argument("--verbose", action="store_true", help="In plan của từng câu")
+    args = parser.parse_args(argv)
+
+    sample = load_sample()
+    print(
+        f"sample: product_id={sample.product_id} warehouse_id={sample.warehouse_id} "
+        f"employee_id={sample.employee_id}"
+    )
+
+    failed = 0
+    for name, run in HOT_QUERIES:
+        statements = capture_selects(run, sample)
+        scanned = []
+        plans = []
+        for sql, parameters in statements:
+            plan = explain(sql, parameters)
+            plans.append(plan)
+            scanned.extend(seq_scans(plan))
+
+        status = "OK" if not scanned else "SEQ SCAN: " + ", ".join(sorted(set(scanned)))
+        print(f"{name:<26} {len(statements):>2} queries  {status}")
+        if scanned:
+            failed += 1
+        if args.verbose or scanned:
+            for plan in plans:
+                print("\n".join(format_plan(plan)))
+
+    if failed:
+        print(f"\n{failed}/{len(HOT_QUERIES)} query có Seq Scan")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,819 @@
+"""
+Synthetic data generator - Sinh dataset lớn cho performance test
+
+Khác seed_data.py (vài row, insert từng ORM object), script này sinh dữ liệu
+theo scale factor cho tất cả module và load bằng COPY:
+- Customers (B2C/B2B), products, batches, stocks, stock movements
+- Orders + order items + status logs, xuất kho theo batch khi đơn shipped
+- Employees + chấm công nhiều năm (ngày làm việc, đi muộn, nghỉ phép)
+- QC inspection đầu vào cho từng batch
+
+Dữ liệu nhất quán giữa các bảng:
+- stocks.quantity = tổng current_quantity của batch trong kho đó
+- Mỗi batch nằm ở 1 kho: batch_stocks.quantity = batch.current_quantity
+- batch.current_quantity = initial_quantity - tổng EXPORT của batch
+- Tổng tiền order tính giống OrderService.calculate_order_total
+- Giá trị tồn (inventory_valuations, cost_layers) tính từ movement bằng
+  ValuationService.rebuild sau khi commit dataset
+- Không sinh chấm công hôm nay (để kiosk benchmark check-in được)
+
+Deterministic: cùng --seed, --scale, --years, --end-date thì sinh cùng dữ
+liệu (kể cả ID). Vì vậy các bảng được sinh phải rỗng, hoặc chạy với
+--truncate để xóa trước (TRUNCATE ... CASCADE, xóa luôn dữ liệu phụ thuộc
+như performance_reviews, qc_defects). Tất cả chạy trong 1 transaction.
+
+Scale 1 ~ 2.5M row; scale 4 ~ 10M row.
+
+Usage:
+    python -m app.scripts.generate_data --scale 1 --seed 42
+    python -m app.scripts.generate_data --scale 4 --years 3 --truncate \\
+        --end-date 2025-01-01
+"""
+
+import argparse
+import csv
+import io
+import random
+import secrets
+import sys
+import time as timer
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.numbering import sync_counters_sql
+from app.core.security import get_password_hash
+from sqlalchemy.orm import Session
+
+from app.db.database import engine
+from app.services.stock_summary_service import REBUILD_SQL as REBUILD_STOCK_SUMMARIES_SQL
+from app.services.valuation_service import ValuationService
+
+GENERATOR_USERNAME = "datagen"
+
+# Số lượng ở scale 1, các bảng còn lại suy ra từ đây
+BASE_SIZES: Dict[str, int] = {
+    "customers": 50_000,
+    "products": 5_000,
+    "orders": 200_000,
+    "employees": 1_000,
+}
+
+# Số row mỗi lần COPY
+COPY_CHUNK_ROWS = 50_000
+
+# Các bảng được sinh (thứ tự TRUNCATE / kiểm tra rỗng)
+GENERATED_TABLES = (
+    "cost_layers",
+    "inventory_valuations",
+    "cycle_count_lines",
+    "cycle_counts",
+    "stock_snapshot_lines",
+    "stock_snapshots",
+    "qc_inspections",
+    "attendance",
+    "order_status_logs",
+    "order_items",
+    "orders",
+    "stock_movements",
+    "batch_stocks",
+    "stocks",
+    "batches",
+    "products",
+    "customers",
+    "employees",
+)
+
+WAREHOUSES = [
+    ("WH-HN", "Kho Hà Nội"),
+    ("WH-HCM", "Kho TP. Hồ Chí Minh"),
+    ("WH-DN", "Kho Đà Nẵng"),
+    ("WH-HP", "Kho Hải Phòng"),
+    ("WH-CT", "Kho Cần Thơ"),
+]
+CATEGORIES = [
+    "Thực phẩm khô",
+    "Đồ uống",
+    "Gia vị",
+    "Bánh kẹo",
+    "Sữa",
+    "Đông lạnh",
+    "Hóa mỹ phẩm",
+    "Đồ gia dụng",
+]
+# (department, type, [(position, level)])
+DEPARTMENTS = [
+    ("Kho vận", "OPERATION", [("Nhân viên kho", 1), ("Tổ trưởng kho", 2), ("Quản lý kho", 3)]),
+    ("Kiểm soát chất lượng", "OPERATION", [("Nhân viên QC", 1), ("Trưởng nhóm QC", 2)]),
+    ("Kinh doanh", "COMMERCIAL", [("Nhân viên kinh doanh", 1), ("Trưởng phòng kinh doanh", 3)]),
+    ("Hành chính nhân sự", "SUPPORT", [("Nhân viên nhân sự", 1), ("Kế toán", 2)]),
+]
+CITIES = ["Hà Nội", "TP. Hồ Chí Minh", "Đà Nẵng", "Hải Phòng", "Cần Thơ"]
+LAST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng"]
+MIDDLE_NAMES = ["Văn", "Thị", "Minh", "Ngọc", "Hữu", "Thanh", "Đức", "Thu"]
+FIRST_NAMES = [
+    "An", "Bình", "Chi", "Dũng", "Giang", "Hà", "Hải", "Hạnh", "Hùng", "Lan",
+    "Linh", "Long", "Mai", "Nam", "Phong", "Quân", "Sơn", "Trang", "Tuấn", "Vy",
+]
+UNITS = ["pcs", "box", "kg", "liter"]
+
+ORDER_FLOW = ["draft", "pending", "confirmed", "processing", "ready", "shipped", "delivered"]
+MOVEMENT_PREFIX = {"IMPORT": "IMP", "EXPORT": "EXP"}
+
+WORK_START = 9 * 60
+WORK_END = 17 * 60
+
+
+@dataclass
+class DatasetSize:
+    """Số lượng entity gốc theo scale"""
+
+    customers: int
+    products: int
+    orders: int
+    employees: int
+
+    @classmethod
+    def for_scale(cls, scale: float) -> "DatasetSize":
+        return cls(**{key: max(1, int(value * scale)) for key, value in BASE_SIZES.items()})
+
+
+class CopyBuffer:
+    """
+    Gom row thành CSV rồi COPY vào bảng theo từng chunk.
+
+    parents: buffer của bảng cha (FK), luôn được flush trước
+    """
+
+    def __init__(
+        self,
+        cursor,
+        table: str,
+        columns: Sequence[str],
+        parents: Sequence["CopyBuffer"] = (),
+        chunk_rows: int = COPY_CHUNK_ROWS,
+    ):
+        self.cursor = cursor
+        self.table = table
+        self.parents = parents
+        self.sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        self.chunk_rows = chunk_rows
+        self.total = 0
+        self._pending = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def add(self, row: Iterable) -> None:
+        # None -> field rỗng không quote = NULL trong COPY csv
+        self._writer.writerow(row)
+        self._pending += 1
+        if self._pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        for parent in self.parents:
+            parent.flush()
+        self._buffer.seek(0)
+        self.cursor.copy_expert(self.sql, self._buffer)
+        self.total += self._pending
+        self._pending = 0
+        self._reset()
+
+
+class _Sequence:
+    """Đánh số theo ngày giống các generate_*_number của service"""
+
+    def __init__(self, width: int):
+        self.width = width
+        self._counters: Dict[Tuple[str, str], int] = {}
+
+    def next(self, prefix: str, day: date) -> str:
+        key = (prefix, day.strftime("%Y%m%d"))
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return f"{prefix}-{key[1]}-{self._counters[key]:0{self.width}d}"
+
+
+class DataGenerator:
+    """Sinh và load dataset qua 1 connection psycopg2 (1 transaction)"""
+
+    def __init__(self, cursor, size: DatasetSize, seed: int, years: int, end_date: date):
+        self.cursor = cursor
+        self.size = size
+        self.seed = seed
+        self.end_date = end_date
+        self.start = datetime.combine(end_date - timedelta(days=365 * years), time())
+        self.end = datetime.combine(end_date, time())
+        self.counts: Dict[str, int] = {}
+
+        self.movement_numbers = _Sequence(4)
+        self.movement_id = 0
+
+    def _rng(self, section: str) -> random.Random:
+        # Mỗi phần có random riêng: đổi 1 phần không làm lệch dữ liệu phần khác
+        return random.Random(f"{self.seed}:{section}")
+
+    def _random_time(self, rng: random.Random, start: datetime, end: datetime) -> datetime:
+        seconds = int((end - start).total_seconds())
+        return start + timedelta(seconds=rng.randint(0, max(seconds, 0)))
+
+    def _copy(self, table: str, columns: Sequence[str], parents: Sequence[CopyBuffer] = ()) -> CopyBuffer:
+        return CopyBuffer(self.cursor, table, columns, parents)
+
+    def _done(self, *buffers: CopyBuffer) -> None:
+        for buffer in buffers:
+            buffer.flush()
+            self.counts[buffer.table] = self.counts.get(buffer.table, 0) + buffer.total
+
+    def _get_or_create(self, table: str, key: str, value, **columns) -> int:
+        self.cursor.execute(f"SELECT id FROM {table} WHERE {key} = %s", (value,))
+        row = self.cursor.fetchone()
+        if row:
+            return row[0]
+        values = {key: value, **columns}
+        self.cursor.execute(
+            f"INSERT INTO {table} ({', '.join(values)}) "
+            f"VALUES ({', '.join(['%s'] * len(values))}) RETURNING id",
+            list(values.values()),
+        )
+        return self.cursor.fetchone()[0]
+
+    # ==================== REFERENCE DATA ====================
+
+    def reference_data(self) -> None:
+        """User tạo dữ liệu, kho, danh mục, phòng ban, chức vụ (get-or-create)"""
+        self.user_id = self._get_or_create(
+            "users",
+            "username",
+            GENERATOR_USERNAME,
+            email=f"{GENERATOR_USERNAME}@robis-gen.com",
+            hashed_password=get_password_hash(secrets.token_urlsafe(16)),
+            full_name="Synthetic Data Generator",
+            is_active=False,
+            is_superuser=False,
+        )
+        self.warehouse_ids = [
+            self._get_or_create("warehouses", "code", code, name=name, is_active=True)
+            for code, name in WAREHOUSES
+        ]
+        self.category_ids = [
+            self._get_or_create("product_categories", "name", name, is_active=True)
+            for name in CATEGORIES
+        ]
+        self.positions: List[Tuple[int, int]] = []  # (position_id, department_id)
+        for name, dept_type, positions in DEPARTMENTS:
+            department_id = self._get_or_create("departments", "name", name, type=dept_type)
+            for title, level in positions:
+                position_id = self._get_or_create(
+                    "positions", "title", title, level=level, department_id=department_id
+                )
+                self.positions.append((position_id, department_id))
+
+    # ==================== PRODUCTS & BATCHES ====================
+
+    def products_and_batches(self) -> None:
+        """
+        Products + batches (số lượng = 0, cập nhật ở finalize_batches).
+
+        Mỗi product có 2-6 batch, batch đầu tiên nhập trước khi có đơn. Batch
+        passed chia timeline: đơn shipped lúc t xuất từ batch passed mới nhất
+        nhập trước t.
+        """
+        rng = self._rng("products")
+        products = self._copy(
+            "products",
+            ["id", "sku", "name", "category_id", "unit_price", "cost_price", "unit",
+             "min_stock", "max_stock", "is_active", "created_at"],
+        )
+        batches = self._copy(
+            "batches",
+            ["id", "batch_number", "product_id", "initial_quantity", "current_quantity",
+             "manufacturing_date", "expiry_date", "qc_status", "is_active", "created_at"],
+            parents=[products],
+        )
+        batch_numbers = _Sequence(4)
+        first_import = self.start - timedelta(days=30)
+
+        self.product_prices: List[float] = []
+        self.product_costs: List[float] = []
+        self.product_skus: List[str] = []
+        self.product_names: List[str] = []
+        # Theo batch (index = batch_id - 1)
+        self.batch_product: List[int] = []
+        self.batch_warehouse: List[int] = []
+        self.batch_imported_at: List[datetime] = []
+        self.batch_status: List[str] = []
+        self.batch_consumed: List[float] = []
+        # Theo product: batch passed sắp theo thời gian nhập
+        self.passed_imported_at: List[List[datetime]] = []
+        self.passed_ids: List[List[int]] = []
+
+        for product_id in range(1, self.size.products + 1):
+            price = round(rng.uniform(20_000, 2_000_000), -3)
+            sku = f"SKU-{product_id:06d}"
+            name = f"{rng.choice(CATEGORIES)} {product_id}"
+            category_id = rng.choice(self.category_ids)
+            cost = round(price * rng.uniform(0.5, 0.8), -2)
+            products.add([
+                product_id, sku, name, category_id, price, cost, rng.choice(UNITS),
+                rng.randint(10, 50), rng.randint(500, 5000), True, first_import,
+            ])
+            self.product_prices.append(price)
+            self.product_costs.append(cost)
+            self.product_skus.append(sku)
+            self.product_names.append(name)
+
+            imported = [first_import] + sorted(
+                self._random_time(rng, self.start, self.end) for _ in range(rng.randint(1, 5))
+            )
+            passed_at, passed_ids = [], []
+            for index, imported_at in enumerate(imported):
+                batch_id = len(self.batch_product) + 1
+                # Batch đầu luôn passed để đơn đầu tiên có hàng
+                roll = rng.random()
+                status = "passed" if index == 0 or roll < 0.90 else "failed" if roll < 0.96 else "pending"
+                manufactured = imported_at.date() - timedelta(days=rng.randint(5, 60))
+                batches.add([
+                    batch_id, batch_numbers.next("BATCH", imported_at), product_id, 0, 0,
+                    manufactured, manufactured + timedelta(days=rng.choice([180, 365, 730])),
+                    status, True, imported_at,
+                ])
+                self.batch_product.append(product_id)
+                self.batch_warehouse.append(rng.choice(self.warehouse_ids))
+                self.batch_imported_at.append(imported_at)
+                self.batch_status.append(status)
+                self.batch_consumed.append(0.0)
+                if status == "passed":
+                    passed_at.append(imported_at)
+                    passed_ids.append(batch_id)
+            self.passed_imported_at.append(passed_at)
+            self.passed_ids.append(passed_ids)
+
+        self._done(products, batches)
+
+    def _batch_for(self, product_id: int, at: datetime) -> int:
+        index = bisect_right(self.passed_imported_at[product_id - 1], at) - 1
+        return self.passed_ids[product_id - 1][max(index, 0)]
+
+    def _movement(self, buffer: CopyBuffer, movement_type: str, batch_id: int,
+                  quantity: float, at: datetime, reference_type: str, reference_id: int,
+                  unit_cost: Optional[float] = None) -> None:
+        self.movement_id += 1
+        buffer.add([
+            self.movement_id,
+            self.movement_numbers.next(MOVEMENT_PREFIX[movement_type], at),
+            movement_type, self.batch_product[batch_id - 1], batch_id,
+            self.batch_warehouse[batch_id - 1], quantity, unit_cost, reference_type,
+            reference_id, self.user_id, at,
+        ])
+
+    # ==================== CUSTOMERS ====================
+
+    def customers(self) -> None:
+        rng = self._rng("customers")
+        buffer = self._copy(
+            "customers",
+            ["id", "customer_code", "customer_type", "name", "email", "phone",
+             "company_name", "tax_code", "address", "city", "is_active", "created_at"],
+        )
+        codes = _Sequence(3)
+        self.customer_is_b2b = bytearray(self.size.customers)
+
+        created = sorted(
+            self._random_time(rng, self.start - timedelta(days=365), self.start)
+            for _ in range(self.size.customers)
+        )
+        for index, created_at in enumerate(created):
+            customer_id = index + 1
+            b2b = rng.random() < 0.15
+            self.customer_is_b2b[index] = b2b
+            customer_type = "B2B" if b2b else "B2C"
+            name = (
+                f"Công ty {rng.choice(FIRST_NAMES)} {customer_id}"
+                if b2b
+                else f"{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}"
+            )
+            buffer.add([
+                customer_id, codes.next(customer_type, created_at), customer_type, name,
+                f"customer{customer_id}@robis-gen.com", f"09{rng.randint(0, 99_999_999):08d}",
+                name if b2b else None, f"{rng.randint(0, 9_999_999_999):010d}" if b2b else None,
+                f"{rng.randint(1, 500)} Đường số {rng.randint(1, 50)}", rng.choice(CITIES),
+                True, created_at,
+            ])
+        self._done(buffer)
+
+    # ==================== ORDERS ====================
+
+    def _order_path(self, rng: random.Random, created_at: datetime) -> List[Tuple[str, datetime]]:
+        """Chuỗi trạng thái của đơn, đơn cũ phần lớn đã delivered"""
+        age_days = (self.end - created_at).days
+        roll = rng.random()
+        if age_days > 14:
+            if roll < 0.86:
+                statuses = ORDER_FLOW
+            elif roll < 0.94:
+                statuses = ORDER_FLOW[: rng.randint(2, 3)] + ["cancelled"]
+            else:
+                statuses = ORDER_FLOW + ["returned"]
+        elif roll < 0.05:
+            statuses = ORDER_FLOW[: rng.randint(2, 3)] + ["cancelled"]
+        else:
+            statuses = ORDER_FLOW[: rng.randint(1, len(ORDER_FLOW))]
+
+        path, at = [], created_at
+        for index, status in enumerate(statuses):
+            if index:
+                at += timedelta(minutes=rng.randint(30, 36 * 60))
+                if at >= self.end:
+                    break
+            path.append((status, at))
+        return path
+
+    def orders(self) -> None:
+        """Orders + items + status logs, EXPORT theo batch cho đơn đã shipped"""
+        rng = self._rng("orders")
+        orders = self._copy(
+            "orders",
+            ["id", "order_number", "order_type", "status", "customer_id", "subtotal",
+             "discount_amount", "tax_amount", "shipping_fee", "total_amount", "payment_method",
+             "payment_status", "paid_amount", "shipping_city", "created_by", "created_at",
+             "updated_at", "confirmed_at", "shipped_at", "delivered_at"],
+        )
+        items = self._copy(
+            "order_items",
+            ["id", "order_id", "product_id", "product_name", "product_sku", "unit_price",
+             "quantity", "discount_percent", "discount_amount", "subtotal", "created_at"],
+            parents=[orders],
+        )
+        logs = self._copy(
+            "order_status_logs",
+            ["id", "order_id", "from_status", "to_status", "note", "changed_by", "changed_at"],
+            parents=[orders],
+        )
+        movements = self._copy(
+            "stock_movements",
+            ["id", "movement_number", "movement_type", "product_id", "batch_id", "warehouse_id",
+             "quantity", "unit_cost", "reference_type", "reference_id", "created_by", "created_at"],
+        )
+        numbers = _Sequence(4)
+        item_id = log_id = 0
+        span = (self.end - self.start).total_seconds()
+        n_orders, n_products = self.size.orders, self.size.products
+
+        for index in range(n_orders):
+            order_id = index + 1
+            # Rải đều theo thời gian để id tăng cùng created_at
+            created_at = self.start + timedelta(
+                seconds=int(span * (index + rng.random()) / n_orders)
+            )
+            customer_index = rng.randrange(self.size.customers)
+            b2b = self.customer_is_b2b[customer_index]
+            order_type = "B2B" if b2b else "B2C"
+
+            # Sản phẩm bán chạy tập trung ở id nhỏ
+            product_ids = set()
+            for _ in range(rng.choices((1, 2, 3, 4, 5), weights=(35, 25, 20, 12, 8))[0]):
+                product_ids.add(int(n_products * rng.random() ** 2) + 1)
+
+            lines, subtotal = [], 0.0
+            for product_id in sorted(product_ids):
+                price = self.product_prices[product_id - 1]
+                quantity = rng.randint(1, 10) * (10 if b2b else 1)
+                discount_percent = rng.choice((0, 0, 0, 5, 10)) if b2b else 0
+                gross = price * quantity
+                discount = gross * discount_percent / 100
+                line_total = gross - discount
+                subtotal += line_total
+                item_id += 1
+                items.add([
+                    item_id, order_id, product_id, self.product_names[product_id - 1],
+                    self.product_skus[product_id - 1], price, quantity, discount_percent,
+                    round(discount, 2), round(line_total, 2), created_at,
+                ])
+                lines.append((product_id, quantity))
+
+            tax = subtotal * 0.1
+            shipping_fee = 0 if subtotal >= 500_000 else 30_000
+            total = round(subtotal + tax + shipping_fee, 2)
+
+            path = self._order_path(rng, created_at)
+            reached = dict(path)
+            final_status, updated_at = path[-1]
+            paid = "delivered" in reached and final_status != "returned"
+
+            orders.add([
+                order_id, numbers.next(f"ORD-{order_type}", created_at), order_type,
+                final_status.upper(), customer_index + 1, round(subtotal, 2), 0, round(tax, 2),
+                shipping_fee, total,
+                rng.choice(("BANK_TRANSFER", "CREDIT")) if b2b else rng.choice(("CASH", "BANK_TRANSFER")),
+                "paid" if paid else "unpaid", total if paid else 0, rng.choice(CITIES),
+                self.user_id, created_at, updated_at, reached.get("confirmed"),
+                reached.get("shipped"), reached.get("delivered"),
+            ])
+
+            previous = None
+            for status, at in path:
+                log_id += 1
+                logs.add([
+                    log_id, order_id, previous, status,
+                    "Order created" if previous is None else None, self.user_id, at,
+                ])
+                previous = status
+
+            shipped_at = reached.get("shipped")
+            if shipped_at:
+                for product_id, quantity in lines:
+                    batch_id = self._batch_for(product_id, shipped_at)
+                    self.batch_consumed[batch_id - 1] += quantity
+                    self._movement(movements, "EXPORT", batch_id, quantity, shipped_at, "order", order_id)
+
+        self._done(orders, items, logs, movements)
+
+    # ==================== STOCK ====================
+
+    def finalize_batches(self) -> None:
+        """
+        Chốt số lượng batch sau khi biết lượng xuất: initial = đã xuất + còn lại.
+        Sinh IMPORT cho từng batch, batch_stocks, stocks và QC inspection đầu vào.
+        """
+        rng = self._rng("batches")
+        initial_quantities: List[float] = []
+        current_quantities: List[float] = []
+        for index, status in enumerate(self.batch_status):
+            consumed = self.batch_consumed[index]
+            if status == "passed":
+                remaining = float(rng.randint(0, 20) if consumed else rng.randint(50, 500))
+            else:
+                remaining = float(rng.randint(100, 1000))
+            initial_quantities.append(consumed + remaining)
+            current_quantities.append(remaining)
+
+        self.cursor.execute(
+            "CREATE TEMP TABLE tmp_batch_quantities "
+            "(id integer PRIMARY KEY, initial_quantity float8, current_quantity float8) "
+            "ON COMMIT DROP"
+        )
+        quantities = CopyBuffer(
+            self.cursor, "tmp_batch_quantities", ["id", "initial_quantity", "current_quantity"]
+        )
+        for index, initial in enumerate(initial_quantities):
+            quantities.add([index + 1, initial, current_quantities[index]])
+        quantities.flush()
+        self.cursor.execute(
+            "UPDATE batches b SET initial_quantity = t.initial_quantity, "
+            "current_quantity = t.current_quantity "
+            "FROM tmp_batch_quantities t WHERE b.id = t.id"
+        )
+
+        movements = self._copy(
+            "stock_movements",
+            ["id", "movement_number", "movement_type", "product_id", "batch_id", "warehouse_id",
+             "quantity", "unit_cost", "reference_type", "reference_id", "created_by", "created_at"],
+        )
+        inspections = self._copy(
+            "qc_inspections",
+            ["id", "type", "batch_id", "lot_size", "inspection_level", "sample_size",
+             "status", "decision", "owner_id", "started_at", "completed_at"],
+        )
+        batch_stocks = self._copy(
+            "batch_stocks",
+            ["id", "batch_id", "warehouse_id", "product_id", "quantity", "updated_at"],
+        )
+        # Giá nhập từng lô dao động quanh cost_price (FIFO và bình quân khác nhau)
+        cost_rng = self._rng("costs")
+        stock: Dict[Tuple[int, int], float] = {}
+        for index, initial in enumerate(initial_quantities):
+            batch_id = index + 1
+            imported_at = self.batch_imported_at[index]
+            unit_cost = round(
+                self.product_costs[self.batch_product[index] - 1] * cost_rng.uniform(0.9, 1.1), -2
+            )
+            self._movement(
+                movements, "IMPORT", batch_id, initial, imported_at, "batch", batch_id, unit_cost
+            )
+
+            key = (self.batch_warehouse[index], self.batch_product[index])
+            stock[key] = stock.get(key, 0.0) + current_quantities[index]
+            batch_stocks.add([batch_id, batch_id, *key, current_quantities[index], self.end])
+
+            status = self.batch_status[index]
+            started_at = imported_at - timedelta(hours=rng.randint(2, 48))
+            inspections.add([
+                batch_id, "input", batch_id, int(initial), "II", min(int(initial), 125),
+                "in_progress" if status == "pending" else "submitted",
+                {"passed": "accept", "failed": "reject"}.get(status), self.user_id, started_at,
+                None if status == "pending" else started_at + timedelta(hours=1),
+            ])
+
+        stocks = self._copy("stocks", ["id", "warehouse_id", "product_id", "quantity", "updated_at"])
+        for stock_id, ((warehouse_id, product_id), quantity) in enumerate(sorted(stock.items()), 1):
+            stocks.add([stock_id, warehouse_id, product_id, quantity, self.end])
+
+        self._done(movements, inspections, batch_stocks, stocks)
+
+    # ==================== HR ====================
+
+    def employees_and_attendance(self) -> None:
+        """Employees + chấm công từng ngày làm việc đến hết hôm qua"""
+        rng = self._rng("employees")
+        employees = self._copy(
+            "employees",
+            ["id", "employee_code", "full_name", "email", "phone", "department_id",
+             "position_id", "hire_date", "employment_status", "created_at"],
+        )
+        attendance = self._copy(
+            "attendance",
+            ["id", "employee_id", "date", "check_in", "check_out", "late_minutes",
+             "overtime_minutes", "work_hours", "status", "leave_type", "approved_by",
+             "approved_at", "created_at"],
+            parents=[employees],
+        )
+        start_day, last_day = self.start.date(), self.end_date - timedelta(days=1)
+        attendance_id = 0
+
+        for employee_id in range(1, self.size.employees + 1):
+            if rng.random() < 0.8:
+                hire_date = start_day - timedelta(days=rng.randint(0, 5 * 365))
+            else:
+                hire_date = start_day + timedelta(days=rng.randint(0, max((last_day - start_day).days, 0)))
+            roll = rng.random()
+            if (self.end_date - hire_date).days < 60:
+                status = "PROBATION"
+            elif roll < 0.04:
+                status = "TERMINATED"
+            elif roll < 0.07:
+                status = "ON_LEAVE"
+            else:
+                status = "ACTIVE"
+            last_worked = last_day
+            if status == "TERMINATED":
+                last_worked = hire_date + timedelta(days=rng.randint(0, max((last_day - hire_date).days, 0)))
+
+            code = f"EMP{employee_id:04d}"
+            position_id, department_id = rng.choice(self.positions)
+            employees.add([
+                employee_id, code,
+                f"{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}",
+                f"{code.lower()}@robis-gen.com", f"09{rng.randint(0, 99_999_999):08d}",
+                department_id, position_id, hire_date, status,
+                datetime.combine(hire_date, time(8)),
+            ])
+
+            day = max(hire_date, start_day)
+            while day <= last_worked:
+                if day.weekday() < 5:
+                    attendance_id += 1
+                    attendance.add([attendance_id, employee_id, day, *self._attendance_day(rng, day)])
+                day += timedelta(days=1)
+
+        self._done(employees, attendance)
+
+    def _attendance_day(self, rng: random.Random, day: date) -> list:
+        """(check_in, check_out, late, overtime, work_hours, status, leave_type, approved_by, approved_at, created_at)"""
+        roll = rng.random()
+        if roll < 0.045:
+            if roll < 0.015:
+                status, leave_type = "ABSENT", None
+            elif roll < 0.035:
+                status, leave_type = "LEAVE", rng.choice(("ANNUAL", "PERSONAL"))
+            else:
+                status, leave_type = "SICK_LEAVE", "SICK"
+            approved_at = datetime.combine(day, time(8)) - timedelta(days=1) if leave_type else None
+            return [
+                None, None, 0, 0, 0, status, leave_type,
+                self.user_id if leave_type else None, approved_at, datetime.combine(day, time(8)),
+            ]
+
+        check_in = min(max(int(rng.gauss(WORK_START - 10, 8)), 7 * 60 + 30), 10 * 60 + 30)
+        check_out = min(max(int(rng.gauss(WORK_END + 20, 25)), 16 * 60), 21 * 60)
+        late = max(0, check_in - WORK_START)
+        return [
+            f"{check_in // 60:02d}:{check_in % 60:02d}:00",
+            f"{check_out // 60:02d}:{check_out % 60:02d}:00",
+            late, max(0, check_out - WORK_END), max(0, check_out - check_in - 60),
+            "LATE" if late else "PRESENT", None, None, None,
+            datetime.combine(day, time(check_in // 60, check_in % 60)),
+        ]
+
+    # ==================== FINISH ====================
+
+    def reset_sequences(self) -> None:
+        """Đẩy sequence id lên max(id) vì COPY ghi id trực tiếp"""
+        for table in GENERATED_TABLES:
+            self.cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table}"
+            )
+        # Số chứng từ (ORD-, IMP-, B2C-, EMP...) cũng ghi trực tiếp -> nâng bộ đếm
+        self.cursor.execute(sync_counters_sql())
+
+    def stock_summaries(self) -> None:
+        """Read model tồn kho theo sản phẩm (product_stock_summaries, xóa theo products CASCADE)"""
+        self.cursor.execute(REBUILD_STOCK_SUMMARIES_SQL)
+
+    def run(self) -> Dict[str, int]:
+        steps = [
+            ("reference data", self.reference_data),
+            ("products + batches", self.products_and_batches),
+            ("customers", self.customers),
+            ("orders", self.orders),
+            ("batch quantities + stock", self.finalize_batches),
+            ("employees + attendance", self.employees_and_attendance),
+            ("sequences", self.reset_sequences),
+            ("stock summaries", self.stock_summaries),
+        ]
+        for name, step in steps:
+            started = timer.perf_counter()
+            step()
+            print(f"  {name}: {timer.perf_counter() - started:.1f}s", file=sys.stderr)
+        return self.counts
+
+
+def _non_empty_tables(cursor) -> List[str]:
+    tables = []
+    for table in GENERATED_TABLES:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+        if cursor.fetchone()[0]:
+            tables.append(table)
+    return tables
+
+
+def generate(
+    scale: float = 1.0,
+    seed: int = 42,
+    years: int = 2,
+    end_date: Optional[date] = None,
+    truncate: bool = False,
+) -> Dict[str, int]:
+    """Sinh dataset theo scale, trả về số row đã load theo bảng"""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if truncate:
+            cursor.execute(f"TRUNCATE {', '.join(GENERATED_TABLES)} RESTART IDENTITY CASCADE")
+        else:
+            non_empty = _non_empty_tables(cursor)
+            if non_empty:
+                raise SystemExit(
+                    f"Bảng đã có dữ liệu: {', '.join(non_empty)}. Chạy lại với --truncate"
+                )
+
+        generator = DataGenerator(
+            cursor, DatasetSize.for_scale(scale), seed, years, end_date or date.today()
+        )
+        counts = generator.run()
+        connection.commit()
+
+        # Giá trị tồn (FIFO / bình quân) từ các movement vừa load
+        started = timer.perf_counter()
+        with Session(engine) as db:
+            counts["inventory_valuations"] = ValuationService.rebuild(db)
+            db.commit()
+        print(f"  valuation: {timer.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        # Cập nhật statistics cho planner (và estimate count)
+        connection.autocommit = True
+        cursor.execute(f"ANALYZE {', '.join(GENERATED_TABLES)}")
+        return counts
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sinh dataset lớn cho performance test")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale factor (1 ~ 2.5M row)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--years", type=int, default=2, help="Số năm dữ liệu orders / chấm công")
+    parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        help="Ngày kết thúc dataset (mặc định hôm nay), cố định để so sánh giữa các lần chạy",
+    )
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="TRUNCATE ... CASCADE các bảng được sinh trước khi load",
+    )
+    args = parser.parse_args(argv)
+
+    started = timer.perf_counter()
+    counts = generate(args.scale, args.seed, args.years, args.end_date, args.truncate)
+    elapsed = timer.perf_counter() - started
+
+    for table, count in sorted(counts.items()):
+        print(f"{table:<20} {count:>12,}")
+    total = sum(counts.values())
+    print(f"{'TOTAL':<20} {total:>12,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
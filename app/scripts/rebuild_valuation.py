@@ -0,0 +1,42 @@
+"""
+Rebuild valuation - tính lại giá trị tồn kho (FIFO / bình quân) từ stock_movements
+
+Chạy sau `alembic upgrade` lần đầu có inventory_valuations, hoặc sau khi ghi
+thẳng movement vào DB không qua service. Bình thường không cần: mỗi phiếu kho
+tự cập nhật valuation trong cùng transaction.
+
+Usage:
+    python -m app.scripts.rebuild_valuation
+    python -m app.scripts.rebuild_valuation --chunk-size 100000
+"""
+
+import argparse
+import sys
+import time
+
+from app.db.database import SessionLocal
+from app.services.valuation_service import ValuationService
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tính lại giá trị tồn kho từ stock_movements")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Số movement đọc mỗi chunk (mặc định VALUATION_REBUILD_CHUNK)",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = ValuationService.rebuild(db, args.chunk_size)
+        db.commit()
+        print(f"{count:,} (kho, sản phẩm) trong {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,8 @@ from app.core.security import get_password_hash
 from datetime import date, timedelta
 from app.models.hr import Department, Position, Employee
 from app.models.attendance import Attendance
+from app.services.role_service import PermissionBitsService
+from app.services.stock_summary_service import StockSummaryService
 
 
 def clear_all_data(db: Session):
@@ -798,6 +800,12 @@ def main():
         # NEW: Seed HR data
         seed_hr_data(db)
 
+        # Roles/permissions seed trực tiếp qua ORM -> tính lại users.permission_bits
+        PermissionBitsService.refresh_all(db)
+        # Products / batches seed trực tiếp qua ORM -> tính lại stock summary
+        StockSummaryService.rebuild(db)
+        db.commit()
+
         print("=" * 50)
         print("🎉 ALL DATA SEEDED SUCCESSFULLY!")
         print("=" * 50)
@@ -0,0 +1,125 @@
+"""
+Startup report - Thời gian import của app theo từng module
+
+Chạy `python -X importtime -c "import app.main"` trong subprocess rồi tổng hợp:
+- Tổng thời gian import app.main
+- Top module có thời gian import (cumulative) lớn nhất
+- Tổng thời gian theo package gốc (fastapi, sqlalchemy, google, ...)
+
+Exit code 1 nếu vượt budget, dùng được trong CI để giữ cold start trên
+instance nhỏ.
+
+Usage:
+    python -m app.scripts.startup_report
+    python -m app.scripts.startup_report --budget-ms 1500 --top 30
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+DEFAULT_BUDGET_MS = 2000
+TARGET_MODULE = "app.main"
+
+# (module, self_us, cumulative_us, depth)
+ImportRow = Tuple[str, int, int, int]
+
+
+def run_importtime(module: str = TARGET_MODULE) -> List[ImportRow]:
+    """Import module trong process mới với -X importtime, trả về các dòng đã parse"""
+    project_root = os.path.normpath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.strip().splitlines()[-15:])
+        raise RuntimeError(f"Import {module} thất bại:\n{tail}")
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output: str) -> List[ImportRow]:
+    """
+    Parse output của -X importtime
+
+    Format: "import time:   self [us] | cumulative | imported package"
+    Độ sâu import thể hiện bằng số space thụt đầu tên module (2 space / cấp).
+    """
+    rows: List[ImportRow] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # dòng header
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def by_top_level_package(rows: List[ImportRow]) -> Dict[str, int]:
+    """Tổng self time (us) theo package gốc"""
+    totals: Dict[str, int] = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        totals[module.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def build_report(rows: List[ImportRow], top: int) -> Tuple[int, str]:
+    """Trả về (tổng thời gian us, nội dung report)"""
+    target = [r for r in rows if r[0] == TARGET_MODULE]
+    total_us = target[-1][2] if target else sum(r[1] for r in rows)
+
+    lines = [f"Import {TARGET_MODULE}: {total_us / 1000:.1f} ms", ""]
+
+    lines.append(f"Top {top} modules (cumulative):")
+    for module, self_us, cumulative_us, _ in sorted(
+        rows, key=lambda r: r[2], reverse=True
+    )[:top]:
+        lines.append(
+            f"  {cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {module}"
+        )
+
+    lines.append("")
+    lines.append(f"Top {top} packages (self time):")
+    packages = sorted(by_top_level_package(rows).items(), key=lambda kv: kv[1], reverse=True)
+    for package, self_us in packages[:top]:
+        share = self_us / total_us * 100 if total_us else 0
+        lines.append(f"  {self_us / 1000:9.1f} ms  {share:5.1f}%  {package}")
+
+    return total_us, "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time report cho app.main")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+        help="Budget thời gian import (ms), vượt thì exit 1",
+    )
+    parser.add_argument("--top", type=int, default=20, help="Số dòng mỗi bảng")
+    args = parser.parse_args()
+
+    total_us, report = build_report(run_importtime(), args.top)
+    print(report)
+    print()
+
+    total_ms = total_us / 1000
+    if total_ms > args.budget_ms:
+        print(f"❌ Over budget: {total_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        return 1
+    print(f"✅ Within budget: {total_ms:.1f} ms <= {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Stock snapshot - tạo snapshot tồn kho định kỳ cho as-of query (/stock/as-of)
+
+Chạy bằng cron sau 00:00 UTC (quá STOCK_SNAPSHOT_SETTLE_SECONDS), VD 00:10 mỗi
+ngày. Tạo snapshot 00:00 UTC cho mọi ngày còn thiếu kể từ snapshot gần nhất,
+mỗi snapshot tính tăng dần từ snapshot ngày trước (1 transaction / snapshot).
+
+Usage:
+    python -m app.scripts.stock_snapshot
+    python -m app.scripts.stock_snapshot --since 2025-01-01   # backfill từng ngày
+    python -m app.scripts.stock_snapshot --at 2025-01-31T17:00:00
+"""
+
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from typing import List
+
+from app.db.database import SessionLocal
+from app.models.inventory import StockSnapshot
+from app.services.stock_ledger_service import StockLedgerService
+
+
+def missing_days(db, since: date, until: datetime) -> List[datetime]:
+    """Các mốc 00:00 UTC từ since đến until chưa có snapshot"""
+    existing = {
+        row.snapshot_at
+        for row in db.query(StockSnapshot.snapshot_at).filter(
+            StockSnapshot.snapshot_at >= datetime.combine(since, datetime.min.time())
+        )
+    }
+    days = []
+    current = datetime.combine(since, datetime.min.time())
+    while current <= until:
+        if current not in existing:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tạo snapshot tồn kho định kỳ")
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="Tạo snapshot mỗi ngày từ ngày này (mặc định: sau snapshot gần nhất)",
+    )
+    parser.add_argument(
+        "--at", type=datetime.fromisoformat, help="Chỉ tạo 1 snapshot tại thời điểm này (UTC)"
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.at:
+            targets = [args.at]
+        else:
+            today = StockLedgerService.default_snapshot_at()
+            since = args.since
+            if since is None:
+                latest = StockLedgerService.get_base_snapshot(db, today)
+                since = (latest.snapshot_at + timedelta(days=1)).date() if latest else today.date()
+            targets = missing_days(db, since, today)
+
+        for snapshot_at in targets:
+            try:
+                snapshot = StockLedgerService.create_snapshot(db, snapshot_at)
+                db.commit()
+            except ValueError as e:
+                db.rollback()
+                print(f"{snapshot_at.isoformat()}  skip: {e}")
+                continue
+            print(f"{snapshot.snapshot_at.isoformat()}  {snapshot.line_count:>10,} lines")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
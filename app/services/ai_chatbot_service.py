@@ -8,15 +8,28 @@ import json
 from typing import Dict, Any
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
-import google.generativeai as genai
 from dotenv import load_dotenv
 from app.models.user import User
+from app.core import metrics
 
 import re
+import time
 
 load_dotenv()
 
 
+def _load_genai():
+    """
+    Import Gemini SDK lần đầu khi cần
+
+    google.generativeai kéo theo cả grpc/protobuf, import lúc khởi động
+    làm chậm cold start của mọi worker kể cả khi không dùng AI.
+    """
+    import google.generativeai as genai
+
+    return genai
+
+
 class RobisAIChatbot:
     """AI Chatbot cho Robis ERP sử dụng Google Gemini"""
 
@@ -29,6 +42,7 @@ class RobisAIChatbot:
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
 
+        genai = _load_genai()
         genai.configure(api_key=api_key)
 
         self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
@@ -38,6 +52,19 @@ class RobisAIChatbot:
         # Initialize model
         self.model = genai.GenerativeModel(self.model_name)
 
+    def _generate(self, operation: str, prompt: str, **kwargs):
+        """Gọi Gemini và ghi latency vào metric robis_llm_request_duration_seconds"""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self.model.generate_content(prompt, **kwargs)
+            outcome = "success"
+            return response
+        finally:
+            metrics.llm_request_duration_seconds.observe(
+                time.perf_counter() - start, operation=operation, outcome=outcome
+            )
+
     def _build_system_prompt(self) -> str:
         """Build system prompt with user context"""
         return f"""
@@ -99,8 +126,10 @@ class RobisAIChatbot:
             """
 
         try:
-            response = self.model.generate_content(
-                prompt, generation_config={"temperature": 0.1, "max_output_tokens": 300}
+            response = self._generate(
+                "analyze_intent",
+                prompt,
+                generation_config={"temperature": 0.1, "max_output_tokens": 300},
             )
 
             # Clean response
@@ -294,7 +323,8 @@ class RobisAIChatbot:
                 Trả lời ngắn gọn dựa trên dữ liệu trên.
             """
 
-            response = self.model.generate_content(
+            response = self._generate(
+                "chat",
                 final_prompt,
                 generation_config={
                     "temperature": self.temperature,
@@ -2,10 +2,14 @@
 Attendance Service với auto-calculate
 """
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date, time, datetime, timedelta
 
+from app.db.counting import CountStrategy, count_total
+from app.core.pagination import paginate_keyset
 from app.models.attendance import Attendance
 from app.models.hr import Employee
 from app.schemas.attendance import (
@@ -80,6 +84,18 @@ class AttendanceService:
             .first()
         )
 
+        attendance = AttendanceService._build_check_in(existing, check_in_data, today)
+
+        db.add(attendance)
+        db.flush()
+        db.refresh(attendance)
+        return attendance
+
+    @staticmethod
+    def _build_check_in(
+        existing: Optional[Attendance], check_in_data: AttendanceCheckIn, today: date
+    ) -> Attendance:
+        """Validate và tạo attendance record cho check-in (dùng chung sync/async)"""
         if existing:
             raise ValueError("Employee đã check-in hôm nay rồi!")
 
@@ -90,7 +106,7 @@ class AttendanceService:
         status = "late" if late_minutes > 0 else "present"
 
         # Create attendance record
-        attendance = Attendance(
+        return Attendance(
             employee_id=check_in_data.employee_id,
             date=today,
             check_in=check_in_data.check_in,
@@ -99,9 +115,28 @@ class AttendanceService:
             note=check_in_data.note,
         )
 
+    @staticmethod
+    async def check_in_async(
+        db: AsyncSession, check_in_data: AttendanceCheckIn
+    ) -> Attendance:
+        """Chấm công vào (async, dùng cho kiosk/QR)"""
+        today = date.today()
+
+        result = await db.execute(
+            select(Attendance)
+            .where(
+                Attendance.employee_id == check_in_data.employee_id,
+                Attendance.date == today,
+            )
+            .limit(1)
+        )
+        existing = result.scalars().first()
+
+        attendance = AttendanceService._build_check_in(existing, check_in_data, today)
+
         db.add(attendance)
-        db.commit()
-        db.refresh(attendance)
+        await db.flush()
+        await db.refresh(attendance)
         return attendance
 
     @staticmethod
@@ -121,6 +156,17 @@ class AttendanceService:
             .first()
         )
 
+        AttendanceService._apply_check_out(attendance, check_out_data)
+
+        db.flush()
+        db.refresh(attendance)
+        return attendance
+
+    @staticmethod
+    def _apply_check_out(
+        attendance: Optional[Attendance], check_out_data: AttendanceCheckOut
+    ) -> None:
+        """Validate và cập nhật check-out (dùng chung sync/async)"""
         if not attendance:
             raise ValueError("Employee chưa check-in hôm nay!")
 
@@ -141,8 +187,27 @@ class AttendanceService:
         if check_out_data.note:
             attendance.note = (attendance.note or "") + " | " + check_out_data.note
 
-        db.commit()
-        db.refresh(attendance)
+    @staticmethod
+    async def check_out_async(
+        db: AsyncSession, check_out_data: AttendanceCheckOut
+    ) -> Optional[Attendance]:
+        """Chấm công ra (async, dùng cho kiosk/QR)"""
+        today = date.today()
+
+        result = await db.execute(
+            select(Attendance)
+            .where(
+                Attendance.employee_id == check_out_data.employee_id,
+                Attendance.date == today,
+            )
+            .limit(1)
+        )
+        attendance = result.scalars().first()
+
+        AttendanceService._apply_check_out(attendance, check_out_data)
+
+        await db.flush()
+        await db.refresh(attendance)
         return attendance
 
     @staticmethod
@@ -178,20 +243,18 @@ class AttendanceService:
         )
 
         db.add(attendance)
-        db.commit()
+        db.flush()
         db.refresh(attendance)
         return attendance
 
     @staticmethod
-    def get_attendance_records(
+    def _attendance_query(
         db: Session,
         employee_id: Optional[int] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-        skip: int = 0,
-        limit: int = 100,
-    ) -> tuple[List[Attendance], int]:
-        """Lấy danh sách attendance records"""
+    ):
+        """Query attendance đã áp filter (dùng chung offset + keyset)"""
         query = db.query(Attendance)
 
         if employee_id:
@@ -201,11 +264,44 @@ class AttendanceService:
         if end_date:
             query = query.filter(Attendance.date <= end_date)
 
-        total = query.count()
-        records = query.order_by(Attendance.date.desc()).offset(skip).limit(limit).all()
+        return query
+
+    @staticmethod
+    def get_attendance_records(
+        db: Session,
+        employee_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        skip: int = 0,
+        limit: int = 100,
+        count: str = CountStrategy.EXACT,
+    ) -> tuple[List[Attendance], Optional[int]]:
+        """Lấy danh sách attendance records"""
+        query = AttendanceService._attendance_query(db, employee_id, start_date, end_date)
+
+        total = count_total(query, count)
+        records = (
+            query.order_by(Attendance.date.desc(), Attendance.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
 
         return records, total
 
+    @staticmethod
+    def get_attendance_records_keyset(
+        db: Session,
+        employee_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Attendance], Optional[str]]:
+        """Lấy danh sách attendance records theo cursor (date, id), không đếm total"""
+        query = AttendanceService._attendance_query(db, employee_id, start_date, end_date)
+        return paginate_keyset(query, [Attendance.date, Attendance.id], limit, cursor)
+
     @staticmethod
     def get_monthly_report(
         db: Session, employee_id: int, month: str
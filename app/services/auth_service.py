@@ -1,7 +1,9 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.core.password_pool import password_pool
 from typing import Optional
 
 
@@ -20,8 +22,7 @@ class AuthService:
     @staticmethod
     def create_user(db: Session, user: UserCreate) -> User:
 
-        print(user.password)
-        hashed_password = get_password_hash(user.password)
+        hashed_password = password_pool.hash(user.password)
 
         db_user = User(
             username=user.username,
@@ -33,7 +34,7 @@ class AuthService:
         )
 
         db.add(db_user)
-        db.commit()
+        db.flush()
         db.refresh(db_user)
 
         return db_user
@@ -46,7 +47,26 @@ class AuthService:
         if not user:
             return None
 
-        if not verify_password(password, user.hashed_password):
+        if not password_pool.verify(password, user.hashed_password):
+            return None
+
+        if not user.is_active:
+            return None
+
+        return user
+
+    @staticmethod
+    async def authenticate_user_async(
+        db: AsyncSession, username: str, password: str
+    ) -> Optional[User]:
+        """Như authenticate_user, chờ bcrypt trên password pool mà không giữ thread"""
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
+
+        if not user:
+            return None
+
+        if not await password_pool.verify_async(password, user.hashed_password):
             return None
 
         if not user.is_active:
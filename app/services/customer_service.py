@@ -7,6 +7,8 @@ from sqlalchemy import or_
 from typing import Optional, Tuple, List
 from datetime import datetime
 
+from app.db.counting import CountStrategy, count_total
+from app.core.numbering import document_numbers
 from app.models.customer import Customer, CustomerType
 from app.schemas.customer import CustomerCreate, CustomerUpdate
 
@@ -19,18 +21,8 @@ class CustomerService:
         Generate unique customer code
         Format: B2C-YYYYMMDD-XXX hoặc B2B-YYYYMMDD-XXX
         """
-        prefix = customer_type.upper()
-        today = datetime.now().strftime("%Y%m%d")
-
-        # Đếm số customer cùng loại được tạo hôm nay
-        count = (
-            db.query(Customer)
-            .filter(Customer.customer_code.like(f"{prefix}-{today}-%"))
-            .count()
-        )
-
-        sequence = str(count + 1).zfill(3)
-        return f"{prefix}-{today}-{sequence}"
+        # Bộ đếm theo loại + ngày (document_counters), không COUNT bảng customers
+        return document_numbers.next_number(customer_type.upper(), 3, db=db)
 
     @staticmethod
     def create_customer(db: Session, customer: CustomerCreate) -> Customer:
@@ -57,7 +49,7 @@ class CustomerService:
         )
 
         db.add(db_customer)
-        db.commit()
+        db.flush()
         db.refresh(db_customer)
 
         return db_customer
@@ -70,7 +62,8 @@ class CustomerService:
         search: Optional[str] = None,
         customer_type: Optional[str] = None,
         is_active: Optional[bool] = None,
-    ) -> Tuple[List[Customer], int]:
+        count: str = CountStrategy.EXACT,
+    ) -> Tuple[List[Customer], Optional[int]]:
         """
         Lấy danh sách customers với filter và pagination
         Returns: (customers, total_count)
@@ -97,7 +90,7 @@ class CustomerService:
             query = query.filter(Customer.is_active == is_active)
 
         # Get total count
-        total = query.count()
+        total = count_total(query, count)
 
         # Apply pagination
         customers = (
@@ -127,7 +120,7 @@ class CustomerService:
             setattr(db_customer, field, value)
 
         db_customer.updated_at = datetime.utcnow()
-        db.commit()
+        db.flush()
         db.refresh(db_customer)
 
         return db_customer
@@ -142,6 +135,6 @@ class CustomerService:
 
         db_customer.is_active = False
         db_customer.updated_at = datetime.utcnow()
-        db.commit()
+        db.flush()
 
         return True
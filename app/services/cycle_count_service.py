@@ -0,0 +1,596 @@
+"""
+Cycle Count Service - kiểm kê kho, chênh lệch tính vector hóa bằng NumPy
+
+Luồng: tạo phiếu (1 kho) -> upload số đếm (nhiều lần, NDJSON theo stream,
+insert từng chunk) -> xem chênh lệch -> duyệt: ghi movement ADJUST hàng loạt.
+
+Phạm vi kiểm kê là các sản phẩm có dòng đếm. Với mỗi sản phẩm trong phạm vi:
+
+- Theo lô: số sổ = batch_stocks của kho, batch có tồn mà không được đếm = đếm 0
+- Không theo lô (batch_id NULL): số sổ = stocks.quantity - tổng batch_stocks
+
+Số sổ tính tại lúc mở phiếu (coi là lúc đếm): trừ đi các phiếu kho của kho ghi
+sau created_at của phiếu kiểm kê. Nhập / xuất / chuyển kho giữa lúc đếm và lúc
+duyệt vẫn giữ nguyên, ADJUST chỉ bù phần chênh lệch đếm. Phiếu đã duyệt: ADJUST
+của chính phiếu cũng ghi sau lúc đếm nên bị trừ như phiếu khác, preview vẫn
+trả chênh lệch đã điều chỉnh.
+
+Số đếm và số sổ được ghép theo khóa (product_id, batch_id) trong 1 lượt NumPy
+(np.unique + np.bincount), không lặp Python theo từng dòng. numpy import khi
+tính chênh lệch, không import lúc khởi động app.
+
+ADJUST ghi quantity có dấu (+ thừa / - thiếu). Lock khi duyệt theo thứ tự
+chung: batch_stocks -> batches -> stocks -> stock summary -> inventory_valuations.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    column,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.numbering import document_numbers
+from app.models.inventory import (
+    Batch,
+    BatchStock,
+    CycleCount,
+    CycleCountLine,
+    MovementType,
+    Stock,
+    StockMovement,
+    Warehouse,
+)
+from app.models.product import Product
+from app.schemas.inventory import CycleCountCreate, CycleCountLineCreate
+from app.services.inventory_service import StockMovementService
+from app.services.stock_ledger_service import signed_quantity
+from app.services.stock_summary_service import StockSummaryService, counts_as_available
+from app.services.valuation_service import ValuationService
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Chênh lệch nhỏ hơn ngưỡng coi như khớp (sai số float khi cộng dồn)
+_ZERO = 1e-9
+
+# Số lỗi tối đa trả về cho 1 lần upload
+MAX_UPLOAD_ERRORS = 100
+
+
+@dataclass
+class Variance:
+    """Chênh lệch theo khóa (product_id, batch_id), batch_id = 0 là hàng không theo lô"""
+
+    product_ids: "np.ndarray"
+    batch_ids: "np.ndarray"
+    expected: "np.ndarray"
+    counted: "np.ndarray"
+
+    @property
+    def variance(self) -> "np.ndarray":
+        return self.counted - self.expected
+
+    def changed(self) -> "np.ndarray":
+        """Mask các khóa có chênh lệch"""
+        return abs(self.variance) > _ZERO
+
+
+def _columns(rows, width: int) -> List["np.ndarray"]:
+    """Rows SQL -> từng cột float64 (id int vẫn chính xác đến 2^53)"""
+    import numpy as np
+
+    if not rows:
+        return [np.empty(0) for _ in range(width)]
+    # zip(*rows) duyệt Row như tuple; np.array(rows) dò Row qua mapping, chậm hơn nhiều
+    return [np.fromiter(column, dtype=np.float64, count=len(rows)) for column in zip(*rows)]
+
+
+def compute_variance(batch_rows, stock_rows, count_rows, moved_rows=()) -> Variance:
+    """
+    Ghép số sổ và số đếm theo (product_id, batch_id) bằng NumPy
+
+    Args:
+        batch_rows: [(product_id, batch_id, quantity)] batch_stocks của kho
+        stock_rows: [(product_id, quantity)] stocks của kho
+        count_rows: [(product_id, batch_id hoặc 0, counted_quantity)]
+        moved_rows: [(product_id, batch_id hoặc 0, quantity có dấu)] phiếu kho
+            sau lúc đếm, trừ khỏi số sổ hiện tại
+    """
+    import numpy as np
+
+    bs_product, bs_batch, bs_qty = _columns(batch_rows, 3)
+    st_product, st_qty = _columns(stock_rows, 2)
+    ct_product, ct_batch, ct_qty = _columns(count_rows, 3)
+    mv_product, mv_batch, mv_qty = _columns(moved_rows, 3)
+
+    # Phần không theo lô của mỗi sản phẩm = stocks - tổng batch_stocks
+    products, product_index = np.unique(
+        np.concatenate([st_product, bs_product]), return_inverse=True
+    )
+    unbatched = np.bincount(
+        product_index[: len(st_product)], weights=st_qty, minlength=len(products)
+    ) - np.bincount(
+        product_index[len(st_product) :], weights=bs_qty, minlength=len(products)
+    )
+
+    exp_product = np.concatenate([bs_product, products, mv_product])
+    exp_batch = np.concatenate([bs_batch, np.zeros(len(products)), mv_batch])
+    exp_qty = np.concatenate([bs_qty, unbatched, -mv_qty])
+
+    keys = np.stack(
+        [np.concatenate([exp_product, ct_product]), np.concatenate([exp_batch, ct_batch])],
+        axis=1,
+    )
+    unique_keys, index = np.unique(keys, axis=0, return_inverse=True)
+    index = index.reshape(-1)
+    n_expected = len(exp_product)
+
+    expected = np.bincount(index[:n_expected], weights=exp_qty, minlength=len(unique_keys))
+    counted = np.bincount(index[n_expected:], weights=ct_qty, minlength=len(unique_keys))
+
+    # Bỏ khóa rỗng (không tồn, không đếm: VD sản phẩm đều theo lô, phần không theo lô = 0)
+    keep = (np.abs(expected) > _ZERO) | (np.abs(counted) > _ZERO)
+    return Variance(
+        product_ids=unique_keys[keep, 0].astype(np.int64),
+        batch_ids=unique_keys[keep, 1].astype(np.int64),
+        expected=expected[keep],
+        counted=counted[keep],
+    )
+
+
+class CycleCountService:
+
+    @staticmethod
+    def generate_count_number(db: Session) -> str:
+        """Generate cycle count number"""
+        return document_numbers.next_number("CC", 4, db=db)
+
+    @staticmethod
+    def create_cycle_count(
+        db: Session, cycle_count: CycleCountCreate, created_by: int
+    ) -> CycleCount:
+        """
+        Tạo phiếu kiểm kê
+
+        Raises:
+            ValueError: Kho không tồn tại
+        """
+        if not db.query(Warehouse.id).filter(Warehouse.id == cycle_count.warehouse_id).first():
+            raise ValueError(f"Warehouse với ID {cycle_count.warehouse_id} không tồn tại")
+
+        db_count = CycleCount(
+            count_number=CycleCountService.generate_count_number(db),
+            warehouse_id=cycle_count.warehouse_id,
+            status="open",
+            note=cycle_count.note,
+            line_count=0,
+            created_by=created_by,
+        )
+        db.add(db_count)
+        db.flush()
+        db.refresh(db_count)
+        return db_count
+
+    @staticmethod
+    def get_cycle_count(
+        db: Session, cycle_count_id: int, for_update: bool = False
+    ) -> Optional[CycleCount]:
+        query = db.query(CycleCount).filter(CycleCount.id == cycle_count_id)
+        if for_update:
+            query = query.with_for_update().populate_existing()
+        return query.first()
+
+    @staticmethod
+    def get_cycle_counts(
+        db: Session,
+        warehouse_id: Optional[int] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[CycleCount]:
+        """Danh sách phiếu kiểm kê, mới nhất trước"""
+        query = db.query(CycleCount)
+        if warehouse_id:
+            query = query.filter(CycleCount.warehouse_id == warehouse_id)
+        if status:
+            query = query.filter(CycleCount.status == status)
+        return query.order_by(CycleCount.id.desc()).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def add_lines(
+        db: Session, cycle_count: CycleCount, lines: List[Tuple[int, CycleCountLineCreate]]
+    ) -> Dict[int, str]:
+        """
+        Lưu 1 chunk dòng đếm (1 INSERT nhiều dòng)
+
+        Phiếu phải còn open: kiểm tra trong chính câu UPDATE line_count (lock
+        dòng phiếu đến khi chunk commit), không cần lock phiếu trước khi đọc
+        body. Approve chạy chen thì chờ chunk đang ghi, chunk sau bị từ chối.
+
+        Returns:
+            {số dòng: lỗi} của các dòng bị bỏ qua
+
+        Raises:
+            ValueError: Phiếu đã được duyệt
+        """
+        errors: Dict[int, str] = {}
+        product_ids = {m.product_id for _, m in lines}
+        batch_ids = {m.batch_id for _, m in lines if m.batch_id}
+        known_products = {
+            id for (id,) in db.query(Product.id).filter(Product.id.in_(product_ids))
+        }
+        batch_products = dict(
+            db.query(Batch.id, Batch.product_id).filter(Batch.id.in_(batch_ids)).all()
+        )
+
+        rows = []
+        for line, m in lines:
+            if m.product_id not in known_products:
+                errors[line] = f"Product với ID {m.product_id} không tồn tại"
+            elif m.batch_id and m.batch_id not in batch_products:
+                errors[line] = f"Batch với ID {m.batch_id} không tồn tại"
+            elif m.batch_id and batch_products[m.batch_id] != m.product_id:
+                errors[line] = f"Batch {m.batch_id} không thuộc product {m.product_id}"
+            else:
+                rows.append(
+                    {
+                        "cycle_count_id": cycle_count.id,
+                        "product_id": m.product_id,
+                        "batch_id": m.batch_id,
+                        "counted_quantity": m.counted_quantity,
+                    }
+                )
+
+        if rows:
+            line_count = db.execute(
+                update(CycleCount)
+                .where(CycleCount.id == cycle_count.id, CycleCount.status == "open")
+                .values(line_count=CycleCount.line_count + len(rows))
+                .returning(CycleCount.line_count)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if line_count is None:
+                raise ValueError(f"Cycle count {cycle_count.count_number} đã được duyệt")
+            db.execute(insert(CycleCountLine), rows)
+            set_committed_value(cycle_count, "line_count", line_count)
+        return errors
+
+    @staticmethod
+    def _variance(db: Session, cycle_count: CycleCount, lock: bool = False) -> Variance:
+        """
+        Chênh lệch của phiếu; lock=True thì lock batch_stocks -> batches -> stocks
+        của các sản phẩm trong phạm vi (dùng khi duyệt)
+
+        Phiếu kho sau lúc mở phiếu đọc sau khi lock: phiếu đang ghi dở đã commit
+        (giữ lock stocks đến khi commit) và không có phiếu mới chen vào
+        """
+        scope = (
+            db.query(CycleCountLine.product_id)
+            .filter(CycleCountLine.cycle_count_id == cycle_count.id)
+            .distinct()
+            .subquery()
+        )
+        warehouse_id = cycle_count.warehouse_id
+
+        batch_query = (
+            db.query(BatchStock.product_id, BatchStock.batch_id, BatchStock.quantity)
+            .filter(
+                BatchStock.warehouse_id == warehouse_id,
+                BatchStock.product_id.in_(scope.select()),
+            )
+        )
+        stock_query = db.query(Stock.product_id, Stock.quantity).filter(
+            Stock.warehouse_id == warehouse_id, Stock.product_id.in_(scope.select())
+        )
+        counted_batches = (
+            db.query(CycleCountLine.batch_id)
+            .filter(
+                CycleCountLine.cycle_count_id == cycle_count.id,
+                CycleCountLine.batch_id.is_not(None),
+            )
+            .distinct()
+        )
+
+        if lock:
+            batch_rows = (
+                batch_query.join(Batch, Batch.id == BatchStock.batch_id)
+                .order_by(
+                    BatchStock.warehouse_id,
+                    BatchStock.product_id,
+                    Batch.expiry_date.asc().nulls_last(),
+                    Batch.id.asc(),
+                )
+                .with_for_update(of=BatchStock)
+                .all()
+            )
+            batch_ids = sorted(
+                {row.batch_id for row in batch_rows} | {id for (id,) in counted_batches}
+            )
+            if batch_ids:
+                db.query(Batch.id).filter(Batch.id.in_(batch_ids)).order_by(
+                    Batch.id
+                ).with_for_update().all()
+
+            # Tạo dòng stocks còn thiếu (sản phẩm chưa có tồn trong kho) rồi lock
+            db.execute(
+                pg_insert(Stock)
+                .from_select(
+                    ["warehouse_id", "product_id", "quantity"],
+                    select(
+                        literal(warehouse_id, Integer), scope.c.product_id, literal(0.0, Float)
+                    ).order_by(scope.c.product_id),
+                )
+                .on_conflict_do_nothing(index_elements=[Stock.warehouse_id, Stock.product_id])
+            )
+            stock_rows = (
+                stock_query.order_by(Stock.warehouse_id, Stock.product_id)
+                .with_for_update()
+                .all()
+            )
+        else:
+            batch_rows = batch_query.all()
+            stock_rows = stock_query.all()
+
+        count_rows = (
+            db.query(
+                CycleCountLine.product_id,
+                func.coalesce(CycleCountLine.batch_id, 0),
+                CycleCountLine.counted_quantity,
+            )
+            .filter(CycleCountLine.cycle_count_id == cycle_count.id)
+            .all()
+        )
+
+        # Phiếu kho của kho sau lúc đếm (transfer vào kho: dòng + theo to_warehouse_id)
+        since = cycle_count.created_at
+        batch_key = func.coalesce(StockMovement.batch_id, 0).label("batch_id")
+        moved = union_all(
+            select(
+                StockMovement.product_id, batch_key, signed_quantity().label("quantity")
+            ).where(
+                StockMovement.warehouse_id == warehouse_id,
+                StockMovement.created_at >= since,
+                StockMovement.product_id.in_(scope.select()),
+            ),
+            select(StockMovement.product_id, batch_key, StockMovement.quantity).where(
+                StockMovement.to_warehouse_id == warehouse_id,
+                StockMovement.movement_type == MovementType.TRANSFER,
+                StockMovement.created_at >= since,
+                StockMovement.product_id.in_(scope.select()),
+            ),
+        ).subquery("moved")
+        moved_rows = db.execute(
+            select(moved.c.product_id, moved.c.batch_id, func.sum(moved.c.quantity)).group_by(
+                moved.c.product_id, moved.c.batch_id
+            )
+        ).all()
+
+        return compute_variance(batch_rows, stock_rows, count_rows, moved_rows)
+
+    @staticmethod
+    def get_variance(
+        db: Session,
+        cycle_count: CycleCount,
+        only_changed: bool = True,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> dict:
+        """
+        Preview chênh lệch (không lock, không ghi)
+
+        Returns:
+            CycleCountVariance: tổng hợp + các dòng (chênh lệch lớn nhất trước)
+        """
+        import numpy as np
+
+        result = CycleCountService._variance(db, cycle_count)
+        variance = result.variance
+        changed = result.changed()
+
+        selected = np.flatnonzero(changed) if only_changed else np.arange(len(variance))
+        # Chênh lệch tuyệt đối lớn nhất trước, cùng mức thì theo (product, batch)
+        order = np.lexsort(
+            (
+                result.batch_ids[selected],
+                result.product_ids[selected],
+                -np.abs(variance[selected]),
+            )
+        )
+        selected = selected[order]
+        end = None if limit is None else skip + limit
+        selected = selected[skip:end]
+
+        return {
+            "cycle_count_id": cycle_count.id,
+            "warehouse_id": cycle_count.warehouse_id,
+            "status": cycle_count.status,
+            "items_total": int(len(variance)),
+            "items_with_variance": int(changed.sum()),
+            "total_expected": float(result.expected.sum()),
+            "total_counted": float(result.counted.sum()),
+            "net_variance": float(variance[changed].sum()),
+            "gross_variance": float(np.abs(variance[changed]).sum()),
+            "items": [
+                {
+                    "product_id": int(result.product_ids[i]),
+                    "batch_id": int(result.batch_ids[i]) or None,
+                    "expected_quantity": float(result.expected[i]),
+                    "counted_quantity": float(result.counted[i]),
+                    "variance": float(variance[i]),
+                }
+                for i in selected
+            ],
+        }
+
+    @staticmethod
+    def approve(db: Session, cycle_count_id: int, approved_by: int) -> CycleCount:
+        """
+        Duyệt phiếu: tính lại chênh lệch trên dữ liệu đã lock, ghi 1 movement
+        ADJUST / khóa có chênh lệch, đưa batch_stocks, batches, stocks, stock
+        summary về số đếm cộng các phiếu kho sau lúc đếm
+
+        Raises:
+            ValueError: Phiếu không tồn tại, đã duyệt hoặc chưa có dòng đếm
+        """
+        cycle_count = CycleCountService.get_cycle_count(db, cycle_count_id, for_update=True)
+        if not cycle_count:
+            raise ValueError(f"Cycle count với ID {cycle_count_id} không tồn tại")
+        if cycle_count.status != "open":
+            raise ValueError(f"Cycle count {cycle_count.count_number} đã {cycle_count.status}")
+        if not cycle_count.line_count:
+            raise ValueError(f"Cycle count {cycle_count.count_number} chưa có dòng đếm")
+
+        result = CycleCountService._variance(db, cycle_count, lock=True)
+        changed = result.changed()
+        product_ids = result.product_ids[changed].tolist()
+        batch_ids = result.batch_ids[changed].tolist()
+        deltas = result.variance[changed].tolist()
+
+        now = datetime.utcnow()
+        warehouse_id = cycle_count.warehouse_id
+        if deltas:
+            available_batches = {
+                row.id
+                for row in db.query(Batch.id, Batch.qc_status, Batch.is_active).filter(
+                    Batch.id.in_({b for b in batch_ids if b})
+                )
+                if counts_as_available(row.qc_status, row.is_active)
+            }
+            numbers = StockMovementService.generate_movement_numbers(db, "adjust", len(deltas))
+            note = f"Kiểm kê {cycle_count.count_number}"
+
+            movement_rows = []
+            stock_deltas: Dict[int, float] = {}
+            summary_deltas: Dict[int, Tuple[float, float]] = {}
+            batch_deltas: Dict[int, Tuple[int, float]] = {}
+            for number, product_id, batch_id, delta in zip(
+                numbers, product_ids, batch_ids, deltas
+            ):
+                movement_rows.append(
+                    {
+                        "movement_number": number,
+                        "movement_type": MovementType.ADJUST,
+                        "product_id": product_id,
+                        "batch_id": batch_id or None,
+                        "warehouse_id": warehouse_id,
+                        "quantity": delta,
+                        "reference_type": "cycle_count",
+                        "reference_id": cycle_count.id,
+                        "note": note,
+                        "created_by": approved_by,
+                        "created_at": now,
+                    }
+                )
+                stock_deltas[product_id] = stock_deltas.get(product_id, 0) + delta
+                on_hand, available = summary_deltas.get(product_id, (0.0, 0.0))
+                if batch_id:
+                    batch_deltas[batch_id] = (product_id, delta)
+                    if batch_id in available_batches:
+                        available += delta
+                summary_deltas[product_id] = (on_hand + delta, available)
+
+            movement_ids = db.scalars(
+                insert(StockMovement).returning(StockMovement.id, sort_by_parameter_order=True),
+                movement_rows,
+            ).all()
+
+            if batch_deltas:
+                stmt = pg_insert(BatchStock)
+                db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[BatchStock.batch_id, BatchStock.warehouse_id],
+                        set_={
+                            "quantity": BatchStock.quantity + stmt.excluded.quantity,
+                            "updated_at": stmt.excluded.updated_at,
+                        },
+                    ),
+                    [
+                        {
+                            "batch_id": batch_id,
+                            "warehouse_id": warehouse_id,
+                            "product_id": product_id,
+                            "quantity": delta,
+                            "updated_at": now,
+                        }
+                        for batch_id, (product_id, delta) in sorted(batch_deltas.items())
+                    ],
+                )
+                batch_values = values(
+                    column("id", Integer), column("delta", Float), name="deltas"
+                ).data([(id, delta) for id, (_, delta) in sorted(batch_deltas.items())])
+                db.execute(
+                    Batch.__table__.update()
+                    .where(Batch.id == batch_values.c.id)
+                    .values(
+                        current_quantity=Batch.current_quantity + batch_values.c.delta,
+                        version=Batch.version + 1,
+                        updated_at=now,
+                    )
+                )
+
+            stock_values = values(
+                column("product_id", Integer), column("delta", Float), name="deltas"
+            ).data(sorted(stock_deltas.items()))
+            db.execute(
+                Stock.__table__.update()
+                .where(
+                    Stock.warehouse_id == warehouse_id,
+                    Stock.product_id == stock_values.c.product_id,
+                )
+                .values(
+                    quantity=Stock.quantity + stock_values.c.delta,
+                    version=Stock.version + 1,
+                    updated_at=now,
+                )
+            )
+            StockSummaryService.apply_deltas(db, summary_deltas, now)
+            ValuationService.apply_movements(db, movement_ids)
+
+        cycle_count.status = "approved"
+        cycle_count.adjustment_count = len(deltas)
+        cycle_count.approved_by = approved_by
+        cycle_count.approved_at = now
+        db.flush()
+        db.refresh(cycle_count)
+        return cycle_count
+
+    # ============= ASYNC VARIANTS =============
+
+    @staticmethod
+    async def create_cycle_count_async(
+        db: AsyncSession, cycle_count: CycleCountCreate, created_by: int
+    ) -> CycleCount:
+        return await db.run_sync(CycleCountService.create_cycle_count, cycle_count, created_by)
+
+    @staticmethod
+    async def get_cycle_count_async(
+        db: AsyncSession, cycle_count_id: int, for_update: bool = False
+    ) -> Optional[CycleCount]:
+        return await db.run_sync(CycleCountService.get_cycle_count, cycle_count_id, for_update)
+
+    @staticmethod
+    async def get_cycle_counts_async(db: AsyncSession, **filters) -> List[CycleCount]:
+        return await db.run_sync(
+            lambda session: CycleCountService.get_cycle_counts(session, **filters)
+        )
+
+    @staticmethod
+    async def add_lines_async(
+        db: AsyncSession, cycle_count: CycleCount, lines: List[Tuple[int, CycleCountLineCreate]]
+    ) -> Dict[int, str]:
+        return await db.run_sync(CycleCountService.add_lines, cycle_count, lines)
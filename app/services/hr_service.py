@@ -3,10 +3,11 @@ HR Service - Department, Position, Employee
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import Optional, List
 from datetime import datetime
 
+from app.db.counting import CountStrategy, count_total
+from app.core.numbering import document_numbers
 from app.models.hr import Department, Position, Employee
 from app.schemas.hr import (
     DepartmentCreate,
@@ -28,7 +29,7 @@ class DepartmentService:
         """Tạo department mới"""
         db_department = Department(**department.dict())
         db.add(db_department)
-        db.commit()
+        db.flush()
         db.refresh(db_department)
         return db_department
 
@@ -68,7 +69,7 @@ class DepartmentService:
         for key, value in update_data.items():
             setattr(db_department, key, value)
 
-        db.commit()
+        db.flush()
         db.refresh(db_department)
         return db_department
 
@@ -83,7 +84,7 @@ class PositionService:
         """Tạo position mới"""
         db_position = Position(**position.dict())
         db.add(db_position)
-        db.commit()
+        db.flush()
         db.refresh(db_position)
         return db_position
 
@@ -145,15 +146,8 @@ class EmployeeService:
         """
         Auto-generate employee code: EMP0001, EMP0002, ...
         """
-        # Lấy employee code lớn nhất
-        max_code = db.query(func.max(Employee.employee_code)).scalar()
-
-        if not max_code:
-            return "EMP0001"
-
-        # Extract số từ code (EMP0001 → 1)
-        current_number = int(max_code.replace("EMP", ""))
-        next_number = current_number + 1
+        # Bộ đếm "EMP" không reset theo ngày (document_counters), không quét max()
+        next_number = document_numbers.next_value("EMP", db=db)
 
         # Format: EMP0001, EMP0002, ... EMP9999
         return f"EMP{next_number:04d}"
@@ -169,7 +163,7 @@ class EmployeeService:
         db_employee = Employee(employee_code=employee_code, **employee.dict())
 
         db.add(db_employee)
-        db.commit()
+        db.flush()
         db.refresh(db_employee)
         return db_employee
 
@@ -182,7 +176,8 @@ class EmployeeService:
         position_id: Optional[int] = None,
         employment_status: Optional[str] = None,
         search: Optional[str] = None,
-    ) -> tuple[List[Employee], int]:
+        count: str = CountStrategy.EXACT,
+    ) -> tuple[List[Employee], Optional[int]]:
         """Lấy danh sách employees"""
         query = db.query(Employee)
 
@@ -200,7 +195,7 @@ class EmployeeService:
                 | (Employee.employee_code.ilike(f"%{search}%"))
             )
 
-        total = query.count()
+        total = count_total(query, count)
         employees = query.offset(skip).limit(limit).all()
 
         return employees, total
@@ -231,7 +226,7 @@ class EmployeeService:
         for key, value in update_data.items():
             setattr(db_employee, key, value)
 
-        db.commit()
+        db.flush()
         db.refresh(db_employee)
         return db_employee
 
@@ -249,6 +244,6 @@ class EmployeeService:
             return None
 
         db_employee.employment_status = "terminated"
-        db.commit()
+        db.flush()
         db.refresh(db_employee)
         return db_employee
@@ -2,14 +2,43 @@
 Inventory Service - Stock, Batch, Movement
 """
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List, Tuple
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import Float, Integer, and_, column, insert, or_, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, date
 
-from app.models.inventory import Batch, Warehouse, Stock, StockMovement, MovementType
+from app.db.counting import CountStrategy, count_total
+from app.core import metrics
+from app.core.config import settings
+from app.core.exceptions import ConcurrentUpdateError
+from app.core.numbering import document_numbers
+from app.core.pagination import paginate_keyset
+from app.models.inventory import (
+    Batch,
+    BatchStock,
+    Warehouse,
+    Stock,
+    StockMovement,
+    MovementType,
+)
 from app.models.product import Product
 from app.schemas.inventory import BatchCreate, WarehouseCreate, StockMovementCreate
+from app.services.stock_summary_service import StockSummaryService, counts_as_available
+from app.services.valuation_service import ValuationService
+
+# Số dòng batch_stocks lock mỗi lượt khi chia hàng FEFO (đa số lần xuất chỉ cần 1-2 batch)
+FEFO_LOCK_CHUNK = 4
+
+MOVEMENT_NUMBER_PREFIXES = {
+    "import": "IMP",
+    "export": "EXP",
+    "check": "CHK",
+    "transfer": "TRF",
+    "adjust": "ADJ",
+}
 
 
 class WarehouseService:
@@ -24,7 +53,7 @@ class WarehouseService:
             is_active=True,
         )
         db.add(db_warehouse)
-        db.commit()
+        db.flush()
         db.refresh(db_warehouse)
         return db_warehouse
 
@@ -44,12 +73,7 @@ class BatchService:
     @staticmethod
     def generate_batch_number(db: Session) -> str:
         """Generate unique batch number"""
-        today = datetime.now().strftime("%Y%m%d")
-        count = (
-            db.query(Batch).filter(Batch.batch_number.like(f"BATCH-{today}-%")).count()
-        )
-        sequence = str(count + 1).zfill(4)
-        return f"BATCH-{today}-{sequence}"
+        return document_numbers.next_number("BATCH", 4, db=db)
 
     @staticmethod
     def create_batch(db: Session, batch: BatchCreate) -> Batch:
@@ -68,7 +92,7 @@ class BatchService:
         )
 
         db.add(db_batch)
-        db.commit()
+        db.flush()
         db.refresh(db_batch)
 
         return db_batch
@@ -91,7 +115,7 @@ class BatchService:
     ) -> List[Batch]:
         """
         Lấy batches theo FEFO (First Expiry First Out)
-        Ưu tiên: QC passed, còn hàng, hạn sử dụng gần nhất
+        Ưu tiên: QC passed, còn hàng (trong kho warehouse_id nếu có), hạn sử dụng gần nhất
         """
         query = db.query(Batch).filter(
             Batch.product_id == product_id,
@@ -100,47 +124,309 @@ class BatchService:
             Batch.is_active == True,
         )
 
+        if warehouse_id:
+            query = query.join(BatchStock, BatchStock.batch_id == Batch.id).filter(
+                BatchStock.warehouse_id == warehouse_id, BatchStock.quantity > 0
+            )
+
         # Sort by expiry_date (FEFO)
-        return query.order_by(Batch.expiry_date.asc()).all()
+        return query.order_by(Batch.expiry_date.asc().nulls_last(), Batch.id.asc()).all()
 
+    @staticmethod
+    def _fefo_batch_stocks(db: Session, product_id: int, warehouse_id: int):
+        """Tồn theo lô trong kho, thứ tự FEFO (cũng là thứ tự lock)"""
+        return (
+            db.query(BatchStock)
+            .join(Batch, Batch.id == BatchStock.batch_id)
+            .filter(
+                BatchStock.warehouse_id == warehouse_id,
+                BatchStock.product_id == product_id,
+                BatchStock.quantity > 0,
+                Batch.qc_status == "passed",
+                Batch.is_active == True,
+            )
+            .order_by(Batch.expiry_date.asc().nulls_last(), Batch.id.asc())
+        )
 
-class StockService:
+    @staticmethod
+    def _lock_fefo(
+        db: Session,
+        product_id: int,
+        warehouse_id: int,
+        quantity: float,
+        skip_locked: bool,
+    ) -> Optional[List[Tuple[BatchStock, float]]]:
+        """
+        Lock lần lượt từng nhóm FEFO_LOCK_CHUNK dòng batch_stocks đến khi đủ số lượng
+
+        Returns:
+            [(batch_stock, số lượng lấy)] hoặc None nếu không đủ hàng
+        """
+        picks: List[Tuple[BatchStock, float]] = []
+        locked_ids: List[int] = []
+        remaining = quantity
+
+        while remaining > 0:
+            query = BatchService._fefo_batch_stocks(db, product_id, warehouse_id)
+            if locked_ids:
+                query = query.filter(BatchStock.id.notin_(locked_ids))
+            rows = (
+                query.limit(FEFO_LOCK_CHUNK)
+                .with_for_update(of=BatchStock, skip_locked=skip_locked)
+                .populate_existing()
+                .all()
+            )
+            if not rows:
+                return None
+
+            for batch_stock in rows:
+                locked_ids.append(batch_stock.id)
+                take = min(batch_stock.quantity, remaining)
+                picks.append((batch_stock, take))
+                remaining -= take
+                if remaining <= 0:
+                    break
+
+        return picks
 
     @staticmethod
-    def get_stock(db: Session, warehouse_id: int, product_id: int) -> Optional[Stock]:
-        """Lấy stock record"""
+    def allocate_fefo(
+        db: Session, product_id: int, warehouse_id: int, quantity: float
+    ) -> List[Tuple[BatchStock, float]]:
+        """
+        Chia số lượng xuất cho các batch trong kho theo FEFO, lock các dòng được chọn
+
+        - Lượt 1: FOR UPDATE SKIP LOCKED - request xuất đồng thời cùng SKU lấy
+          các batch khác nhau thay vì xếp hàng chờ nhau
+        - Không đủ (hàng còn lại đang bị request khác lock): rollback savepoint
+          để nhả lock lượt 1, rồi lock có chờ theo đúng thứ tự FEFO
+
+        Raises:
+            ValueError: Không đủ hàng trong các batch QC passed của kho
+        """
+        savepoint = db.begin_nested()
+        picks = BatchService._lock_fefo(
+            db, product_id, warehouse_id, quantity, skip_locked=True
+        )
+        if picks is not None:
+            savepoint.commit()
+            return picks
+        savepoint.rollback()
+
+        picks = BatchService._lock_fefo(
+            db, product_id, warehouse_id, quantity, skip_locked=False
+        )
+        if picks is None:
+            raise ValueError(
+                "Không đủ tồn kho trong các batch khả dụng (QC passed) của kho. "
+                f"Cần xuất: {quantity}"
+            )
+        return picks
+
+    @staticmethod
+    def lock_batch_stock(
+        db: Session, batch_id: int, warehouse_id: int
+    ) -> Optional[BatchStock]:
+        """Lock tồn của 1 batch trong kho (xuất đích danh batch)"""
         return (
-            db.query(Stock)
-            .filter(Stock.warehouse_id == warehouse_id, Stock.product_id == product_id)
+            db.query(BatchStock)
+            .filter(BatchStock.batch_id == batch_id, BatchStock.warehouse_id == warehouse_id)
+            .with_for_update()
+            .populate_existing()
             .first()
         )
 
     @staticmethod
-    def get_or_create_stock(db: Session, warehouse_id: int, product_id: int) -> Stock:
-        """Lấy hoặc tạo stock record"""
-        stock = StockService.get_stock(db, warehouse_id, product_id)
+    def add_batch_stock(
+        db: Session, batch: Batch, warehouse_id: int, quantity: float
+    ) -> BatchStock:
+        """Cộng tồn của batch trong kho (tạo dòng nếu chưa có)"""
+        batch_stock = BatchService.lock_batch_stock(db, batch.id, warehouse_id)
+        if batch_stock is None:
+            # Request khác có thể vừa tạo cùng dòng: insert bỏ qua trùng rồi lock lại
+            db.execute(
+                pg_insert(BatchStock)
+                .values(
+                    batch_id=batch.id,
+                    warehouse_id=warehouse_id,
+                    product_id=batch.product_id,
+                    quantity=0,
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[BatchStock.batch_id, BatchStock.warehouse_id]
+                )
+            )
+            batch_stock = BatchService.lock_batch_stock(db, batch.id, warehouse_id)
+        batch_stock.quantity += quantity
+        return batch_stock
 
-        if not stock:
-            stock = Stock(warehouse_id=warehouse_id, product_id=product_id, quantity=0)
-            db.add(stock)
-            db.flush()
+    @staticmethod
+    def change_current_quantity(db: Session, batch_id: int, delta: float) -> bool:
+        """
+        Cộng / trừ batch.current_quantity bằng 1 câu UPDATE (không đọc rồi ghi):
+        batch dùng chung giữa các kho nên không được lock cùng batch_stocks
 
-        return stock
+        Returns:
+            Batch có tính vào available không - QC status đọc từ RETURNING (bản
+            mới nhất sau khi lock dòng batch), không dùng status đã đọc trước
+            đó: set_qc_status chạy song song không làm lệch stock summary
+        """
+        row = db.execute(
+            update(Batch)
+            .where(Batch.id == batch_id)
+            .values(
+                current_quantity=Batch.current_quantity + delta,
+                version=Batch.version + 1,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Batch.qc_status, Batch.is_active)
+            .execution_options(synchronize_session=False)
+        ).first()
+        return row is not None and counts_as_available(row.qc_status, row.is_active)
 
     @staticmethod
-    def get_stock_summary(db: Session, product_id: Optional[int] = None):
-        """Tổng hợp tồn kho"""
-        query = db.query(
-            Stock.product_id,
-            Product.sku,
-            Product.name,
-            func.sum(Stock.quantity).label("total_quantity"),
-        ).join(Product)
+    def set_qc_status(
+        db: Session, batch: Batch, qc_status: str, expected_version: Optional[int] = None
+    ) -> None:
+        """
+        Đổi QC status của batch, cập nhật available trong stock summary
 
-        if product_id:
-            query = query.filter(Stock.product_id == product_id)
+        - Mỗi lượt lock tồn theo lô của batch trước, theo (warehouse_id,
+          product_id) như bulk / chuyển kho / kiểm kê (batch cố định nên chỉ
+          còn theo kho)
+        - Ghi bằng UPDATE ... WHERE version = version đã đọc: batch bị ghi chen
+          (QC khác, nhập / xuất) thì đọc lại, tính lại available và thử lại,
+          tối đa OPTIMISTIC_UPDATE_RETRIES lần
+        - expected_version: version client đang có, khác thì báo xung đột ngay
+
+        Raises:
+            ConcurrentUpdateError: version client đã cũ / hết lượt thử lại
+        """
+        for _ in range(settings.OPTIMISTIC_UPDATE_RETRIES + 1):
+            if expected_version is not None and batch.version != expected_version:
+                metrics.optimistic_updates_total.inc(entity="batch", outcome="rejected")
+                raise ConcurrentUpdateError("Batch", batch.id)
+
+            # Lock ở mọi lượt, kể cả khi status không đổi: UPDATE version cũ bị
+            # từ chối vẫn giữ lock dòng batch, lượt sau mới lock batch_stocks
+            # thì ngược thứ tự với nhập / xuất (deadlock)
+            batch_stocks = (
+                db.query(BatchStock)
+                .filter(BatchStock.batch_id == batch.id)
+                .order_by(BatchStock.warehouse_id, BatchStock.product_id)
+                .with_for_update()
+                .populate_existing()
+                .all()
+            )
+            was_available = counts_as_available(batch.qc_status, batch.is_active)
+            is_available = counts_as_available(qc_status, batch.is_active)
+            quantity = 0.0
+            if was_available != is_available:
+                quantity = sum(batch_stock.quantity for batch_stock in batch_stocks)
+
+            version = db.execute(
+                update(Batch)
+                .where(Batch.id == batch.id, Batch.version == batch.version)
+                .values(
+                    qc_status=qc_status,
+                    version=Batch.version + 1,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(Batch.version)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if version is not None:
+                metrics.optimistic_updates_total.inc(entity="batch", outcome="applied")
+                if quantity:
+                    StockSummaryService.apply_deltas(
+                        db, {batch.product_id: (0.0, quantity if is_available else -quantity)}
+                    )
+                set_committed_value(batch, "qc_status", qc_status)
+                set_committed_value(batch, "version", version)
+                return
+
+            metrics.optimistic_updates_total.inc(entity="batch", outcome="conflict")
+            db.refresh(batch, ["qc_status", "is_active", "version"])
+
+        metrics.optimistic_updates_total.inc(entity="batch", outcome="exhausted")
+        raise ConcurrentUpdateError("Batch", batch.id)
+
+
+class StockService:
+
+    @staticmethod
+    def get_stock(
+        db: Session, warehouse_id: int, product_id: int, for_update: bool = False
+    ) -> Optional[Stock]:
+        """Lấy stock record (for_update: lock dòng đến hết transaction)"""
+        query = db.query(Stock).filter(
+            Stock.warehouse_id == warehouse_id, Stock.product_id == product_id
+        )
+        if for_update:
+            query = query.with_for_update().populate_existing()
+        return query.first()
 
-        return query.group_by(Stock.product_id, Product.sku, Product.name).all()
+    @staticmethod
+    def change_quantity(
+        db: Session, warehouse_id: int, product_id: int, delta: float
+    ) -> Tuple[float, int]:
+        """
+        Cộng / trừ stocks.quantity bằng 1 câu UPDATE ... RETURNING (1 round-trip,
+        lock dòng đến hết transaction)
+
+        - Trừ: điều kiện đủ tồn nằm trong WHERE, không đọc rồi ghi
+        - Chưa có dòng (nhập lần đầu vào kho): insert bỏ qua trùng rồi update lại
+
+        Returns:
+            (quantity, version) sau khi ghi
+
+        Raises:
+            ValueError: Không đủ tồn kho
+        """
+        stmt = (
+            update(Stock)
+            .where(Stock.warehouse_id == warehouse_id, Stock.product_id == product_id)
+            .values(
+                quantity=Stock.quantity + delta,
+                version=Stock.version + 1,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Stock.quantity, Stock.version)
+            .execution_options(synchronize_session=False)
+        )
+        if delta < 0:
+            stmt = stmt.where(Stock.quantity >= -delta)
+
+        # Ghi batch_stocks đang chờ trước: giữ thứ tự lock batch_stocks -> stocks
+        db.flush()
+        row = db.execute(stmt).first()
+        if row is None and delta >= 0:
+            # Request khác có thể vừa tạo cùng dòng: insert bỏ qua trùng
+            db.execute(
+                pg_insert(Stock)
+                .values(warehouse_id=warehouse_id, product_id=product_id, quantity=0)
+                .on_conflict_do_nothing(index_elements=[Stock.warehouse_id, Stock.product_id])
+            )
+            row = db.execute(stmt).first()
+
+        if row is None:
+            stock = StockService.get_stock(db, warehouse_id, product_id)
+            raise ValueError(
+                f"Không đủ tồn kho. Hiện tại: {stock.quantity if stock else 0}, "
+                f"Cần xuất: {-delta}"
+            )
+
+        return row.quantity, row.version
+
+    @staticmethod
+    def get_stock_summary(
+        db: Session,
+        product_id: Optional[int] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
+        """Tổng hợp tồn kho (đọc từ product_stock_summaries)"""
+        return StockSummaryService.get_summaries(db, product_id, skip, limit)
 
 
 class StockMovementService:
@@ -148,22 +434,16 @@ class StockMovementService:
     @staticmethod
     def generate_movement_number(db: Session, movement_type: str) -> str:
         """Generate movement number"""
-        prefix = {
-            "import": "IMP",
-            "export": "EXP",
-            "check": "CHK",
-            "transfer": "TRF",
-            "adjust": "ADJ",
-        }.get(movement_type, "MOV")
-
-        today = datetime.now().strftime("%Y%m%d")
-        count = (
-            db.query(StockMovement)
-            .filter(StockMovement.movement_number.like(f"{prefix}-{today}-%"))
-            .count()
-        )
-        sequence = str(count + 1).zfill(4)
-        return f"{prefix}-{today}-{sequence}"
+        prefix = MOVEMENT_NUMBER_PREFIXES.get(movement_type, "MOV")
+        return document_numbers.next_number(prefix, 4, db=db)
+
+    @staticmethod
+    def generate_movement_numbers(
+        db: Session, movement_type: str, count: int
+    ) -> List[str]:
+        """Generate `count` movement numbers (1 lần cấp cho cả lô)"""
+        prefix = MOVEMENT_NUMBER_PREFIXES.get(movement_type, "MOV")
+        return document_numbers.next_numbers(prefix, 4, count, db=db)
 
     @staticmethod
     def import_stock(
@@ -172,14 +452,17 @@ class StockMovementService:
         """
         Nhập kho
         - Tạo stock movement
+        - Cập nhật batch quantity + tồn theo lô trong kho (nếu có batch)
         - Cập nhật stock quantity
-        - Cập nhật batch quantity (nếu có)
+
+        Thứ tự lock giống export_stock: batch_stocks -> batches -> stocks
+        (stocks: 1 câu UPDATE cộng dồn, không đọc rồi ghi)
         """
         movement_number = StockMovementService.generate_movement_number(
             db, movement.movement_type
         )
 
-        # Create movement
+        # Create movement (add sau khi lock stocks)
         db_movement = StockMovement(
             movement_number=movement_number,
             movement_type=MovementType(movement.movement_type),
@@ -187,28 +470,42 @@ class StockMovementService:
             batch_id=movement.batch_id,
             warehouse_id=movement.warehouse_id,
             quantity=movement.quantity,
+            unit_cost=movement.unit_cost,
             reference_type=movement.reference_type,
             reference_id=movement.reference_id,
             note=movement.note,
             created_by=created_by,
         )
-        db.add(db_movement)
-
-        # Update stock
-        stock = StockService.get_or_create_stock(
-            db, movement.warehouse_id, movement.product_id
-        )
-        stock.quantity += movement.quantity
-        stock.updated_at = datetime.utcnow()
 
         # Update batch if specified
+        available = 0.0
         if movement.batch_id:
             batch = db.query(Batch).filter(Batch.id == movement.batch_id).first()
-            if batch:
-                batch.current_quantity += movement.quantity
-                batch.updated_at = datetime.utcnow()
+            if not batch:
+                raise ValueError(f"Batch với ID {movement.batch_id} không tồn tại")
+            if batch.product_id != movement.product_id:
+                raise ValueError(
+                    f"Batch {movement.batch_id} không thuộc product {movement.product_id}"
+                )
+            BatchService.add_batch_stock(db, batch, movement.warehouse_id, movement.quantity)
+            if BatchService.change_current_quantity(db, batch.id, movement.quantity):
+                available = movement.quantity
+
+        # Update stock
+        StockService.change_quantity(
+            db, movement.warehouse_id, movement.product_id, movement.quantity
+        )
+        # Lấy giờ sau khi lock: created_at theo đúng thứ tự áp vào tồn / giá vốn
+        now = datetime.utcnow()
+        db_movement.created_at = now
+        db.add(db_movement)
 
-        db.commit()
+        StockSummaryService.apply_deltas(
+            db, {movement.product_id: (movement.quantity, available)}, now
+        )
+
+        db.flush()
+        ValuationService.apply_movements(db, [db_movement.id])
         db.refresh(db_movement)
 
         return db_movement
@@ -216,74 +513,442 @@ class StockMovementService:
     @staticmethod
     def export_stock(
         db: Session, movement: StockMovementCreate, created_by: int
-    ) -> StockMovement:
+    ) -> List[StockMovement]:
         """
         Xuất kho
-        - Kiểm tra đủ tồn kho
-        - Tạo stock movement
-        - Cập nhật stock quantity
-        - Cập nhật batch quantity (FEFO)
+        - Chia số lượng cho các batch của kho theo FEFO (hoặc batch chỉ định)
+        - Tạo 1 stock movement cho mỗi batch
+        - Cập nhật tồn theo lô, batch quantity, stock quantity
+
+        Lock theo thứ tự cố định: batch_stocks (FEFO) -> batches -> stocks,
+        xuất đồng thời cùng SKU không bán quá tồn và không deadlock. stocks trừ
+        bằng 1 câu UPDATE có điều kiện đủ tồn.
         """
-        # Check stock availability
-        stock = StockService.get_stock(db, movement.warehouse_id, movement.product_id)
-        if not stock or stock.quantity < movement.quantity:
-            raise ValueError(
-                f"Không đủ tồn kho. Hiện tại: {stock.quantity if stock else 0}, "
-                f"Cần xuất: {movement.quantity}"
+        if movement.batch_id:
+            batch_stock = BatchService.lock_batch_stock(
+                db, movement.batch_id, movement.warehouse_id
+            )
+            if batch_stock and batch_stock.product_id != movement.product_id:
+                raise ValueError(
+                    f"Batch {movement.batch_id} không thuộc product {movement.product_id}"
+                )
+            available = batch_stock.quantity if batch_stock else 0
+            if available < movement.quantity:
+                raise ValueError(
+                    f"Không đủ tồn kho của batch. Hiện tại: {available}, "
+                    f"Cần xuất: {movement.quantity}"
+                )
+            picks = [(batch_stock, movement.quantity)]
+        else:
+            picks = BatchService.allocate_fefo(
+                db, movement.product_id, movement.warehouse_id, movement.quantity
             )
 
-        # Generate movement number
-        movement_number = StockMovementService.generate_movement_number(
-            db, movement.movement_type
+        # 1 lần cấp số cho mọi batch được chia (không round-trip theo từng batch khi đang giữ lock)
+        numbers = StockMovementService.generate_movement_numbers(
+            db, movement.movement_type, len(picks)
         )
+        db_movements = []
+        available = 0.0
+        for (batch_stock, quantity), movement_number in zip(picks, numbers):
+            db_movement = StockMovement(
+                movement_number=movement_number,
+                movement_type=MovementType(movement.movement_type),
+                product_id=movement.product_id,
+                batch_id=batch_stock.batch_id,
+                warehouse_id=movement.warehouse_id,
+                quantity=quantity,
+                reference_type=movement.reference_type,
+                reference_id=movement.reference_id,
+                note=movement.note,
+                created_by=created_by,
+            )
+            db_movements.append(db_movement)
 
-        # If batch not specified, use FEFO
-        if not movement.batch_id:
-            batches = BatchService.get_batches_fefo(db, movement.product_id)
-            if not batches:
-                raise ValueError("Không tìm thấy batch khả dụng (QC passed)")
-            movement.batch_id = batches[0].id  # Use first batch (FEFO)
+            batch_stock.quantity -= quantity
+            # Cả nhánh FEFO: filter qc_status == "passed" đọc từ bảng batches
+            # không lock, nên available tính theo status RETURNING của từng pick
+            if BatchService.change_current_quantity(db, batch_stock.batch_id, -quantity):
+                available += quantity
 
-        # Create movement
-        db_movement = StockMovement(
-            movement_number=movement_number,
-            movement_type=MovementType(movement.movement_type),
-            product_id=movement.product_id,
-            batch_id=movement.batch_id,
-            warehouse_id=movement.warehouse_id,
-            quantity=movement.quantity,
-            reference_type=movement.reference_type,
-            reference_id=movement.reference_id,
-            note=movement.note,
-            created_by=created_by,
+        # Trừ stock, kiểm tra đủ tồn trong cùng câu UPDATE (lock sau cùng)
+        StockService.change_quantity(
+            db, movement.warehouse_id, movement.product_id, -movement.quantity
         )
-        db.add(db_movement)
 
-        # Update stock
-        stock.quantity -= movement.quantity
-        stock.updated_at = datetime.utcnow()
+        # Giống import_stock: created_at lấy sau khi lock stocks
+        now = datetime.utcnow()
+        for db_movement in db_movements:
+            db_movement.created_at = now
+        db.add_all(db_movements)
 
-        # Update batch
-        batch = db.query(Batch).filter(Batch.id == movement.batch_id).first()
-        if batch:
-            batch.current_quantity -= movement.quantity
-            batch.updated_at = datetime.utcnow()
+        StockSummaryService.apply_deltas(
+            db, {movement.product_id: (-movement.quantity, -available)}, now
+        )
 
-        db.commit()
-        db.refresh(db_movement)
+        db.flush()
+        ValuationService.apply_movements(db, [m.id for m in db_movements])
 
-        return db_movement
+        return db_movements
 
     @staticmethod
-    def get_movements(
+    def _bulk_error(line: int, error: str) -> dict:
+        return {"line": line, "success": False, "error": error}
+
+    @staticmethod
+    def apply_bulk(
+        db: Session, lines: List[Tuple[int, StockMovementCreate]], created_by: int
+    ) -> Dict[int, dict]:
+        """
+        Nhập / xuất nhiều dòng trong 1 transaction, set-based
+
+        - Kiểm tra product / warehouse / batch bằng vài query IN (...)
+        - Lock theo đúng thứ tự của import_stock / export_stock:
+          batch_stocks -> batches -> stocks, mỗi bảng sắp theo khóa, 1 query / bảng
+        - Tính số dư trong Python theo thứ tự dòng (xuất không chỉ định batch chia
+          FEFO như export_stock). Dòng không đủ hàng bị bỏ qua, báo lỗi theo dòng
+        - Ghi: 1 INSERT nhiều dòng stock_movements, upsert cộng dồn batch_stocks,
+          stocks và stock summary, 1 UPDATE ... FROM (VALUES) cho batches
+
+        Args:
+            lines: [(số dòng, movement)], movement_type import | export
+
+        Returns:
+            {số dòng: kết quả (StockMovementBulkLine)}
+        """
+        results: Dict[int, dict] = {}
+        error = StockMovementService._bulk_error
+
+        # 1. Tham chiếu
+        product_ids = {m.product_id for _, m in lines}
+        warehouse_ids = {m.warehouse_id for _, m in lines}
+        batch_ids = {m.batch_id for _, m in lines if m.batch_id}
+
+        known_products = {
+            id for (id,) in db.query(Product.id).filter(Product.id.in_(product_ids))
+        }
+        known_warehouses = {
+            id for (id,) in db.query(Warehouse.id).filter(Warehouse.id.in_(warehouse_ids))
+        }
+        batches = {
+            row.id: row
+            for row in db.query(
+                Batch.id, Batch.product_id, Batch.qc_status, Batch.is_active, Batch.expiry_date
+            ).filter(Batch.id.in_(batch_ids))
+        }
+
+        valid: List[Tuple[int, StockMovementCreate]] = []
+        for line, m in lines:
+            if m.movement_type not in ("import", "export"):
+                results[line] = error(line, "Chỉ hỗ trợ movement_type import / export")
+            elif m.product_id not in known_products:
+                results[line] = error(line, f"Product với ID {m.product_id} không tồn tại")
+            elif m.warehouse_id not in known_warehouses:
+                results[line] = error(line, f"Warehouse với ID {m.warehouse_id} không tồn tại")
+            elif m.batch_id and m.batch_id not in batches:
+                results[line] = error(line, f"Batch với ID {m.batch_id} không tồn tại")
+            elif m.batch_id and batches[m.batch_id].product_id != m.product_id:
+                results[line] = error(
+                    line, f"Batch {m.batch_id} không thuộc product {m.product_id}"
+                )
+            else:
+                valid.append((line, m))
+
+        if not valid:
+            return results
+
+        # 2. Lock batch_stocks: toàn bộ lô FEFO của các (kho, SKU) có dòng xuất
+        # không chỉ định batch + các (batch, kho) được chỉ định
+        fefo_keys = sorted(
+            {
+                (m.warehouse_id, m.product_id)
+                for _, m in valid
+                if m.movement_type == "export" and not m.batch_id
+            }
+        )
+        batch_pairs = sorted({(m.batch_id, m.warehouse_id) for _, m in valid if m.batch_id})
+
+        def fefo_eligible(batch) -> bool:
+            return counts_as_available(batch.qc_status, batch.is_active)
+
+        def fefo_order(batch) -> tuple:
+            return (batch.expiry_date is None, batch.expiry_date or date.min, batch.id)
+
+        conditions = []
+        if fefo_keys:
+            conditions.append(
+                and_(
+                    tuple_(BatchStock.warehouse_id, BatchStock.product_id).in_(fefo_keys),
+                    BatchStock.quantity > 0,
+                    Batch.qc_status == "passed",
+                    Batch.is_active == True,
+                )
+            )
+        if batch_pairs:
+            conditions.append(tuple_(BatchStock.batch_id, BatchStock.warehouse_id).in_(batch_pairs))
+
+        balances: Dict[Tuple[int, int], float] = {}  # (batch_id, warehouse_id) -> tồn
+        fefo: Dict[Tuple[int, int], list] = {key: [] for key in fefo_keys}
+        locked = (
+            db.query(
+                BatchStock.batch_id,
+                BatchStock.warehouse_id,
+                BatchStock.product_id,
+                BatchStock.quantity,
+                Batch.id,
+                Batch.qc_status,
+                Batch.is_active,
+                Batch.expiry_date,
+            )
+            .join(Batch, Batch.id == BatchStock.batch_id)
+            .filter(or_(*conditions))
+            .order_by(
+                BatchStock.warehouse_id,
+                BatchStock.product_id,
+                Batch.expiry_date.asc().nulls_last(),
+                Batch.id.asc(),
+            )
+            .with_for_update(of=BatchStock)
+            .all()
+        )
+        available_batches = {id for id, batch in batches.items() if fefo_eligible(batch)}
+        for row in locked:
+            if fefo_eligible(row):
+                available_batches.add(row.id)
+            balances[(row.batch_id, row.warehouse_id)] = row.quantity
+            key = (row.warehouse_id, row.product_id)
+            if key in fefo and fefo_eligible(row) and row.quantity > 0:
+                fefo[key].append(row)
+
+        # 3. Chia hàng theo batch, theo thứ tự dòng
+        picks: Dict[int, List[Tuple[Optional[int], float]]] = {}
+        for line, m in valid:
+            key = (m.warehouse_id, m.product_id)
+            if m.movement_type == "import":
+                if m.batch_id:
+                    pair = (m.batch_id, m.warehouse_id)
+                    balances[pair] = balances.get(pair, 0) + m.quantity
+                    batch = batches[m.batch_id]
+                    # Hàng vừa nhập dùng được cho dòng xuất FEFO phía sau
+                    if (
+                        key in fefo
+                        and fefo_eligible(batch)
+                        and all(row.id != batch.id for row in fefo[key])
+                    ):
+                        fefo[key].append(batch)
+                        fefo[key].sort(key=fefo_order)
+                picks[line] = [(m.batch_id, m.quantity)]
+            elif m.batch_id:
+                pair = (m.batch_id, m.warehouse_id)
+                available = balances.get(pair, 0)
+                if available < m.quantity:
+                    results[line] = error(
+                        line,
+                        f"Không đủ tồn kho của batch. Hiện tại: {available}, "
+                        f"Cần xuất: {m.quantity}",
+                    )
+                    continue
+                balances[pair] = available - m.quantity
+                picks[line] = [(m.batch_id, m.quantity)]
+            else:
+                line_picks = []
+                remaining = m.quantity
+                for batch in fefo[key]:
+                    available = balances[(batch.id, m.warehouse_id)]
+                    if available <= 0:
+                        continue
+                    take = min(available, remaining)
+                    line_picks.append((batch.id, take))
+                    remaining -= take
+                    if remaining <= 0:
+                        break
+                if remaining > 0:
+                    results[line] = error(
+                        line,
+                        "Không đủ tồn kho trong các batch khả dụng (QC passed) của kho. "
+                        f"Cần xuất: {m.quantity}",
+                    )
+                    continue
+                for batch_id, take in line_picks:
+                    balances[(batch_id, m.warehouse_id)] -= take
+                picks[line] = line_picks
+
+        # 4. Lock batches
+        touched_batches = sorted({batch_id for p in picks.values() for batch_id, _ in p if batch_id})
+        if touched_batches:
+            db.query(Batch.id).filter(Batch.id.in_(touched_batches)).order_by(
+                Batch.id
+            ).with_for_update().all()
+
+        # 5. Lock stocks (tạo dòng còn thiếu trước)
+        stock_keys = sorted({(m.warehouse_id, m.product_id) for line, m in valid if line in picks})
+        if not stock_keys:
+            return results
+        db.execute(
+            pg_insert(Stock)
+            .values([{"warehouse_id": w, "product_id": p, "quantity": 0} for w, p in stock_keys])
+            .on_conflict_do_nothing(index_elements=[Stock.warehouse_id, Stock.product_id])
+        )
+        on_hand = {
+            (row.warehouse_id, row.product_id): row.quantity or 0
+            for row in db.query(Stock.warehouse_id, Stock.product_id, Stock.quantity)
+            .filter(tuple_(Stock.warehouse_id, Stock.product_id).in_(stock_keys))
+            .order_by(Stock.warehouse_id, Stock.product_id)
+            .with_for_update()
+        }
+
+        for line, m in valid:
+            if line not in picks:
+                continue
+            key = (m.warehouse_id, m.product_id)
+            if m.movement_type == "import":
+                on_hand[key] += m.quantity
+            elif on_hand[key] < m.quantity:
+                results[line] = error(
+                    line,
+                    f"Không đủ tồn kho. Hiện tại: {on_hand[key]}, Cần xuất: {m.quantity}",
+                )
+                del picks[line]
+            else:
+                on_hand[key] -= m.quantity
+
+        # 6. Ghi
+        applied = [(line, m) for line, m in valid if line in picks]
+        if not applied:
+            return results
+
+        now = datetime.utcnow()
+        numbers = {
+            movement_type: iter(
+                StockMovementService.generate_movement_numbers(
+                    db,
+                    movement_type,
+                    sum(len(picks[line]) for line, m in applied if m.movement_type == movement_type),
+                )
+            )
+            for movement_type in ("import", "export")
+        }
+        movement_rows = []
+        stock_deltas: Dict[Tuple[int, int], float] = {}
+        summary_deltas: Dict[int, Tuple[float, float]] = {}
+        batch_stock_deltas: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        batch_deltas: Dict[int, float] = {}
+        for line, m in applied:
+            sign = 1 if m.movement_type == "import" else -1
+            key = (m.warehouse_id, m.product_id)
+            stock_deltas[key] = stock_deltas.get(key, 0) + sign * m.quantity
+            on_hand, available = summary_deltas.get(m.product_id, (0.0, 0.0))
+            on_hand += sign * m.quantity
+            for batch_id, quantity in picks[line]:
+                if batch_id in available_batches:
+                    available += sign * quantity
+                movement_rows.append(
+                    {
+                        "movement_number": next(numbers[m.movement_type]),
+                        "movement_type": MovementType(m.movement_type),
+                        "product_id": m.product_id,
+                        "batch_id": batch_id,
+                        "warehouse_id": m.warehouse_id,
+                        "quantity": quantity,
+                        "unit_cost": m.unit_cost if m.movement_type == "import" else None,
+                        "reference_type": m.reference_type,
+                        "reference_id": m.reference_id,
+                        "note": m.note,
+                        "created_by": created_by,
+                        "created_at": now,
+                    }
+                )
+                if batch_id:
+                    pair = (batch_id, m.warehouse_id)
+                    _, delta = batch_stock_deltas.get(pair, (m.product_id, 0))
+                    batch_stock_deltas[pair] = (m.product_id, delta + sign * quantity)
+                    batch_deltas[batch_id] = batch_deltas.get(batch_id, 0) + sign * quantity
+            summary_deltas[m.product_id] = (on_hand, available)
+
+        movement_ids = db.scalars(
+            insert(StockMovement).returning(StockMovement.id, sort_by_parameter_order=True),
+            movement_rows,
+        ).all()
+
+        if batch_stock_deltas:
+            stmt = pg_insert(BatchStock)
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[BatchStock.batch_id, BatchStock.warehouse_id],
+                    set_={
+                        "quantity": BatchStock.quantity + stmt.excluded.quantity,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                ),
+                [
+                    {
+                        "batch_id": batch_id,
+                        "warehouse_id": warehouse_id,
+                        "product_id": product_id,
+                        "quantity": delta,
+                        "updated_at": now,
+                    }
+                    for (batch_id, warehouse_id), (product_id, delta) in sorted(
+                        batch_stock_deltas.items()
+                    )
+                ],
+            )
+
+            deltas = values(
+                column("id", Integer), column("delta", Float), name="deltas"
+            ).data(sorted(batch_deltas.items()))
+            db.execute(
+                Batch.__table__.update()
+                .where(Batch.id == deltas.c.id)
+                .values(
+                    current_quantity=Batch.current_quantity + deltas.c.delta,
+                    version=Batch.version + 1,
+                    updated_at=now,
+                )
+            )
+
+        stmt = pg_insert(Stock)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Stock.warehouse_id, Stock.product_id],
+                set_={
+                    "quantity": Stock.quantity + stmt.excluded.quantity,
+                    "version": Stock.version + 1,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            ),
+            [
+                {"warehouse_id": w, "product_id": p, "quantity": delta, "updated_at": now}
+                for (w, p), delta in sorted(stock_deltas.items())
+            ],
+        )
+        StockSummaryService.apply_deltas(db, summary_deltas, now)
+        ValuationService.apply_movements(db, movement_ids)
+
+        # Gán id / số chứng từ về từng dòng theo đúng thứ tự movement_rows
+        position = 0
+        for line, m in applied:
+            count = len(picks[line])
+            results[line] = {
+                "line": line,
+                "success": True,
+                "movement_ids": list(movement_ids[position : position + count]),
+                "movement_numbers": [
+                    row["movement_number"] for row in movement_rows[position : position + count]
+                ],
+            }
+            position += count
+
+        return results
+
+    @staticmethod
+    def _movements_query(
         db: Session,
-        skip: int = 0,
-        limit: int = 10,
         movement_type: Optional[str] = None,
         product_id: Optional[int] = None,
         warehouse_id: Optional[int] = None,
-    ) -> Tuple[List[StockMovement], int]:
-        """Lấy danh sách movements"""
+    ):
+        """Query movements đã áp filter (dùng chung offset + keyset)"""
         query = db.query(StockMovement)
 
         if movement_type:
@@ -293,12 +958,93 @@ class StockMovementService:
         if warehouse_id:
             query = query.filter(StockMovement.warehouse_id == warehouse_id)
 
-        total = query.count()
+        return query
+
+    @staticmethod
+    def get_movements(
+        db: Session,
+        skip: int = 0,
+        limit: int = 10,
+        movement_type: Optional[str] = None,
+        product_id: Optional[int] = None,
+        warehouse_id: Optional[int] = None,
+        count: str = CountStrategy.EXACT,
+    ) -> Tuple[List[StockMovement], Optional[int]]:
+        """Lấy danh sách movements"""
+        query = StockMovementService._movements_query(
+            db, movement_type, product_id, warehouse_id
+        )
+
+        total = count_total(query, count)
         movements = (
-            query.order_by(StockMovement.created_at.desc())
+            query.order_by(StockMovement.created_at.desc(), StockMovement.id.desc())
             .offset(skip)
             .limit(limit)
             .all()
         )
 
         return movements, total
+
+    @staticmethod
+    def get_movements_keyset(
+        db: Session,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        movement_type: Optional[str] = None,
+        product_id: Optional[int] = None,
+        warehouse_id: Optional[int] = None,
+    ) -> Tuple[List[StockMovement], Optional[str]]:
+        """Lấy danh sách movements theo cursor (created_at, id), không đếm total"""
+        query = StockMovementService._movements_query(
+            db, movement_type, product_id, warehouse_id
+        )
+        return paginate_keyset(
+            query, [StockMovement.created_at, StockMovement.id], limit, cursor
+        )
+
+    # ============= ASYNC VARIANTS =============
+    # Chạy lại đúng logic sync qua AsyncSession.run_sync: code ORM chạy trong
+    # greenlet trên driver asyncpg nên không chiếm slot threadpool.
+
+    @staticmethod
+    async def import_stock_async(
+        db: AsyncSession, movement: StockMovementCreate, created_by: int
+    ) -> StockMovement:
+        """Nhập kho (async)"""
+        return await db.run_sync(
+            StockMovementService.import_stock, movement, created_by
+        )
+
+    @staticmethod
+    async def export_stock_async(
+        db: AsyncSession, movement: StockMovementCreate, created_by: int
+    ) -> List[StockMovement]:
+        """Xuất kho (async)"""
+        return await db.run_sync(
+            StockMovementService.export_stock, movement, created_by
+        )
+
+    @staticmethod
+    async def apply_bulk_async(
+        db: AsyncSession, lines: List[Tuple[int, StockMovementCreate]], created_by: int
+    ) -> Dict[int, dict]:
+        """Bulk nhập / xuất (async)"""
+        return await db.run_sync(StockMovementService.apply_bulk, lines, created_by)
+
+    @staticmethod
+    async def get_movements_async(
+        db: AsyncSession, **filters
+    ) -> Tuple[List[StockMovement], int]:
+        """Lấy danh sách movements (async)"""
+        return await db.run_sync(
+            lambda session: StockMovementService.get_movements(session, **filters)
+        )
+
+    @staticmethod
+    async def get_movements_keyset_async(
+        db: AsyncSession, **filters
+    ) -> Tuple[List[StockMovement], Optional[str]]:
+        """Lấy danh sách movements theo cursor (async)"""
+        return await db.run_sync(
+            lambda session: StockMovementService.get_movements_keyset(session, **filters)
+        )
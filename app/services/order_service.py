@@ -2,11 +2,15 @@
 Order Service - Business Logic cho Orders
 """
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import Optional, Tuple, List
 from datetime import datetime
 
+from app.db.counting import CountStrategy, count_total
+from app.core.numbering import document_numbers
+from app.core.pagination import paginate_keyset
 from app.models.order import Order, OrderItem, OrderStatusLog, OrderStatus, OrderType
 from app.schemas.order import OrderCreate, OrderUpdate, OrderStatusUpdate
 
@@ -19,18 +23,8 @@ class OrderService:
         Generate unique order number
         Format: ORD-B2C-YYYYMMDD-XXXX hoặc ORD-B2B-YYYYMMDD-XXXX
         """
-        prefix = f"ORD-{order_type.upper()}"
-        today = datetime.now().strftime("%Y%m%d")
-
-        # Đếm số orders cùng loại được tạo hôm nay
-        count = (
-            db.query(Order)
-            .filter(Order.order_number.like(f"{prefix}-{today}-%"))
-            .count()
-        )
-
-        sequence = str(count + 1).zfill(4)
-        return f"{prefix}-{today}-{sequence}"
+        # Bộ đếm theo loại + ngày (document_counters), không COUNT bảng orders
+        return document_numbers.next_number(f"ORD-{order_type.upper()}", 4, db=db)
 
     @staticmethod
     def calculate_order_total(order_data: OrderCreate) -> dict:
@@ -127,22 +121,20 @@ class OrderService:
         )
         db.add(status_log)
 
-        db.commit()
+        db.flush()
         db.refresh(db_order)
 
         return db_order
 
     @staticmethod
-    def get_orders(
+    def _orders_query(
         db: Session,
-        skip: int = 0,
-        limit: int = 10,
         search: Optional[str] = None,
         status: Optional[str] = None,
         order_type: Optional[str] = None,
         customer_id: Optional[int] = None,
-    ) -> Tuple[List[Order], int]:
-        """Lấy danh sách orders với filter"""
+    ):
+        """Query orders đã áp filter (dùng chung offset + keyset)"""
         query = db.query(Order)
 
         # Filter by search
@@ -166,14 +158,70 @@ class OrderService:
         if customer_id:
             query = query.filter(Order.customer_id == customer_id)
 
+        return query
+
+    @staticmethod
+    def get_orders(
+        db: Session,
+        skip: int = 0,
+        limit: int = 10,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        order_type: Optional[str] = None,
+        customer_id: Optional[int] = None,
+        count: str = CountStrategy.EXACT,
+    ) -> Tuple[List[Order], Optional[int]]:
+        """Lấy danh sách orders với filter"""
+        query = OrderService._orders_query(db, search, status, order_type, customer_id)
+
         # Get total
-        total = query.count()
+        total = count_total(query, count)
 
         # Pagination
-        orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+        orders = (
+            query.order_by(Order.created_at.desc(), Order.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
 
         return orders, total
 
+    @staticmethod
+    def get_orders_keyset(
+        db: Session,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        order_type: Optional[str] = None,
+        customer_id: Optional[int] = None,
+    ) -> Tuple[List[Order], Optional[str]]:
+        """Lấy danh sách orders theo cursor (created_at, id), không đếm total"""
+        query = OrderService._orders_query(db, search, status, order_type, customer_id)
+        return paginate_keyset(query, [Order.created_at, Order.id], limit, cursor)
+
+    @staticmethod
+    async def get_orders_async(
+        db: AsyncSession, **filters
+    ) -> Tuple[List[Order], int]:
+        """
+        Lấy danh sách orders (async)
+        Dùng lại get_orders qua AsyncSession.run_sync (không chiếm threadpool)
+        """
+        return await db.run_sync(
+            lambda session: OrderService.get_orders(session, **filters)
+        )
+
+    @staticmethod
+    async def get_orders_keyset_async(
+        db: AsyncSession, **filters
+    ) -> Tuple[List[Order], Optional[str]]:
+        """Lấy danh sách orders theo cursor (async)"""
+        return await db.run_sync(
+            lambda session: OrderService.get_orders_keyset(session, **filters)
+        )
+
     @staticmethod
     def get_order_by_id(db: Session, order_id: int) -> Optional[Order]:
         """Lấy order theo ID"""
@@ -214,7 +262,7 @@ class OrderService:
         )
         db.add(status_log)
 
-        db.commit()
+        db.flush()
         db.refresh(db_order)
 
         return db_order
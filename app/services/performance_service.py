@@ -35,7 +35,7 @@ class PerformanceService:
         db_review = PerformanceReview(**review.dict(), reviewer_id=reviewer_id)
 
         db.add(db_review)
-        db.commit()
+        db.flush()
         db.refresh(db_review)
         return db_review
 
@@ -95,7 +95,7 @@ class PerformanceService:
         for key, value in update_data.items():
             setattr(db_review, key, value)
 
-        db.commit()
+        db.flush()
         db.refresh(db_review)
         return db_review
 
@@ -111,20 +111,24 @@ class PerformanceService:
             .all()
         )
 
-        # Attach employee & reviewer names
-        result = []
-        for review in reviews:
-            employee = (
-                db.query(Employee).filter(Employee.id == review.employee_id).first()
-            )
-            reviewer = (
-                db.query(Employee).filter(Employee.id == review.reviewer_id).first()
+        # Attach employee & reviewer names (1 query cho tất cả, tránh N+1)
+        employee_ids = {r.employee_id for r in reviews} | {
+            r.reviewer_id for r in reviews
+        }
+        names = {}
+        if employee_ids:
+            names = dict(
+                db.query(Employee.id, Employee.full_name)
+                .filter(Employee.id.in_(employee_ids))
+                .all()
             )
 
+        result = []
+        for review in reviews:
             review_dict = {
                 **review.__dict__,
-                "employee_name": employee.full_name if employee else None,
-                "reviewer_name": reviewer.full_name if reviewer else None,
+                "employee_name": names.get(review.employee_id),
+                "reviewer_name": names.get(review.reviewer_id),
             }
             result.append(PerformanceReviewWithDetails(**review_dict))
 
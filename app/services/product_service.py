@@ -7,7 +7,9 @@ from sqlalchemy import or_
 from typing import Optional, Tuple, List
 from datetime import datetime
 
+from app.db.counting import CountStrategy, count_total
 from app.models.product import Product, ProductCategory
+from app.services.stock_summary_service import StockSummaryService
 from app.schemas.product import (
     ProductCreate,
     ProductUpdate,
@@ -27,7 +29,7 @@ class ProductCategoryService:
             name=category.name, description=category.description, is_active=True
         )
         db.add(db_category)
-        db.commit()
+        db.flush()
         db.refresh(db_category)
         return db_category
 
@@ -71,7 +73,8 @@ class ProductService:
         )
 
         db.add(db_product)
-        db.commit()
+        db.flush()
+        StockSummaryService.refresh_low_stock(db, db_product.id)
         db.refresh(db_product)
 
         return db_product
@@ -84,7 +87,8 @@ class ProductService:
         search: Optional[str] = None,
         category_id: Optional[int] = None,
         is_active: Optional[bool] = None,
-    ) -> Tuple[List[Product], int]:
+        count: str = CountStrategy.EXACT,
+    ) -> Tuple[List[Product], Optional[int]]:
         """Lấy danh sách products"""
         query = db.query(Product)
 
@@ -102,7 +106,7 @@ class ProductService:
         if is_active is not None:
             query = query.filter(Product.is_active == is_active)
 
-        total = query.count()
+        total = count_total(query, count)
         products = (
             query.order_by(Product.created_at.desc()).offset(skip).limit(limit).all()
         )
@@ -129,30 +133,14 @@ class ProductService:
             setattr(db_product, field, value)
 
         db_product.updated_at = datetime.utcnow()
-        db.commit()
+        db.flush()
+        if "min_stock" in update_data:
+            StockSummaryService.refresh_low_stock(db, product_id)
         db.refresh(db_product)
 
         return db_product
 
     @staticmethod
     def check_low_stock(db: Session) -> List[Product]:
-        """Kiểm tra sản phẩm tồn kho thấp"""
-        from app.models.inventory import Stock
-        from sqlalchemy import func
-
-        # Subquery để tính tổng tồn kho của mỗi product
-        stock_subquery = (
-            db.query(Stock.product_id, func.sum(Stock.quantity).label("total_quantity"))
-            .group_by(Stock.product_id)
-            .subquery()
-        )
-
-        # Join với products và filter
-        low_stock_products = (
-            db.query(Product)
-            .join(stock_subquery, Product.id == stock_subquery.c.product_id)
-            .filter(stock_subquery.c.total_quantity < Product.min_stock)
-            .all()
-        )
-
-        return low_stock_products
+        """Kiểm tra sản phẩm tồn kho thấp (đọc cờ is_low_stock của stock summary)"""
+        return StockSummaryService.get_low_stock_products(db)
@@ -2,12 +2,14 @@
 QC Service - Inspection lifecycle, sampling, evaluation
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 
+from app.core.pagination import paginate_keyset
 from app.models.qc import QCInspection, QCDefect, QCMeasurement
 from app.models.inventory import Batch
 from app.schemas.qc import InspectionCreate, DefectCreate, MeasurementCreate
+from app.services.inventory_service import BatchService
 
 
 class QCService:
@@ -74,7 +76,7 @@ class QCService:
             started_at=datetime.utcnow(),
         )
         db.add(insp)
-        db.commit()
+        db.flush()
         db.refresh(insp)
         return insp
 
@@ -98,7 +100,7 @@ class QCService:
             )
             db.add(row)
             created.append(row)
-        db.commit()
+        db.flush()
         return created
 
     @staticmethod
@@ -121,7 +123,7 @@ class QCService:
             )
             db.add(row)
             created.append(row)
-        db.commit()
+        db.flush()
         return created
 
     @staticmethod
@@ -136,7 +138,7 @@ class QCService:
         return {"inspection": insp, "defects": defects, "measurements": measurements}
 
     @staticmethod
-    def list(db: Session, batch_id: Optional[int] = None, type_: Optional[str] = None, status: Optional[str] = None):
+    def _list_query(db: Session, batch_id: Optional[int] = None, type_: Optional[str] = None, status: Optional[str] = None):
         q = db.query(QCInspection)
         if batch_id:
             q = q.filter(QCInspection.batch_id == batch_id)
@@ -144,7 +146,25 @@ class QCService:
             q = q.filter(QCInspection.type == type_)
         if status:
             q = q.filter(QCInspection.status == status)
-        return q.order_by(QCInspection.started_at.desc()).all()
+        return q
+
+    @staticmethod
+    def list(db: Session, batch_id: Optional[int] = None, type_: Optional[str] = None, status: Optional[str] = None):
+        q = QCService._list_query(db, batch_id, type_, status)
+        return q.order_by(QCInspection.started_at.desc(), QCInspection.id.desc()).all()
+
+    @staticmethod
+    def list_keyset(
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        batch_id: Optional[int] = None,
+        type_: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> Tuple[List[QCInspection], Optional[str]]:
+        """List inspections theo cursor (started_at, id)"""
+        q = QCService._list_query(db, batch_id, type_, status)
+        return paginate_keyset(q, [QCInspection.started_at, QCInspection.id], limit, cursor)
 
     @staticmethod
     def _evaluate(db: Session, insp: QCInspection) -> str:
@@ -186,13 +206,13 @@ class QCService:
         batch = db.query(Batch).filter(Batch.id == insp.batch_id).first()
         if batch:
             if final_decision == "accept":
-                batch.qc_status = "passed"
+                BatchService.set_qc_status(db, batch, "passed")
             elif final_decision == "reject":
-                batch.qc_status = "failed"
+                BatchService.set_qc_status(db, batch, "failed")
             else:
-                batch.qc_status = "pending"  # hold/rework
+                BatchService.set_qc_status(db, batch, "pending")  # hold/rework
 
-        db.commit()
+        db.flush()
         db.refresh(insp)
         return insp
 
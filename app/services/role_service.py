@@ -1,8 +1,11 @@
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.models.role import Role, Permission
+from sqlalchemy import or_, select, update
+from app.models.role import Role, Permission, user_roles, role_permissions
 from app.models.user import User
+from app.core.permission_bits import permission_registry
+from app.core.principal import principal_cache
+from app.db.unit_of_work import after_commit
 from app.schemas.role import RoleCreate, RoleUpdate, PermissionCreate, PermissionUpdate
 
 
@@ -54,7 +57,7 @@ class RoleService:
         )
 
         db.add(db_role)
-        db.commit()
+        db.flush()
         db.refresh(db_role)
 
         return db_role
@@ -74,7 +77,11 @@ class RoleService:
         for field, value in update_data.items():
             setattr(db_role, field, value)
 
-        db.commit()
+        # is_active đổi thì quyền của mọi user có role này đổi theo
+        user_ids = PermissionBitsService.role_user_ids(db, role_id)
+        db.flush()
+        PermissionBitsService.refresh_users(db, user_ids)
+        after_commit(db, lambda: principal_cache.invalidate_users(user_ids))
         db.refresh(db_role)
 
         return db_role
@@ -87,8 +94,11 @@ class RoleService:
         if not db_role:
             return False
 
+        user_ids = PermissionBitsService.role_user_ids(db, role_id)
         db.delete(db_role)
-        db.commit()
+        db.flush()
+        PermissionBitsService.refresh_users(db, user_ids)
+        after_commit(db, lambda: principal_cache.invalidate_users(user_ids))
 
         return True
 
@@ -105,7 +115,10 @@ class RoleService:
 
         if db_permission not in db_role.permissions:
             db_role.permissions.append(db_permission)
-            db.commit()
+            user_ids = PermissionBitsService.role_user_ids(db, role_id)
+            db.flush()
+            PermissionBitsService.refresh_users(db, user_ids)
+            after_commit(db, lambda: principal_cache.invalidate_users(user_ids))
             db.refresh(db_role)
 
         return db_role
@@ -123,7 +136,10 @@ class RoleService:
 
         if db_permission in db_role.permissions:
             db_role.permissions.remove(db_permission)
-            db.commit()
+            user_ids = PermissionBitsService.role_user_ids(db, role_id)
+            db.flush()
+            PermissionBitsService.refresh_users(db, user_ids)
+            after_commit(db, lambda: principal_cache.invalidate_users(user_ids))
             db.refresh(db_role)
 
         return db_role
@@ -141,7 +157,9 @@ class RoleService:
 
         if db_role not in db_user.roles:
             db_user.roles.append(db_role)
-            db.commit()
+            db.flush()
+            PermissionBitsService.refresh_users(db, [user_id])
+            after_commit(db, lambda: principal_cache.invalidate_user(user_id))
             db.refresh(db_user)
 
         return db_user
@@ -161,7 +179,9 @@ class RoleService:
 
         if db_role in db_user.roles:
             db_user.roles.remove(db_role)
-            db.commit()
+            db.flush()
+            PermissionBitsService.refresh_users(db, [user_id])
+            after_commit(db, lambda: principal_cache.invalidate_user(user_id))
             db.refresh(db_user)
 
         return db_user
@@ -213,7 +233,8 @@ class PermissionService:
         )
 
         db.add(db_permission)
-        db.commit()
+        db.flush()
+        after_commit(db, permission_registry.invalidate)
         db.refresh(db_permission)
 
         return db_permission
@@ -233,7 +254,9 @@ class PermissionService:
         for field, value in update_data.items():
             setattr(db_permission, field, value)
 
-        db.commit()
+        # Đổi tên không đổi bit (id), chỉ cần reload registry
+        db.flush()
+        after_commit(db, permission_registry.invalidate)
         db.refresh(db_permission)
 
         return db_permission
@@ -246,7 +269,81 @@ class PermissionService:
         if not db_permission:
             return False
 
+        user_ids = PermissionBitsService.permission_user_ids(db, permission_id)
         db.delete(db_permission)
-        db.commit()
+        db.flush()
+        PermissionBitsService.refresh_users(db, user_ids)
+        after_commit(db, permission_registry.invalidate)
+        after_commit(db, lambda: principal_cache.invalidate_users(user_ids))
 
         return True
+
+
+class PermissionBitsService:
+    """
+    Materialize users.permission_bits - quyền hiệu lực (từ các role active)
+    dạng bitset, chỉ tính lại cho user bị ảnh hưởng.
+
+    refresh_users chỉ update trong transaction hiện tại; caller đăng ký
+    invalidate principal cache qua after_commit.
+    """
+
+    @staticmethod
+    def role_user_ids(db: Session, role_id: int) -> List[int]:
+        """User đang có role"""
+        return list(
+            db.scalars(
+                select(user_roles.c.user_id).where(user_roles.c.role_id == role_id)
+            )
+        )
+
+    @staticmethod
+    def permission_user_ids(db: Session, permission_id: int) -> List[int]:
+        """User có permission qua bất kỳ role nào"""
+        return list(
+            db.scalars(
+                select(user_roles.c.user_id)
+                .join(
+                    role_permissions,
+                    role_permissions.c.role_id == user_roles.c.role_id,
+                )
+                .where(role_permissions.c.permission_id == permission_id)
+                .distinct()
+            )
+        )
+
+    @staticmethod
+    def compute(db: Session, user_ids: Iterable[int]) -> dict:
+        """{user_id: bitset} tính từ user_roles -> roles active -> role_permissions"""
+        bits = dict.fromkeys(user_ids, 0)
+        if not bits:
+            return bits
+
+        rows = db.execute(
+            select(user_roles.c.user_id, role_permissions.c.permission_id)
+            .join(Role, Role.id == user_roles.c.role_id)
+            .join(role_permissions, role_permissions.c.role_id == Role.id)
+            .where(user_roles.c.user_id.in_(list(bits)), Role.is_active.is_(True))
+        )
+        for user_id, permission_id in rows:
+            bits[user_id] |= 1 << permission_id
+
+        return bits
+
+    @staticmethod
+    def refresh_users(db: Session, user_ids: Iterable[int]) -> None:
+        """Tính lại và ghi permission_bits cho các user (bulk UPDATE theo PK)"""
+        bits = PermissionBitsService.compute(db, set(user_ids))
+        if bits:
+            db.execute(
+                update(User),
+                [{"id": user_id, "permission_bits": value} for user_id, value in bits.items()],
+            )
+
+    @staticmethod
+    def refresh_all(db: Session) -> int:
+        """Tính lại cho toàn bộ user (sau seed / sửa trực tiếp trong DB)"""
+        user_ids = list(db.scalars(select(User.id)))
+        PermissionBitsService.refresh_users(db, user_ids)
+        after_commit(db, principal_cache.invalidate_all)
+        return len(user_ids)
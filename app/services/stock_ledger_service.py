@@ -0,0 +1,243 @@
+"""
+Stock Ledger Service - tồn kho tại 1 thời điểm (as-of) từ snapshot định kỳ
+
+stocks.quantity chỉ là số dư hiện tại. Tồn tại thời điểm T tính bằng:
+
+    snapshot gần nhất S (S.snapshot_at <= T) + movements có S.snapshot_at <= created_at < T
+
+nên chi phí là O(dòng snapshot + movements sau snapshot), không phải cả lịch sử.
+Snapshot mới cũng tính tăng dần từ snapshot trước nó. Số dư lấy từ
+stock_movements (dữ liệu tạo thẳng vào stocks không qua phiếu kho không có ở đây).
+
+Movement được ghi created_at lúc tạo nhưng commit muộn hơn một chút: chỉ cho
+tạo snapshot với snapshot_at <= now - STOCK_SNAPSHOT_SETTLE_SECONDS để không
+bỏ sót transaction đang chạy.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import case, func, insert, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.inventory import (
+    MovementType,
+    StockMovement,
+    StockSnapshot,
+    StockSnapshotLine,
+)
+
+# Chiều tác động lên tồn kho (warehouse_id) của từng loại phiếu (CHECK chỉ ghi
+# nhận, không đổi tồn). TRANSFER: -1 ở kho nguồn, +1 ở to_warehouse_id (dòng riêng).
+# ADJUST (kiểm kê) lưu quantity có dấu
+MOVEMENT_SIGNS = {
+    MovementType.IMPORT: 1,
+    MovementType.EXPORT: -1,
+    MovementType.TRANSFER: -1,
+    MovementType.ADJUST: 1,
+}
+
+# Bỏ các dòng tồn ~0 do sai số float khi cộng / trừ
+_ZERO = 1e-9
+
+
+def signed_quantity():
+    """Số lượng có dấu của movement theo MOVEMENT_SIGNS"""
+    return case(
+        *[
+            (StockMovement.movement_type == movement_type, StockMovement.quantity * sign)
+            for movement_type, sign in MOVEMENT_SIGNS.items()
+        ],
+        else_=0.0,
+    )
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """created_at lưu UTC không timezone: đổi datetime có tz về cùng dạng"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class StockLedgerService:
+
+    @staticmethod
+    def get_base_snapshot(db: Session, at: datetime) -> Optional[StockSnapshot]:
+        """Snapshot gần nhất có snapshot_at <= at"""
+        return (
+            db.query(StockSnapshot)
+            .filter(StockSnapshot.snapshot_at <= at)
+            .order_by(StockSnapshot.snapshot_at.desc())
+            .first()
+        )
+
+    @staticmethod
+    def _balances(
+        base: Optional[StockSnapshot],
+        at: datetime,
+        warehouse_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        by_batch: bool = True,
+    ):
+        """
+        SELECT (warehouse_id, product_id[, batch_id], quantity) tại thời điểm at:
+        dòng của snapshot base + movements từ base.snapshot_at đến trước at
+        (transfer thêm 1 dòng + ở kho đích)
+        """
+        movement_rows = select(
+            StockMovement.warehouse_id,
+            StockMovement.product_id,
+            StockMovement.batch_id,
+            signed_quantity().label("quantity"),
+        ).where(StockMovement.created_at < at)
+        transfer_rows = select(
+            StockMovement.to_warehouse_id.label("warehouse_id"),
+            StockMovement.product_id,
+            StockMovement.batch_id,
+            StockMovement.quantity,
+        ).where(
+            StockMovement.to_warehouse_id.is_not(None),
+            StockMovement.movement_type == MovementType.TRANSFER,
+            StockMovement.created_at < at,
+        )
+        if warehouse_id:
+            movement_rows = movement_rows.where(StockMovement.warehouse_id == warehouse_id)
+            transfer_rows = transfer_rows.where(StockMovement.to_warehouse_id == warehouse_id)
+        if product_id:
+            movement_rows = movement_rows.where(StockMovement.product_id == product_id)
+            transfer_rows = transfer_rows.where(StockMovement.product_id == product_id)
+
+        if base:
+            snapshot_rows = select(
+                StockSnapshotLine.warehouse_id,
+                StockSnapshotLine.product_id,
+                StockSnapshotLine.batch_id,
+                StockSnapshotLine.quantity,
+            ).where(StockSnapshotLine.snapshot_id == base.id)
+            if warehouse_id:
+                snapshot_rows = snapshot_rows.where(StockSnapshotLine.warehouse_id == warehouse_id)
+            if product_id:
+                snapshot_rows = snapshot_rows.where(StockSnapshotLine.product_id == product_id)
+
+            movement_rows = movement_rows.where(StockMovement.created_at >= base.snapshot_at)
+            transfer_rows = transfer_rows.where(StockMovement.created_at >= base.snapshot_at)
+            rows = union_all(snapshot_rows, movement_rows, transfer_rows).subquery("ledger")
+        else:
+            rows = union_all(movement_rows, transfer_rows).subquery("ledger")
+
+        keys = [rows.c.warehouse_id, rows.c.product_id]
+        if by_batch:
+            keys.append(rows.c.batch_id)
+        total = func.sum(rows.c.quantity)
+
+        return (
+            select(*keys, total.label("quantity"))
+            .group_by(*keys)
+            .having(func.abs(total) > _ZERO)
+            .order_by(*keys)
+        )
+
+    @staticmethod
+    def get_stock_as_of(
+        db: Session,
+        at: datetime,
+        warehouse_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        by_batch: bool = False,
+    ) -> dict:
+        """
+        Tồn kho tại thời điểm at (movements created_at < at)
+
+        Returns:
+            {"at", "snapshot_at" (snapshot dùng làm gốc, None = tính từ đầu), "items"}
+        """
+        at = to_utc_naive(at)
+        base = StockLedgerService.get_base_snapshot(db, at)
+        rows = db.execute(
+            StockLedgerService._balances(base, at, warehouse_id, product_id, by_batch)
+        ).all()
+
+        return {
+            "at": at,
+            "snapshot_at": base.snapshot_at if base else None,
+            "items": [
+                {
+                    "warehouse_id": row.warehouse_id,
+                    "product_id": row.product_id,
+                    "batch_id": row.batch_id if by_batch else None,
+                    "quantity": row.quantity,
+                }
+                for row in rows
+            ],
+        }
+
+    @staticmethod
+    def default_snapshot_at() -> datetime:
+        """Mốc snapshot định kỳ: 00:00 UTC hôm nay"""
+        now = datetime.utcnow()
+        return datetime(now.year, now.month, now.day)
+
+    @staticmethod
+    def create_snapshot(
+        db: Session, snapshot_at: Optional[datetime] = None
+    ) -> StockSnapshot:
+        """
+        Tạo snapshot tại snapshot_at (mặc định 00:00 UTC hôm nay), tính từ
+        snapshot trước đó + movements ở giữa bằng 1 câu INSERT ... SELECT
+
+        Raises:
+            ValueError: snapshot_at quá gần hiện tại hoặc đã có snapshot này
+        """
+        snapshot_at = to_utc_naive(snapshot_at or StockLedgerService.default_snapshot_at())
+        settled = datetime.utcnow() - timedelta(seconds=settings.STOCK_SNAPSHOT_SETTLE_SECONDS)
+        if snapshot_at > settled:
+            raise ValueError(
+                f"snapshot_at phải trước hiện tại ít nhất "
+                f"{settings.STOCK_SNAPSHOT_SETTLE_SECONDS} giây"
+            )
+        if db.query(StockSnapshot.id).filter(StockSnapshot.snapshot_at == snapshot_at).first():
+            raise ValueError(f"Đã có snapshot tại {snapshot_at.isoformat()}")
+
+        base = StockLedgerService.get_base_snapshot(db, snapshot_at)
+        snapshot = StockSnapshot(snapshot_at=snapshot_at)
+        db.add(snapshot)
+        db.flush()
+
+        balances = StockLedgerService._balances(base, snapshot_at).subquery("balances")
+        result = db.execute(
+            insert(StockSnapshotLine).from_select(
+                ["snapshot_id", "warehouse_id", "product_id", "batch_id", "quantity"],
+                select(
+                    literal(snapshot.id),
+                    balances.c.warehouse_id,
+                    balances.c.product_id,
+                    balances.c.batch_id,
+                    balances.c.quantity,
+                ),
+            )
+        )
+        snapshot.line_count = result.rowcount
+        db.flush()
+
+        return snapshot
+
+    @staticmethod
+    def get_snapshots(db: Session, limit: int = 100) -> List[StockSnapshot]:
+        """Danh sách snapshot, mới nhất trước"""
+        return (
+            db.query(StockSnapshot)
+            .order_by(StockSnapshot.snapshot_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+    # ============= ASYNC VARIANTS =============
+
+    @staticmethod
+    async def get_stock_as_of_async(db: AsyncSession, at: datetime, **filters) -> dict:
+        """Tồn kho tại thời điểm at (async)"""
+        return await db.run_sync(
+            lambda session: StockLedgerService.get_stock_as_of(session, at, **filters)
+        )
@@ -0,0 +1,169 @@
+"""
+Stock Summary Service - read model tồn kho theo sản phẩm (product_stock_summaries)
+
+/stock/summary và /products/low-stock đọc thẳng bảng này (chi phí theo số dòng
+trả về), không GROUP BY stocks mỗi request. Các luồng ghi cộng delta vào
+summary trong cùng transaction bằng 1 câu upsert:
+
+- Nhập / xuất kho (1 dòng và bulk): on_hand, available, last_movement_at
+- Đổi QC status của batch: available (BatchService.set_qc_status)
+- Tạo product / đổi min_stock: is_low_stock
+
+Dòng summary được lock sau cùng (sau stocks), theo product_id tăng dần.
+Dữ liệu ghi thẳng vào DB không qua service (generate_data, seed) thì chạy
+REBUILD_SQL để tính lại toàn bộ.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, column, func, literal, literal_column, select, text, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.inventory import ProductStockSummary
+from app.models.product import Product
+
+# Tính lại toàn bộ summary từ stocks / batch_stocks / stock_movements
+REBUILD_SQL = """
+INSERT INTO product_stock_summaries
+    (product_id, on_hand, available, is_low_stock, last_movement_at, updated_at)
+SELECT p.id,
+       COALESCE(s.on_hand, 0),
+       COALESCE(a.available, 0),
+       COALESCE(s.on_hand, 0) < COALESCE(p.min_stock, 0),
+       m.last_movement_at,
+       now()
+FROM products p
+LEFT JOIN (
+    SELECT product_id, SUM(quantity) AS on_hand FROM stocks GROUP BY product_id
+) s ON s.product_id = p.id
+LEFT JOIN (
+    SELECT bs.product_id, SUM(bs.quantity) AS available
+    FROM batch_stocks bs JOIN batches b ON b.id = bs.batch_id
+    WHERE b.qc_status = 'passed' AND b.is_active
+    GROUP BY bs.product_id
+) a ON a.product_id = p.id
+LEFT JOIN (
+    SELECT product_id, MAX(created_at) AS last_movement_at
+    FROM stock_movements GROUP BY product_id
+) m ON m.product_id = p.id
+ON CONFLICT (product_id) DO UPDATE SET
+    on_hand = EXCLUDED.on_hand,
+    available = EXCLUDED.available,
+    is_low_stock = EXCLUDED.is_low_stock,
+    last_movement_at = EXCLUDED.last_movement_at,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def counts_as_available(qc_status: Optional[str], is_active: Optional[bool]) -> bool:
+    """Tồn của batch có tính vào available không (giống điều kiện xuất FEFO)"""
+    return qc_status == "passed" and bool(is_active)
+
+
+class StockSummaryService:
+
+    @staticmethod
+    def apply_deltas(
+        db: Session,
+        deltas: Dict[int, Tuple[float, float]],
+        moved_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Cộng delta vào summary (tạo dòng nếu chưa có), tính lại is_low_stock
+
+        Args:
+            deltas: {product_id: (delta on_hand, delta available)}
+            moved_at: Thời điểm phiếu kho (None = không đổi last_movement_at)
+        """
+        if not deltas:
+            return
+
+        rows = values(
+            column("product_id", Integer),
+            column("on_hand", Float),
+            column("available", Float),
+            name="deltas",
+        ).data(
+            [
+                (product_id, on_hand, available)
+                for product_id, (on_hand, available) in sorted(deltas.items())
+            ]
+        )
+        table = ProductStockSummary.__table__
+        stmt = pg_insert(table).from_select(
+            ["product_id", "on_hand", "available", "is_low_stock", "last_movement_at", "updated_at"],
+            select(
+                rows.c.product_id,
+                rows.c.on_hand,
+                rows.c.available,
+                rows.c.on_hand < func.coalesce(Product.min_stock, 0),
+                literal(moved_at, DateTime),
+                literal(datetime.utcnow(), DateTime),
+            )
+            .join_from(rows, Product, Product.id == rows.c.product_id)
+            # Lock dòng summary theo product_id tăng dần
+            .order_by(rows.c.product_id),
+        )
+        on_hand = table.c.on_hand + stmt.excluded.on_hand
+        min_stock = (
+            select(func.coalesce(Product.min_stock, 0))
+            # ON CONFLICT ... SET không tự correlate subquery với EXCLUDED
+            .where(Product.id == literal_column("excluded.product_id"))
+            .scalar_subquery()
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.product_id],
+                set_={
+                    "on_hand": on_hand,
+                    "available": table.c.available + stmt.excluded.available,
+                    "is_low_stock": on_hand < min_stock,
+                    "last_movement_at": func.coalesce(
+                        stmt.excluded.last_movement_at, table.c.last_movement_at
+                    ),
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+    @staticmethod
+    def refresh_low_stock(db: Session, product_id: int) -> None:
+        """Tính lại is_low_stock sau khi đổi min_stock (tạo dòng nếu chưa có)"""
+        StockSummaryService.apply_deltas(db, {product_id: (0.0, 0.0)})
+
+    @staticmethod
+    def rebuild(db: Session) -> None:
+        """Tính lại toàn bộ summary (sau khi ghi thẳng vào stocks / batch_stocks)"""
+        db.execute(text(REBUILD_SQL))
+
+    @staticmethod
+    def get_summaries(
+        db: Session,
+        product_id: Optional[int] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[ProductStockSummary, str, str]]:
+        """[(summary, sku, name)] theo product_id"""
+        query = db.query(ProductStockSummary, Product.sku, Product.name).join(
+            Product, Product.id == ProductStockSummary.product_id
+        )
+        if product_id:
+            query = query.filter(ProductStockSummary.product_id == product_id)
+
+        query = query.order_by(ProductStockSummary.product_id).offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def get_low_stock_products(db: Session) -> List[Product]:
+        """Sản phẩm có tồn < min_stock (partial index trên is_low_stock)"""
+        return (
+            db.query(Product)
+            .join(ProductStockSummary, ProductStockSummary.product_id == Product.id)
+            .filter(ProductStockSummary.is_low_stock == True)
+            .order_by(Product.id)
+            .all()
+        )
@@ -0,0 +1,417 @@
+"""
+Stock Transfer Service - chuyển kho (movement TRANSFER)
+
+Mỗi batch được chuyển là 1 movement TRANSFER: warehouse_id = kho nguồn,
+to_warehouse_id = kho đích. Tồn theo lô (batch_stocks) và stocks của cả 2 kho
+đổi trong cùng 1 transaction, không có lúc hàng không nằm ở kho nào.
+batches.current_quantity (tổng mọi kho) và on_hand / available của stock
+summary không đổi.
+
+Thứ tự lock giống xuất kho: batch_stocks -> stocks -> stock summary ->
+inventory_valuations, mỗi bảng sắp theo (warehouse_id, product_id) nên 2
+request chuyển ngược chiều (A -> B và B -> A) không deadlock. Giá vốn theo
+hàng sang kho đích (ValuationService). Chuyển 1 dòng = bulk 1 dòng.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, insert, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.inventory import (
+    Batch,
+    BatchStock,
+    MovementType,
+    Stock,
+    StockMovement,
+    Warehouse,
+)
+from app.models.product import Product
+from app.schemas.inventory import StockTransferCreate
+from app.services.inventory_service import StockMovementService
+from app.services.stock_summary_service import StockSummaryService, counts_as_available
+from app.services.valuation_service import ValuationService
+
+
+def _fefo_order(batch) -> tuple:
+    return (batch.expiry_date is None, batch.expiry_date or date.min, batch.id)
+
+
+class StockTransferService:
+
+    @staticmethod
+    def transfer(
+        db: Session, transfer: StockTransferCreate, created_by: int
+    ) -> List[StockMovement]:
+        """
+        Chuyển kho 1 sản phẩm (không chỉ định batch thì chia FEFO như xuất kho)
+
+        Raises:
+            ValueError: Sai tham chiếu hoặc kho nguồn không đủ hàng
+        """
+        result = StockTransferService.apply_bulk(db, [(1, transfer)], created_by)[1]
+        if not result["success"]:
+            raise ValueError(result["error"])
+
+        return (
+            db.query(StockMovement)
+            .filter(StockMovement.id.in_(result["movement_ids"]))
+            .order_by(StockMovement.id)
+            .all()
+        )
+
+    @staticmethod
+    def apply_bulk(
+        db: Session, lines: List[Tuple[int, StockTransferCreate]], created_by: int
+    ) -> Dict[int, dict]:
+        """
+        Chuyển kho nhiều dòng trong 1 transaction, set-based (VD: cân bằng tồn
+        hàng trăm SKU giữa 2 kho)
+
+        - Lock batch_stocks của kho nguồn và kho đích trong 1 query, sắp theo
+          (warehouse_id, product_id, hạn dùng, batch)
+        - Chia batch theo thứ tự dòng; hàng vừa chuyển vào kho dùng được cho
+          dòng phía sau. Dòng không đủ hàng bị bỏ qua, báo lỗi theo dòng
+        - Lock stocks theo (warehouse_id, product_id), tạo dòng kho đích nếu chưa có
+        - Ghi: 1 INSERT nhiều dòng stock_movements, upsert cộng dồn batch_stocks
+          và stocks
+
+        Args:
+            lines: [(số dòng, transfer)]
+
+        Returns:
+            {số dòng: kết quả (StockMovementBulkLine)}
+        """
+        results: Dict[int, dict] = {}
+        error = StockMovementService._bulk_error
+
+        # 1. Tham chiếu
+        product_ids = {t.product_id for _, t in lines}
+        warehouse_ids = {t.from_warehouse_id for _, t in lines} | {
+            t.to_warehouse_id for _, t in lines
+        }
+        batch_ids = {t.batch_id for _, t in lines if t.batch_id}
+
+        known_products = {
+            id for (id,) in db.query(Product.id).filter(Product.id.in_(product_ids))
+        }
+        known_warehouses = {
+            id for (id,) in db.query(Warehouse.id).filter(Warehouse.id.in_(warehouse_ids))
+        }
+        batches = {
+            row.id: row
+            for row in db.query(
+                Batch.id, Batch.product_id, Batch.qc_status, Batch.is_active, Batch.expiry_date
+            ).filter(Batch.id.in_(batch_ids))
+        }
+
+        valid: List[Tuple[int, StockTransferCreate]] = []
+        for line, t in lines:
+            if t.product_id not in known_products:
+                results[line] = error(line, f"Product với ID {t.product_id} không tồn tại")
+            elif t.from_warehouse_id not in known_warehouses:
+                results[line] = error(
+                    line, f"Warehouse với ID {t.from_warehouse_id} không tồn tại"
+                )
+            elif t.to_warehouse_id not in known_warehouses:
+                results[line] = error(line, f"Warehouse với ID {t.to_warehouse_id} không tồn tại")
+            elif t.batch_id and t.batch_id not in batches:
+                results[line] = error(line, f"Batch với ID {t.batch_id} không tồn tại")
+            elif t.batch_id and batches[t.batch_id].product_id != t.product_id:
+                results[line] = error(
+                    line, f"Batch {t.batch_id} không thuộc product {t.product_id}"
+                )
+            else:
+                valid.append((line, t))
+
+        if not valid:
+            return results
+
+        # 2. Lock batch_stocks: lô FEFO của (kho nguồn, SKU) + lô có thể nhận ở
+        # (kho đích, SKU) cho dòng không chỉ định batch, (batch, 2 kho) cho dòng có batch
+        fefo_keys = {
+            (t.from_warehouse_id, t.product_id) for _, t in valid if not t.batch_id
+        }
+        target_keys = {(t.to_warehouse_id, t.product_id) for _, t in valid if not t.batch_id}
+        batch_pairs = {
+            (t.batch_id, warehouse_id)
+            for _, t in valid
+            if t.batch_id
+            for warehouse_id in (t.from_warehouse_id, t.to_warehouse_id)
+        }
+
+        conditions = []
+        if fefo_keys:
+            conditions.append(
+                and_(
+                    tuple_(BatchStock.warehouse_id, BatchStock.product_id).in_(sorted(fefo_keys)),
+                    BatchStock.quantity > 0,
+                    Batch.qc_status == "passed",
+                    Batch.is_active == True,
+                )
+            )
+        if target_keys - fefo_keys:
+            conditions.append(
+                and_(
+                    tuple_(BatchStock.warehouse_id, BatchStock.product_id).in_(
+                        sorted(target_keys - fefo_keys)
+                    ),
+                    Batch.qc_status == "passed",
+                    Batch.is_active == True,
+                )
+            )
+        if batch_pairs:
+            conditions.append(
+                tuple_(BatchStock.batch_id, BatchStock.warehouse_id).in_(sorted(batch_pairs))
+            )
+
+        balances: Dict[Tuple[int, int], float] = {}  # (batch_id, warehouse_id) -> tồn
+        fefo: Dict[Tuple[int, int], list] = {key: [] for key in fefo_keys}
+        batch_rows = dict(batches)
+        locked = (
+            db.query(
+                BatchStock.batch_id,
+                BatchStock.warehouse_id,
+                BatchStock.product_id,
+                BatchStock.quantity,
+                Batch.id,
+                Batch.qc_status,
+                Batch.is_active,
+                Batch.expiry_date,
+            )
+            .join(Batch, Batch.id == BatchStock.batch_id)
+            .filter(or_(*conditions))
+            .order_by(
+                BatchStock.warehouse_id,
+                BatchStock.product_id,
+                Batch.expiry_date.asc().nulls_last(),
+                Batch.id.asc(),
+            )
+            .with_for_update(of=BatchStock)
+            .all()
+        )
+        for row in locked:
+            batch_rows.setdefault(row.id, row)
+            balances[(row.batch_id, row.warehouse_id)] = row.quantity
+            key = (row.warehouse_id, row.product_id)
+            if (
+                key in fefo
+                and counts_as_available(row.qc_status, row.is_active)
+                and row.quantity > 0
+            ):
+                fefo[key].append(row)
+
+        # 3. Chia hàng theo batch, theo thứ tự dòng
+        picks: Dict[int, List[Tuple[int, float]]] = {}
+        for line, t in valid:
+            source = (t.from_warehouse_id, t.product_id)
+            if t.batch_id:
+                available = balances.get((t.batch_id, t.from_warehouse_id), 0)
+                if available < t.quantity:
+                    results[line] = error(
+                        line,
+                        f"Không đủ tồn kho của batch ở kho nguồn. Hiện tại: {available}, "
+                        f"Cần chuyển: {t.quantity}",
+                    )
+                    continue
+                line_picks = [(t.batch_id, t.quantity)]
+            else:
+                line_picks = []
+                remaining = t.quantity
+                for batch in fefo[source]:
+                    available = balances[(batch.id, t.from_warehouse_id)]
+                    if available <= 0:
+                        continue
+                    take = min(available, remaining)
+                    line_picks.append((batch.id, take))
+                    remaining -= take
+                    if remaining <= 0:
+                        break
+                if remaining > 0:
+                    results[line] = error(
+                        line,
+                        "Không đủ tồn kho trong các batch khả dụng (QC passed) của kho nguồn. "
+                        f"Cần chuyển: {t.quantity}",
+                    )
+                    continue
+
+            target = (t.to_warehouse_id, t.product_id)
+            for batch_id, take in line_picks:
+                balances[(batch_id, t.from_warehouse_id)] -= take
+                pair = (batch_id, t.to_warehouse_id)
+                balances[pair] = balances.get(pair, 0) + take
+                batch = batch_rows[batch_id]
+                # Hàng vừa chuyển vào kho đích dùng được cho dòng FEFO phía sau
+                if (
+                    target in fefo
+                    and counts_as_available(batch.qc_status, batch.is_active)
+                    and all(row.id != batch_id for row in fefo[target])
+                ):
+                    fefo[target].append(batch)
+                    fefo[target].sort(key=_fefo_order)
+            picks[line] = line_picks
+
+        # 4. Lock stocks của 2 kho (tạo dòng còn thiếu trước)
+        stock_keys = sorted(
+            {
+                key
+                for line, t in valid
+                if line in picks
+                for key in (
+                    (t.from_warehouse_id, t.product_id),
+                    (t.to_warehouse_id, t.product_id),
+                )
+            }
+        )
+        if not stock_keys:
+            return results
+        db.execute(
+            pg_insert(Stock)
+            .values([{"warehouse_id": w, "product_id": p, "quantity": 0} for w, p in stock_keys])
+            .on_conflict_do_nothing(index_elements=[Stock.warehouse_id, Stock.product_id])
+        )
+        on_hand = {
+            (row.warehouse_id, row.product_id): row.quantity or 0
+            for row in db.query(Stock.warehouse_id, Stock.product_id, Stock.quantity)
+            .filter(tuple_(Stock.warehouse_id, Stock.product_id).in_(stock_keys))
+            .order_by(Stock.warehouse_id, Stock.product_id)
+            .with_for_update()
+        }
+
+        for line, t in valid:
+            if line not in picks:
+                continue
+            source = (t.from_warehouse_id, t.product_id)
+            if on_hand[source] < t.quantity:
+                results[line] = error(
+                    line,
+                    f"Không đủ tồn kho ở kho nguồn. Hiện tại: {on_hand[source]}, "
+                    f"Cần chuyển: {t.quantity}",
+                )
+                del picks[line]
+                continue
+            on_hand[source] -= t.quantity
+            on_hand[(t.to_warehouse_id, t.product_id)] += t.quantity
+
+        # 5. Ghi
+        applied = [(line, t) for line, t in valid if line in picks]
+        if not applied:
+            return results
+
+        now = datetime.utcnow()
+        numbers = iter(
+            StockMovementService.generate_movement_numbers(
+                db, "transfer", sum(len(picks[line]) for line, _ in applied)
+            )
+        )
+        movement_rows = []
+        stock_deltas: Dict[Tuple[int, int], float] = {}
+        batch_stock_deltas: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        for line, t in applied:
+            for warehouse_id, sign in ((t.from_warehouse_id, -1), (t.to_warehouse_id, 1)):
+                key = (warehouse_id, t.product_id)
+                stock_deltas[key] = stock_deltas.get(key, 0) + sign * t.quantity
+            for batch_id, quantity in picks[line]:
+                movement_rows.append(
+                    {
+                        "movement_number": next(numbers),
+                        "movement_type": MovementType.TRANSFER,
+                        "product_id": t.product_id,
+                        "batch_id": batch_id,
+                        "warehouse_id": t.from_warehouse_id,
+                        "to_warehouse_id": t.to_warehouse_id,
+                        "quantity": quantity,
+                        "reference_type": t.reference_type,
+                        "reference_id": t.reference_id,
+                        "note": t.note,
+                        "created_by": created_by,
+                        "created_at": now,
+                    }
+                )
+                for warehouse_id, sign in ((t.from_warehouse_id, -1), (t.to_warehouse_id, 1)):
+                    pair = (batch_id, warehouse_id)
+                    _, delta = batch_stock_deltas.get(pair, (t.product_id, 0))
+                    batch_stock_deltas[pair] = (t.product_id, delta + sign * quantity)
+
+        movement_ids = db.scalars(
+            insert(StockMovement).returning(StockMovement.id, sort_by_parameter_order=True),
+            movement_rows,
+        ).all()
+
+        stmt = pg_insert(BatchStock)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[BatchStock.batch_id, BatchStock.warehouse_id],
+                set_={
+                    "quantity": BatchStock.quantity + stmt.excluded.quantity,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            ),
+            [
+                {
+                    "batch_id": batch_id,
+                    "warehouse_id": warehouse_id,
+                    "product_id": product_id,
+                    "quantity": delta,
+                    "updated_at": now,
+                }
+                for (batch_id, warehouse_id), (product_id, delta) in sorted(
+                    batch_stock_deltas.items()
+                )
+            ],
+        )
+
+        stmt = pg_insert(Stock)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Stock.warehouse_id, Stock.product_id],
+                set_={
+                    "quantity": Stock.quantity + stmt.excluded.quantity,
+                    "version": Stock.version + 1,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            ),
+            [
+                {"warehouse_id": w, "product_id": p, "quantity": delta, "updated_at": now}
+                for (w, p), delta in sorted(stock_deltas.items())
+            ],
+        )
+        # Tổng tồn / available không đổi, chỉ cập nhật last_movement_at
+        StockSummaryService.apply_deltas(
+            db, {t.product_id: (0.0, 0.0) for _, t in applied}, now
+        )
+        ValuationService.apply_movements(db, movement_ids)
+
+        position = 0
+        for line, t in applied:
+            count = len(picks[line])
+            results[line] = {
+                "line": line,
+                "success": True,
+                "movement_ids": list(movement_ids[position : position + count]),
+                "movement_numbers": [
+                    row["movement_number"] for row in movement_rows[position : position + count]
+                ],
+            }
+            position += count
+
+        return results
+
+    # ============= ASYNC VARIANTS =============
+
+    @staticmethod
+    async def transfer_async(
+        db: AsyncSession, transfer: StockTransferCreate, created_by: int
+    ) -> List[StockMovement]:
+        """Chuyển kho (async)"""
+        return await db.run_sync(StockTransferService.transfer, transfer, created_by)
+
+    @staticmethod
+    async def apply_bulk_async(
+        db: AsyncSession, lines: List[Tuple[int, StockTransferCreate]], created_by: int
+    ) -> Dict[int, dict]:
+        """Bulk chuyển kho (async)"""
+        return await db.run_sync(StockTransferService.apply_bulk, lines, created_by)
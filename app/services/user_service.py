@@ -3,7 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.password_pool import password_pool
+from app.core.principal import principal_cache
+from app.db.unit_of_work import after_commit
 
 
 class UserService:
@@ -94,7 +96,7 @@ class UserService:
         Returns:
             User object vừa tạo
         """
-        hashed_password = get_password_hash(user.password)
+        hashed_password = password_pool.hash(user.password)
 
         db_user = User(
             username=user.username,
@@ -106,11 +108,58 @@ class UserService:
         )
 
         db.add(db_user)
-        db.commit()
+        db.flush()
         db.refresh(db_user)
 
         return db_user
 
+    @staticmethod
+    def create_users(db: Session, users: List[UserCreate]) -> List[User]:
+        """
+        Tạo nhiều user trong 1 transaction, hash password song song trên password pool
+
+        Args:
+            db: Database session
+            users: Danh sách UserCreate (username / email đã kiểm tra trùng)
+
+        Returns:
+            Danh sách User vừa tạo (cùng thứ tự input)
+        """
+        hashed_passwords = password_pool.hash_many([user.password for user in users])
+
+        db_users = [
+            User(
+                username=user.username,
+                email=user.email,
+                full_name=user.full_name,
+                hashed_password=hashed_password,
+                is_active=True,
+                is_superuser=False,
+            )
+            for user, hashed_password in zip(users, hashed_passwords)
+        ]
+
+        db.add_all(db_users)
+        db.flush()
+        user_ids = [db_user.id for db_user in db_users]
+
+        # Load cột server default (created_at...) 1 query thay vì refresh từng user
+        db.query(User).filter(User.id.in_(user_ids)).all()
+
+        return db_users
+
+    @staticmethod
+    def get_existing_identities(
+        db: Session, usernames: List[str], emails: List[str]
+    ) -> tuple[set, set]:
+        """Username / email đã tồn tại trong DB (kiểm tra trùng cho bulk create)"""
+        rows = (
+            db.query(User.username, User.email)
+            .filter(or_(User.username.in_(usernames), User.email.in_(emails)))
+            .all()
+        )
+        return {r.username for r in rows}, {r.email for r in rows}
+
     @staticmethod
     def update_user(
         db: Session, user_id: int, user_update: UserUpdate
@@ -137,7 +186,8 @@ class UserService:
         for field, value in update_data.items():
             setattr(db_user, field, value)
 
-        db.commit()
+        db.flush()
+        after_commit(db, lambda: principal_cache.invalidate_user(user_id))
         db.refresh(db_user)
 
         return db_user
@@ -161,7 +211,8 @@ class UserService:
 
         # Soft delete: Chỉ set is_active = False
         db_user.is_active = False
-        db.commit()
+        db.flush()
+        after_commit(db, lambda: principal_cache.invalidate_user(user_id))
 
         return True
 
@@ -183,7 +234,8 @@ class UserService:
             return False
 
         db.delete(db_user)
-        db.commit()
+        db.flush()
+        after_commit(db, lambda: principal_cache.invalidate_user(user_id))
 
         return True
 
@@ -206,7 +258,8 @@ class UserService:
             return None
 
         db_user.is_active = is_active
-        db.commit()
+        db.flush()
+        after_commit(db, lambda: principal_cache.invalidate_user(user_id))
         db.refresh(db_user)
 
         return db_user
@@ -230,7 +283,8 @@ class UserService:
             return None
 
         db_user.is_superuser = is_superuser
-        db.commit()
+        db.flush()
+        after_commit(db, lambda: principal_cache.invalidate_user(user_id))
         db.refresh(db_user)
 
         return db_user
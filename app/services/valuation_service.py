@@ -0,0 +1,777 @@
+"""
+Valuation Service - giá trị tồn kho theo FIFO và bình quân gia quyền
+
+Trạng thái lưu sẵn, cập nhật cùng transaction với phiếu kho (apply_movements):
+
+- inventory_valuations: 1 dòng / (kho, sản phẩm) - số lượng, giá trị FIFO,
+  giá trị và đơn giá bình quân gia quyền (bình quân di động)
+- cost_layers: lớp giá FIFO, mỗi lần hàng vào kho 1 lớp
+
+Mỗi movement chỉ đụng dòng valuation của (kho, sản phẩm) và các lớp đầu hàng
+đợi FIFO (đọc từng trang qua partial index lớp còn hàng). Mỗi lớp được tạo 1
+lần và trừ hết 1 lần nên chi phí mỗi movement là O(1) khấu hao.
+
+Quy tắc theo loại movement:
+
+- IMPORT: vào kho theo unit_cost (None = products.cost_price)
+- ADJUST: quantity > 0 vào kho theo unit_cost (None = giá bình quân hiện tại,
+  chưa có thì cost_price); quantity < 0 ra kho như EXPORT
+- EXPORT: ra kho - FIFO trừ lớp cũ nhất, bình quân trừ theo giá bình quân
+- TRANSFER: ra kho nguồn, vào kho đích mang theo giá vốn đã trừ ở kho nguồn
+  (FIFO giữ đơn giá từng lớp, bình quân theo giá bình quân kho nguồn)
+- CHECK: không đổi giá trị
+
+Đơn giá đã chọn cho hàng vào (IMPORT / ADJUST +) được ghi lại vào
+stock_movements.unit_cost để rebuild ra đúng kết quả cũ.
+
+Dòng valuation lock sau cùng (sau product_stock_summaries), theo
+(warehouse_id, product_id). Writer đã lock stocks cùng khóa trước đó nên
+không thêm tranh chấp.
+
+rebuild() tính lại toàn bộ từ stock_movements theo từng chunk sản phẩm. Sản
+phẩm không có TRANSFER tính vector hóa bằng NumPy; sản phẩm có TRANSFER (giá
+vốn kho đích phụ thuộc thứ tự ra kho nguồn) chạy lại tuần tự như
+apply_movements. numpy chỉ import khi rebuild: mọi writer import module này.
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Float, Integer, column, delete, func, insert, select, tuple_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.inventory import (
+    CostLayer,
+    InventoryValuation,
+    MovementType,
+    StockMovement,
+    Warehouse,
+)
+from app.models.product import Product, ProductCategory
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Số lượng nhỏ hơn ngưỡng coi như 0 (sai số float khi cộng dồn)
+_ZERO = 1e-9
+
+# Số lớp FIFO đọc mỗi lần khi ra kho
+LAYER_PAGE_SIZE = 16
+
+
+class _Movement(NamedTuple):
+    id: int
+    movement_type: MovementType
+    product_id: int
+    warehouse_id: int
+    to_warehouse_id: Optional[int]
+    quantity: float
+    unit_cost: Optional[float]
+    created_at: Optional[datetime]
+
+
+_MOVEMENT_COLUMNS = (
+    StockMovement.id,
+    StockMovement.movement_type,
+    StockMovement.product_id,
+    StockMovement.warehouse_id,
+    StockMovement.to_warehouse_id,
+    StockMovement.quantity,
+    StockMovement.unit_cost,
+    StockMovement.created_at,
+)
+
+
+class _Layer:
+    """1 lớp FIFO trong bộ nhớ (id None = lớp mới, chưa insert)"""
+
+    __slots__ = ("id", "movement_id", "unit_cost", "quantity", "remaining", "created_at")
+
+    def __init__(self, id, movement_id, unit_cost, quantity, remaining, created_at=None):
+        self.id = id
+        self.movement_id = movement_id
+        self.unit_cost = unit_cost
+        self.quantity = quantity
+        self.remaining = remaining
+        self.created_at = created_at
+
+
+# (warehouse_id, product_id, sau layer id, limit) -> các lớp còn hàng tiếp theo
+LayerLoader = Callable[[int, int, int, int], List[_Layer]]
+
+
+class _Position:
+    """Trạng thái giá vốn của 1 (kho, sản phẩm) trong lúc áp movement"""
+
+    def __init__(
+        self,
+        warehouse_id: int,
+        product_id: int,
+        id: Optional[int] = None,
+        quantity: float = 0.0,
+        fifo_value: float = 0.0,
+        average_value: float = 0.0,
+        average_cost: float = 0.0,
+        loader: Optional[LayerLoader] = None,
+    ):
+        self.id = id
+        self.warehouse_id = warehouse_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.fifo_value = fifo_value
+        self.average_value = average_value
+        self.average_cost = average_cost
+        self.last_movement_id: Optional[int] = None
+
+        self._loader = loader  # None = đã đọc hết lớp cũ trong DB
+        self._after_id = 0
+        self._loaded: deque = deque()  # Lớp cũ đã đọc, còn hàng
+        self.changed: Dict[int, _Layer] = {}  # Lớp cũ bị trừ (cần UPDATE)
+        self.new_layers: List[_Layer] = []
+        self._new_head = 0  # Lớp mới đầu tiên còn hàng
+
+    def _front(self) -> Optional[_Layer]:
+        """Lớp cũ nhất còn hàng: lớp trong DB trước, rồi lớp mới tạo"""
+        if not self._loaded and self._loader is not None:
+            page = self._loader(self.warehouse_id, self.product_id, self._after_id, LAYER_PAGE_SIZE)
+            self._loaded.extend(page)
+            if page:
+                self._after_id = page[-1].id
+            if len(page) < LAYER_PAGE_SIZE:
+                self._loader = None
+        if self._loaded:
+            return self._loaded[0]
+        if self._new_head < len(self.new_layers):
+            return self.new_layers[self._new_head]
+        return None
+
+    def receive(
+        self,
+        movement_id: int,
+        pieces: List[Tuple[float, float]],
+        average_value: float,
+        at: Optional[datetime],
+    ) -> None:
+        """Hàng vào: pieces [(unit_cost, quantity)] thành lớp FIFO, average_value cộng vào bình quân"""
+        for unit_cost, quantity in pieces:
+            self.new_layers.append(_Layer(None, movement_id, unit_cost, quantity, quantity, at))
+            self.fifo_value += unit_cost * quantity
+            self.quantity += quantity
+        self.average_value += average_value
+        if self.quantity > _ZERO:
+            self.average_cost = self.average_value / self.quantity
+
+    def issue(self, quantity: float) -> Tuple[List[Tuple[float, float]], float]:
+        """
+        Hàng ra: FIFO trừ từ lớp cũ nhất, bình quân trừ theo giá bình quân
+
+        Returns:
+            ([(unit_cost, quantity)] đã trừ theo FIFO, giá bình quân lúc ra)
+        """
+        pieces = []
+        remaining = quantity
+        while remaining > _ZERO:
+            layer = self._front()
+            if layer is None:
+                # Lớp FIFO không đủ (tồn có trước khi tính giá): phần thiếu theo giá bình quân
+                pieces.append((self.average_cost, remaining))
+                break
+            take = min(layer.remaining, remaining)
+            layer.remaining -= take
+            remaining -= take
+            pieces.append((layer.unit_cost, take))
+            if layer.remaining <= _ZERO:
+                layer.remaining = 0.0
+                if self._loaded and self._loaded[0] is layer:
+                    self._loaded.popleft()
+                else:
+                    self._new_head += 1
+            if layer.id is not None:
+                self.changed[layer.id] = layer
+
+        average_cost = self.average_cost
+        self.fifo_value -= sum(unit_cost * taken for unit_cost, taken in pieces)
+        self.quantity -= quantity
+        if self.quantity > _ZERO:
+            self.average_value -= quantity * average_cost
+        else:
+            self.average_value = 0.0
+        return pieces, average_cost
+
+
+def _apply(
+    positions: Dict[Tuple[int, int], _Position], movement: _Movement, cost_price: float
+) -> Optional[float]:
+    """Áp 1 movement, trả về đơn giá đã chọn nếu là hàng vào (IMPORT / ADJUST +)"""
+    source = positions[(movement.warehouse_id, movement.product_id)]
+    movement_type = movement.movement_type
+    if movement_type == MovementType.CHECK:
+        return None
+    source.last_movement_id = movement.id
+
+    if movement_type == MovementType.IMPORT or (
+        movement_type == MovementType.ADJUST and movement.quantity > 0
+    ):
+        unit_cost = movement.unit_cost
+        if unit_cost is None:
+            if movement_type == MovementType.ADJUST and source.average_cost > 0:
+                unit_cost = source.average_cost
+            else:
+                unit_cost = cost_price
+        source.receive(
+            movement.id,
+            [(unit_cost, movement.quantity)],
+            unit_cost * movement.quantity,
+            movement.created_at,
+        )
+        return unit_cost
+
+    quantity = abs(movement.quantity)
+    pieces, average_cost = source.issue(quantity)
+    if movement_type == MovementType.TRANSFER:
+        target = positions[(movement.to_warehouse_id, movement.product_id)]
+        target.last_movement_id = movement.id
+        target.receive(movement.id, pieces, average_cost * quantity, movement.created_at)
+    return None
+
+
+def _segment_cumsum(x: "np.ndarray", segment: "np.ndarray", starts: "np.ndarray") -> "np.ndarray":
+    """Cộng dồn x, bắt đầu lại ở đầu mỗi đoạn (segment đã sắp, starts = vị trí đầu đoạn)"""
+    import numpy as np
+
+    total = np.cumsum(x)
+    return total - (total[starts] - x[starts])[segment]
+
+
+def _value_vectorized(
+    product: "np.ndarray", warehouse: "np.ndarray", signed: "np.ndarray", unit_cost: "np.ndarray"
+) -> dict:
+    """
+    FIFO + bình quân di động cho các movement chỉ có vào / ra trong 1 kho (NumPy)
+
+    Input sắp theo thời gian trong mỗi sản phẩm; signed = + vào / - ra, unit_cost
+    của dòng vào. Trong mỗi (kho, sản phẩm):
+
+    - FIFO: lớp thứ i còn clip(tổng vào đến i - tổng ra, 0, số vào), đúng khi tồn
+      không âm ở mọi thời điểm
+    - Bình quân: mỗi lần ra giữ lại tỷ lệ Q_sau / Q_trước của giá trị, nên giá trị
+      = sum(vào_i * giá_i * tích tỷ lệ sau i); tích tính bằng cumsum(log), đoạn
+      bắt đầu lại sau mỗi lần tồn về 0
+
+    Returns:
+        dict mảng theo (kho, sản phẩm) + mảng theo dòng cho lớp FIFO còn hàng;
+        "ok" = False với (kho, sản phẩm) có lúc tồn âm (cần tính tuần tự)
+    """
+    import numpy as np
+
+    n = len(product)
+    order = np.lexsort((np.arange(n), warehouse, product))
+    product, warehouse, signed, unit_cost = (
+        product[order], warehouse[order], signed[order], unit_cost[order]
+    )
+
+    new_segment = np.ones(n, dtype=bool)
+    new_segment[1:] = (product[1:] != product[:-1]) | (warehouse[1:] != warehouse[:-1])
+    segment = np.cumsum(new_segment) - 1
+    starts = np.flatnonzero(new_segment)
+    ends = np.append(starts[1:], n) - 1
+
+    inflow = np.where(signed > 0, signed, 0.0)
+    outflow = np.where(signed < 0, -signed, 0.0)
+    cost = np.where(signed > 0, unit_cost, 0.0)
+
+    quantity = _segment_cumsum(signed, segment, starts)  # Tồn sau mỗi dòng
+    ok = np.minimum.reduceat(quantity, starts) >= -_ZERO
+
+    # FIFO
+    received = _segment_cumsum(inflow, segment, starts)
+    issued = np.add.reduceat(outflow, starts)
+    remaining = np.clip(received - issued[segment], 0.0, inflow)
+    remaining[remaining <= _ZERO] = 0.0
+    fifo_value = np.bincount(segment, weights=remaining * cost, minlength=len(starts))
+
+    # Bình quân di động
+    depleted = quantity <= _ZERO
+    new_epoch = new_segment.copy()
+    new_epoch[1:] |= depleted[:-1]
+    epoch = np.cumsum(new_epoch) - 1
+    epoch_starts = np.flatnonzero(new_epoch)
+    epoch_ends = np.append(epoch_starts[1:], n) - 1
+
+    log_ratio = np.zeros(n)
+    shrink = (outflow > 0) & ~depleted
+    log_ratio[shrink] = np.log(quantity[shrink] / (quantity[shrink] + outflow[shrink]))
+    decay = _segment_cumsum(log_ratio, epoch, epoch_starts)
+    # Phần giá trị của mỗi lần vào còn lại đến cuối đoạn (hệ số <= 1, không tràn số)
+    surviving = inflow * cost * np.exp(decay[epoch_ends][epoch] - decay)
+    value = _segment_cumsum(surviving, epoch, epoch_starts)[ends]
+
+    # Dòng cuối làm tồn về 0: giá trị = 0, giá bình quân = giá ngay trước lần ra đó
+    end_depleted = depleted[ends]
+    reference = np.where(end_depleted, quantity[ends] + outflow[ends], quantity[ends])
+    average_cost = value / np.maximum(reference, _ZERO)
+
+    return {
+        "order": order,
+        "product_id": product[starts],
+        "warehouse_id": warehouse[starts],
+        "last_row": order[ends],
+        "quantity": quantity[ends],
+        "fifo_value": fifo_value,
+        "average_value": np.where(end_depleted, 0.0, value),
+        "average_cost": average_cost,
+        "ok": ok,
+        "segment": segment,
+        "remaining": remaining,
+    }
+
+
+def _columns(rows: Sequence[tuple]) -> List[tuple]:
+    """Rows -> từng cột (zip(*rows) duyệt Row như tuple)"""
+    return list(zip(*rows))
+
+
+class ValuationService:
+
+    # ============= CẬP NHẬT TĂNG DẦN =============
+
+    @staticmethod
+    def _layer_loader(db: Session) -> LayerLoader:
+        def load(warehouse_id: int, product_id: int, after_id: int, limit: int) -> List[_Layer]:
+            rows = (
+                db.query(
+                    CostLayer.id,
+                    CostLayer.movement_id,
+                    CostLayer.unit_cost,
+                    CostLayer.quantity,
+                    CostLayer.remaining_quantity,
+                )
+                .filter(
+                    CostLayer.warehouse_id == warehouse_id,
+                    CostLayer.product_id == product_id,
+                    CostLayer.remaining_quantity > 0,
+                    CostLayer.id > after_id,
+                )
+                .order_by(CostLayer.id)
+                .limit(limit)
+                .all()
+            )
+            return [_Layer(*row) for row in rows]
+
+        return load
+
+    @staticmethod
+    def apply_movements(db: Session, movement_ids: Sequence[int]) -> None:
+        """
+        Cập nhật giá trị tồn theo các movement vừa ghi (cùng transaction, theo thứ tự id)
+
+        Gọi sau khi insert stock_movements và cập nhật stocks / summary.
+        """
+        if not movement_ids:
+            return
+        movements = [
+            _Movement(*row)
+            for row in db.query(*_MOVEMENT_COLUMNS)
+            .filter(
+                StockMovement.id.in_(movement_ids),
+                StockMovement.movement_type != MovementType.CHECK,
+            )
+            .order_by(StockMovement.id)
+        ]
+        if not movements:
+            return
+
+        keys = {(m.warehouse_id, m.product_id) for m in movements}
+        keys |= {(m.to_warehouse_id, m.product_id) for m in movements if m.to_warehouse_id}
+        keys = sorted(keys)
+
+        # Tạo dòng còn thiếu rồi lock theo (warehouse_id, product_id)
+        db.execute(
+            pg_insert(InventoryValuation)
+            .values(
+                [
+                    {
+                        "warehouse_id": warehouse_id,
+                        "product_id": product_id,
+                        "quantity": 0.0,
+                        "fifo_value": 0.0,
+                        "average_value": 0.0,
+                        "average_cost": 0.0,
+                    }
+                    for warehouse_id, product_id in keys
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=[InventoryValuation.warehouse_id, InventoryValuation.product_id]
+            )
+        )
+        loader = ValuationService._layer_loader(db)
+        positions = {
+            (row.warehouse_id, row.product_id): _Position(
+                row.warehouse_id,
+                row.product_id,
+                id=row.id,
+                quantity=row.quantity,
+                fifo_value=row.fifo_value,
+                average_value=row.average_value,
+                average_cost=row.average_cost,
+                loader=loader,
+            )
+            for row in db.query(
+                InventoryValuation.id,
+                InventoryValuation.warehouse_id,
+                InventoryValuation.product_id,
+                InventoryValuation.quantity,
+                InventoryValuation.fifo_value,
+                InventoryValuation.average_value,
+                InventoryValuation.average_cost,
+            )
+            .filter(
+                tuple_(InventoryValuation.warehouse_id, InventoryValuation.product_id).in_(keys)
+            )
+            .order_by(InventoryValuation.warehouse_id, InventoryValuation.product_id)
+            .with_for_update()
+        }
+        cost_prices = {
+            id: cost or 0.0
+            for id, cost in db.query(Product.id, Product.cost_price).filter(
+                Product.id.in_({m.product_id for m in movements})
+            )
+        }
+
+        resolved = []
+        for movement in movements:
+            unit_cost = _apply(positions, movement, cost_prices.get(movement.product_id, 0.0))
+            if unit_cost is not None and movement.unit_cost is None:
+                resolved.append((movement.id, unit_cost))
+
+        now = datetime.utcnow()
+        new_layers = [
+            ValuationService._layer_row(position, layer, now)
+            for position in positions.values()
+            for layer in position.new_layers
+        ]
+        if new_layers:
+            db.execute(insert(CostLayer), new_layers)
+
+        changed = sorted(
+            (id, layer.remaining)
+            for position in positions.values()
+            for id, layer in position.changed.items()
+        )
+        if changed:
+            layer_values = values(
+                column("id", Integer), column("remaining", Float), name="layers"
+            ).data(changed)
+            db.execute(
+                CostLayer.__table__.update()
+                .where(CostLayer.id == layer_values.c.id)
+                .values(remaining_quantity=layer_values.c.remaining)
+            )
+
+        valuation_values = values(
+            column("id", Integer),
+            column("quantity", Float),
+            column("fifo_value", Float),
+            column("average_value", Float),
+            column("average_cost", Float),
+            column("last_movement_id", Integer),
+            name="valuations",
+        ).data(
+            [
+                (
+                    position.id,
+                    position.quantity,
+                    position.fifo_value,
+                    position.average_value,
+                    position.average_cost,
+                    position.last_movement_id,
+                )
+                for position in sorted(positions.values(), key=lambda p: p.id)
+            ]
+        )
+        db.execute(
+            InventoryValuation.__table__.update()
+            .where(InventoryValuation.id == valuation_values.c.id)
+            .values(
+                quantity=valuation_values.c.quantity,
+                fifo_value=valuation_values.c.fifo_value,
+                average_value=valuation_values.c.average_value,
+                average_cost=valuation_values.c.average_cost,
+                last_movement_id=valuation_values.c.last_movement_id,
+                updated_at=now,
+            )
+        )
+
+        if resolved:
+            ValuationService._save_unit_costs(db, resolved)
+
+    @staticmethod
+    def _layer_row(position: _Position, layer: _Layer, now: datetime) -> dict:
+        return {
+            "warehouse_id": position.warehouse_id,
+            "product_id": position.product_id,
+            "movement_id": layer.movement_id,
+            "unit_cost": layer.unit_cost,
+            "quantity": layer.quantity,
+            "remaining_quantity": layer.remaining,
+            "created_at": layer.created_at or now,
+        }
+
+    @staticmethod
+    def _save_unit_costs(db: Session, unit_costs: List[Tuple[int, float]]) -> None:
+        """Ghi lại đơn giá đã chọn cho movement hàng vào chưa có unit_cost"""
+        cost_values = values(
+            column("id", Integer), column("unit_cost", Float), name="costs"
+        ).data(sorted(unit_costs))
+        db.execute(
+            StockMovement.__table__.update()
+            .where(StockMovement.id == cost_values.c.id)
+            .values(unit_cost=cost_values.c.unit_cost)
+        )
+
+    # ============= REBUILD =============
+
+    @staticmethod
+    def rebuild(db: Session, chunk_size: Optional[int] = None) -> int:
+        """
+        Tính lại toàn bộ inventory_valuations / cost_layers từ stock_movements
+
+        Đọc movement theo (product_id, created_at, id) từng chunk, mỗi chunk gồm
+        trọn các sản phẩm. Chỉ giữ lớp FIFO còn hàng.
+
+        Returns:
+            Số dòng (kho, sản phẩm) đã tính
+        """
+        chunk_size = chunk_size or settings.VALUATION_REBUILD_CHUNK
+        db.execute(delete(CostLayer))
+        db.execute(delete(InventoryValuation))
+        cost_prices = {
+            id: cost or 0.0 for id, cost in db.query(Product.id, Product.cost_price)
+        }
+
+        result = db.execute(
+            select(*_MOVEMENT_COLUMNS)
+            .where(StockMovement.movement_type != MovementType.CHECK)
+            .order_by(StockMovement.product_id, StockMovement.created_at, StockMovement.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        total = 0
+        pending: List[tuple] = []
+        for partition in result.partitions():
+            rows = pending + list(partition)
+            # Sản phẩm cuối chunk có thể còn movement ở chunk sau
+            last_product = rows[-1].product_id
+            cut = len(rows)
+            while cut > 0 and rows[cut - 1].product_id == last_product:
+                cut -= 1
+            pending = rows[cut:]
+            if cut:
+                total += ValuationService._rebuild_chunk(db, rows[:cut], cost_prices)
+        if pending:
+            total += ValuationService._rebuild_chunk(db, pending, cost_prices)
+        return total
+
+    @staticmethod
+    def _rebuild_chunk(db: Session, rows: List[tuple], cost_prices: Dict[int, float]) -> int:
+        """Tính các sản phẩm trong chunk (trọn sản phẩm, sắp theo thời gian), insert kết quả"""
+        import numpy as np
+
+        ids, types, products, warehouses, _, quantities, unit_costs, created_at = _columns(rows)
+        ids = np.fromiter(ids, dtype=np.int64, count=len(rows))
+        product = np.fromiter(products, dtype=np.int64, count=len(rows))
+        warehouse = np.fromiter(warehouses, dtype=np.int64, count=len(rows))
+        quantity = np.fromiter(quantities, dtype=np.float64, count=len(rows))
+        unit_cost = np.array(unit_costs, dtype=np.float64)  # None -> nan
+        movement_type = np.array([t.value for t in types])
+
+        is_transfer = movement_type == MovementType.TRANSFER.value
+        is_import = movement_type == MovementType.IMPORT.value
+        signed = np.where(
+            (movement_type == MovementType.EXPORT.value) | is_transfer, -quantity, quantity
+        )
+        # IMPORT chưa có đơn giá: cost_price; ADJUST + chưa có đơn giá cần giá bình quân lúc đó
+        missing = np.isnan(unit_cost)
+        unit_cost[missing & is_import] = [
+            cost_prices.get(int(p), 0.0) for p in product[missing & is_import]
+        ]
+        sequential: Set[int] = set(product[is_transfer].tolist())
+        sequential |= set(product[missing & (signed > 0) & ~is_import].tolist())
+
+        valuations: List[dict] = []
+        layers: List[dict] = []
+        resolved: List[Tuple[int, float]] = [
+            (int(id), float(cost))
+            for id, cost in zip(ids[missing & is_import], unit_cost[missing & is_import])
+        ]
+        now = datetime.utcnow()
+
+        fast = ~np.isin(product, list(sequential))
+        if fast.any():
+            rows_index = np.flatnonzero(fast)
+            result = _value_vectorized(
+                product[fast], warehouse[fast], signed[fast], unit_cost[fast]
+            )
+            ok = result["ok"]
+            sequential |= set(result["product_id"][~ok].tolist())
+            done = ok & ~np.isin(result["product_id"], list(sequential))
+            for i in np.flatnonzero(done):
+                valuations.append(
+                    {
+                        "warehouse_id": int(result["warehouse_id"][i]),
+                        "product_id": int(result["product_id"][i]),
+                        "quantity": float(result["quantity"][i]),
+                        "fifo_value": float(result["fifo_value"][i]),
+                        "average_value": float(result["average_value"][i]),
+                        "average_cost": float(result["average_cost"][i]),
+                        "last_movement_id": int(ids[rows_index[result["last_row"][i]]]),
+                        "updated_at": now,
+                    }
+                )
+            open_rows = np.flatnonzero(
+                (result["remaining"] > 0) & done[result["segment"]]
+            )
+            for position in open_rows:
+                row = rows_index[result["order"][position]]
+                layers.append(
+                    {
+                        "warehouse_id": int(warehouse[row]),
+                        "product_id": int(product[row]),
+                        "movement_id": int(ids[row]),
+                        "unit_cost": float(unit_cost[row]),
+                        "quantity": float(signed[row]),
+                        "remaining_quantity": float(result["remaining"][position]),
+                        "created_at": created_at[row] or now,
+                    }
+                )
+
+        # Sản phẩm có TRANSFER / ADJUST chưa có đơn giá / tồn âm: chạy tuần tự
+        positions: Dict[Tuple[int, int], _Position] = {}
+        for row in rows:
+            if row.product_id not in sequential:
+                continue
+            movement = _Movement(*row)
+            for key in (
+                (movement.warehouse_id, movement.product_id),
+                (movement.to_warehouse_id, movement.product_id),
+            ):
+                if key[0] and key not in positions:
+                    positions[key] = _Position(*key)
+            unit_cost_used = _apply(
+                positions, movement, cost_prices.get(movement.product_id, 0.0)
+            )
+            if unit_cost_used is not None and movement.unit_cost is None:
+                resolved.append((movement.id, unit_cost_used))
+        for position in positions.values():
+            valuations.append(
+                {
+                    "warehouse_id": position.warehouse_id,
+                    "product_id": position.product_id,
+                    "quantity": position.quantity,
+                    "fifo_value": position.fifo_value,
+                    "average_value": position.average_value,
+                    "average_cost": position.average_cost,
+                    "last_movement_id": position.last_movement_id,
+                    "updated_at": now,
+                }
+            )
+            layers.extend(
+                ValuationService._layer_row(position, layer, now)
+                for layer in position.new_layers
+                if layer.remaining > 0
+            )
+
+        if valuations:
+            db.execute(insert(InventoryValuation), valuations)
+        if layers:
+            db.execute(insert(CostLayer), layers)
+        if resolved:
+            ValuationService._save_unit_costs(db, resolved)
+        return len(valuations)
+
+    # ============= BÁO CÁO =============
+
+    @staticmethod
+    def get_report(
+        db: Session,
+        method: str = "fifo",
+        group_by: str = "warehouse",
+        warehouse_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+    ) -> dict:
+        """
+        Giá trị tồn kho theo kho / danh mục (GROUP BY trên inventory_valuations)
+
+        Returns:
+            InventoryValuationReport
+        """
+        value = (
+            InventoryValuation.fifo_value if method == "fifo" else InventoryValuation.average_value
+        )
+        group_columns = []
+        if group_by in ("warehouse", "warehouse_category"):
+            group_columns += [Warehouse.id.label("warehouse_id"), Warehouse.name.label("warehouse_name")]
+        if group_by in ("category", "warehouse_category"):
+            group_columns += [
+                ProductCategory.id.label("category_id"),
+                ProductCategory.name.label("category_name"),
+            ]
+
+        query = (
+            db.query(
+                *group_columns,
+                func.count().filter(InventoryValuation.quantity > _ZERO).label("product_count"),
+                func.coalesce(func.sum(InventoryValuation.quantity), 0).label("quantity"),
+                func.coalesce(func.sum(value), 0).label("value"),
+            )
+            .select_from(InventoryValuation)
+            .join(Warehouse, Warehouse.id == InventoryValuation.warehouse_id)
+            .join(Product, Product.id == InventoryValuation.product_id)
+            .outerjoin(ProductCategory, ProductCategory.id == Product.category_id)
+        )
+        if warehouse_id:
+            query = query.filter(InventoryValuation.warehouse_id == warehouse_id)
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        if group_columns:
+            query = query.group_by(*group_columns).order_by(*group_columns)
+
+        items = [row._asdict() for row in query.all()]
+        return {
+            "method": method,
+            "group_by": group_by,
+            "total_quantity": sum(item["quantity"] for item in items),
+            "total_value": sum(item["value"] for item in items),
+            "items": items,
+        }
+
+    @staticmethod
+    def get_valuations(
+        db: Session,
+        warehouse_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Tuple[InventoryValuation, str, str]]:
+        """[(valuation, sku, name)] theo (warehouse_id, product_id), bỏ dòng đã hết hàng"""
+        query = (
+            db.query(InventoryValuation, Product.sku, Product.name)
+            .join(Product, Product.id == InventoryValuation.product_id)
+            .filter(InventoryValuation.quantity > _ZERO)
+        )
+        if warehouse_id:
+            query = query.filter(InventoryValuation.warehouse_id == warehouse_id)
+        if product_id:
+            query = query.filter(InventoryValuation.product_id == product_id)
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        return (
+            query.order_by(InventoryValuation.warehouse_id, InventoryValuation.product_id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
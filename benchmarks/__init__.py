@@ -0,0 +1,17 @@
+"""
+Robis ERP benchmark suite
+
+Load test mô phỏng traffic thật, chạy với API local + Postgres đã seed:
+
+- kiosk_checkin: burst chấm công buổi sáng qua /api/v1/public/attendance/check-in
+- order_peak: tạo đơn hàng dồn dập
+- export_contention: nhiều request xuất kho cùng 1 sản phẩm
+- export_fefo: xuất kho cùng 1 sản phẩm, mỗi request chia qua nhiều batch
+- import_single / import_bulk: nhận hàng từng dòng vs 200 dòng / request (bulk)
+- reports: các query list/report (orders, movements, stock summary, employees...)
+
+Kết quả p50/p95/p99 + throughput ghi ra JSON để so sánh giữa các commit.
+
+Usage:
+    python -m benchmarks --base-url http://localhost:8000 --scale small
+"""
@@ -0,0 +1,138 @@
+"""
+Chạy benchmark suite
+
+    python -m benchmarks --base-url http://localhost:8000 --scale small
+    python -m benchmarks --scenarios kiosk_checkin,reports --concurrency 100 \\
+        --output bench-results.json
+
+Yêu cầu:
+    - API đang chạy tại --base-url, dùng cùng database với .env
+    - ATTEND_PUBLIC_TOKEN (hoặc --kiosk-token) cho scenario kiosk_checkin
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+from datetime import date, datetime, timezone
+
+import httpx
+
+from app.core.config import settings
+from benchmarks import seed as bench_seed
+from benchmarks.runner import run_scenario
+from benchmarks.scenarios import SCENARIOS
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Robis ERP benchmark suite")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scale", choices=sorted(bench_seed.SCALES), default="small")
+    parser.add_argument("--employees", type=int, help="Ghi đè số employees của scale")
+    parser.add_argument("--products", type=int, help="Ghi đè số products của scale")
+    parser.add_argument("--customers", type=int, help="Ghi đè số customers của scale")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Danh sách scenario, cách nhau bởi dấu phẩy ({', '.join(SCENARIOS)})",
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Số request mỗi scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--kiosk-token", default=settings.ATTEND_PUBLIC_TOKEN)
+    parser.add_argument("--skip-seed", action="store_true", help="Không seed lại dữ liệu")
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file (mặc định: stdout)")
+    return parser.parse_args(argv)
+
+
+async def _login(client: httpx.AsyncClient) -> dict:
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": bench_seed.BENCH_USERNAME, "password": bench_seed.BENCH_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    scale = dict(bench_seed.SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key):
+            scale[key] = getattr(args, key)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenario: {', '.join(sorted(unknown))}")
+
+    data = bench_seed.seed(**scale)
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        headers = await _login(client)
+
+        for name in names:
+            rng = random.Random(args.seed)
+            total = args.requests
+            if name == "kiosk_checkin":
+                if not args.kiosk_token:
+                    raise SystemExit("kiosk_checkin cần ATTEND_PUBLIC_TOKEN hoặc --kiosk-token")
+                # Mỗi nhân viên chỉ check-in 1 lần/ngày
+                bench_seed.reset_attendance(data.employee_ids, date.today())
+                total = min(total, len(data.employee_ids))
+                requests = SCENARIOS[name](data, args.kiosk_token, rng)
+            else:
+                requests = SCENARIOS[name](data, headers, rng)
+
+            result = await run_scenario(name, client, requests, total, args.concurrency)
+            results[name] = result.summary()
+            print(
+                f"{name}: {result.summary()['throughput_rps']} req/s, "
+                f"p95 {result.summary()['latency_ms'].get('p95')} ms, "
+                f"errors {result.errors}",
+                file=sys.stderr,
+            )
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "scale": args.scale,
+            "dataset": data.to_dict(),
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Benchmark runner - chạy request song song và tổng hợp latency
+
+Closed-loop: `concurrency` worker, mỗi worker lấy request kế tiếp từ
+generator của scenario cho tới khi đủ `total_requests`.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+
+@dataclass
+class BenchRequest:
+    method: str
+    path: str
+    json: Optional[Any] = None
+    params: Optional[Dict[str, Any]] = None
+    headers: Optional[Dict[str, str]] = None
+    # Nhãn để tách latency theo loại request trong cùng scenario (VD: reports)
+    label: str = ""
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    by_label: Dict[str, List[float]] = field(default_factory=dict)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def record(self, request: BenchRequest, latency: float, status: int) -> None:
+        self.latencies.append(latency)
+        self.statuses[str(status)] += 1
+        if status >= 400:
+            self.errors += 1
+        if request.label:
+            self.by_label.setdefault(request.label, []).append(latency)
+
+    def summary(self) -> Dict[str, Any]:
+        total = len(self.latencies)
+        data = {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "status_counts": dict(self.statuses),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput_rps": round(total / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_ms": latency_summary(self.latencies),
+        }
+        if self.by_label:
+            data["by_label"] = {
+                label: latency_summary(values)
+                for label, values in sorted(self.by_label.items())
+            }
+        return data
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile theo nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    if not values:
+        return {}
+    ms = lambda v: round(v * 1000, 2)  # noqa: E731
+    return {
+        "p50": ms(percentile(values, 50)),
+        "p95": ms(percentile(values, 95)),
+        "p99": ms(percentile(values, 99)),
+        "mean": ms(sum(values) / len(values)),
+        "min": ms(values[0]),
+        "max": ms(values[-1]),
+    }
+
+
+async def run_scenario(
+    name: str,
+    client: httpx.AsyncClient,
+    requests: Iterator[BenchRequest],
+    total_requests: int,
+    concurrency: int,
+    on_response: Optional[Callable[[BenchRequest, httpx.Response], None]] = None,
+) -> ScenarioResult:
+    """Chạy 1 scenario, trả về latency + status của từng request"""
+    result = ScenarioResult(name=name)
+    remaining = total_requests
+    lock = asyncio.Lock()
+
+    async def next_request() -> Optional[BenchRequest]:
+        nonlocal remaining
+        async with lock:
+            if remaining <= 0:
+                return None
+            remaining -= 1
+            return next(requests, None)
+
+    async def worker() -> None:
+        while True:
+            request = await next_request()
+            if request is None:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    request.method,
+                    request.path,
+                    json=request.json,
+                    params=request.params,
+                    headers=request.headers,
+                )
+                status = response.status_code
+            except httpx.HTTPError:
+                response, status = None, 599
+            result.record(request, time.perf_counter() - start, status)
+            if on_response and response is not None:
+                on_response(request, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
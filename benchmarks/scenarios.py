@@ -0,0 +1,172 @@
+"""
+Benchmark scenarios - sinh request mô phỏng traffic thật
+
+Mỗi scenario là 1 generator vô hạn các BenchRequest, random có seed cố định
+để 2 lần chạy trên cùng dữ liệu gửi cùng chuỗi request.
+"""
+
+import random
+from datetime import date, time
+from typing import Callable, Dict, Iterator
+
+from benchmarks.runner import BenchRequest
+from benchmarks.seed import SeedResult
+
+API = "/api/v1"
+
+# Số dòng mỗi request của import_bulk (lines/s = throughput_rps * BULK_IMPORT_LINES)
+BULK_IMPORT_LINES = 200
+
+
+def kiosk_checkin(data: SeedResult, kiosk_token: str, rng: random.Random) -> Iterator[BenchRequest]:
+    """
+    Burst chấm công buổi sáng: mỗi nhân viên check-in 1 lần, giờ check-in
+    rải trong khoảng 8:30 - 9:30 (có người đi muộn)
+    """
+    employee_ids = list(data.employee_ids)
+    rng.shuffle(employee_ids)
+    headers = {"Authorization": f"Bearer {kiosk_token}"}
+    for employee_id in employee_ids:
+        minutes = rng.randint(0, 60)
+        check_in = time(8 + (30 + minutes) // 60, (30 + minutes) % 60)
+        yield BenchRequest(
+            "POST",
+            f"{API}/public/attendance/check-in",
+            json={"employee_id": employee_id, "check_in": check_in.isoformat()},
+            headers=headers,
+        )
+
+
+def order_peak(data: SeedResult, headers: Dict[str, str], rng: random.Random) -> Iterator[BenchRequest]:
+    """Tạo đơn B2C 1-5 dòng hàng, khách và sản phẩm ngẫu nhiên"""
+    while True:
+        product_ids = rng.sample(data.product_ids, k=min(len(data.product_ids), rng.randint(1, 5)))
+        yield BenchRequest(
+            "POST",
+            f"{API}/orders/",
+            json={
+                "customer_id": rng.choice(data.customer_ids),
+                "order_type": "b2c",
+                "payment_method": "cash",
+                "items": [
+                    {
+                        "product_id": product_id,
+                        "product_name": f"Bench Product {product_id}",
+                        "unit_price": 100000,
+                        "quantity": rng.randint(1, 10),
+                    }
+                    for product_id in product_ids
+                ],
+            },
+            headers=headers,
+        )
+
+
+def export_contention(data: SeedResult, headers: Dict[str, str], rng: random.Random) -> Iterator[BenchRequest]:
+    """Nhiều request xuất kho cùng 1 sản phẩm / kho (tranh chấp cùng dòng stock)"""
+    while True:
+        yield BenchRequest(
+            "POST",
+            f"{API}/stock/export",
+            json={
+                "movement_type": "export",
+                "product_id": data.contention_product_id,
+                "warehouse_id": data.warehouse_id,
+                "quantity": 1,
+                "reference_type": "benchmark",
+            },
+            headers=headers,
+        )
+
+
+def export_fefo(data: SeedResult, headers: Dict[str, str], rng: random.Random) -> Iterator[BenchRequest]:
+    """Xuất kho cùng 1 SKU với số lượng lớn hơn 1 batch (chia FEFO qua nhiều batch)"""
+    while True:
+        yield BenchRequest(
+            "POST",
+            f"{API}/stock/export",
+            json={
+                "movement_type": "export",
+                "product_id": data.contention_product_id,
+                "warehouse_id": data.warehouse_id,
+                "quantity": rng.randint(50, 750),
+                "reference_type": "benchmark",
+            },
+            headers=headers,
+        )
+
+
+def _import_line(data: SeedResult, rng: random.Random) -> dict:
+    product_id, batch_id = rng.choice(data.import_batches)
+    return {
+        "movement_type": "import",
+        "product_id": product_id,
+        "batch_id": batch_id,
+        "warehouse_id": data.warehouse_id,
+        "quantity": rng.randint(1, 20),
+        "reference_type": "benchmark",
+    }
+
+
+def import_single(data: SeedResult, headers: Dict[str, str], rng: random.Random) -> Iterator[BenchRequest]:
+    """Nhận hàng từng dòng qua /stock/import (baseline cho import_bulk)"""
+    while True:
+        yield BenchRequest(
+            "POST", f"{API}/stock/import", json=_import_line(data, rng), headers=headers
+        )
+
+
+def import_bulk(data: SeedResult, headers: Dict[str, str], rng: random.Random) -> Iterator[BenchRequest]:
+    """Nhận hàng BULK_IMPORT_LINES dòng / request qua /stock/movements/bulk"""
+    while True:
+        yield BenchRequest(
+            "POST",
+            f"{API}/stock/movements/bulk",
+            json=[_import_line(data, rng) for _ in range(BULK_IMPORT_LINES)],
+            headers=headers,
+        )
+
+
+def reports(data: SeedResult, headers: Dict[str, str], rng: random.Random) -> Iterator[BenchRequest]:
+    """Mix các query list/report, latency tách theo label"""
+    month = date.today().strftime("%Y-%m")
+    deep_page = max(len(data.employee_ids) // 20, 1)
+
+    builders: Dict[str, Callable[[], BenchRequest]] = {
+        "orders_list": lambda: BenchRequest(
+            "GET", f"{API}/orders/", params={"page": rng.randint(1, 5), "page_size": 20}
+        ),
+        "orders_cursor": lambda: BenchRequest(
+            "GET", f"{API}/orders/", params={"pagination": "cursor", "page_size": 20}
+        ),
+        "movements_list": lambda: BenchRequest(
+            "GET", f"{API}/stock/movements", params={"page": 1, "page_size": 50}
+        ),
+        "stock_summary": lambda: BenchRequest("GET", f"{API}/stock/summary"),
+        "employees_deep_page": lambda: BenchRequest(
+            "GET", f"{API}/employees", params={"page": rng.randint(1, deep_page), "page_size": 20}
+        ),
+        "monthly_report": lambda: BenchRequest(
+            "GET",
+            f"{API}/attendance/report/monthly/{rng.choice(data.employee_ids)}",
+            params={"month": month},
+        ),
+    }
+    labels = list(builders)
+    while True:
+        label = rng.choice(labels)
+        request = builders[label]()
+        request.label = label
+        request.headers = headers
+        yield request
+
+
+SCENARIOS = {
+    "kiosk_checkin": kiosk_checkin,
+    "order_peak": order_peak,
+    "export_contention": export_contention,
+    "export_fefo": export_fefo,
+    "import_single": import_single,
+    "import_bulk": import_bulk,
+    "reports": reports,
+}
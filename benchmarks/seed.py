@@ -0,0 +1,251 @@
+"""
+Seed dữ liệu cho benchmark
+
+Tất cả dữ liệu benchmark có prefix BENCH để seed lại nhiều lần không bị
+trùng và không đụng dữ liệu thật. Ghi thẳng vào DB cấu hình trong .env
+(DB_HOST, DB_NAME, ...) qua SessionLocal.
+"""
+
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from app.core.security import get_password_hash
+from app.db.database import SessionLocal
+from app.models.customer import Customer, CustomerType
+from app.models.hr import Department, DepartmentType, Employee, Position
+from app.models.inventory import Batch, BatchStock, Stock, Warehouse
+from app.models.product import Product, ProductCategory
+from app.models.user import User
+from app.services.stock_summary_service import StockSummaryService
+
+BENCH_USERNAME = "bench_admin"
+BENCH_PASSWORD = "bench-password"
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"employees": 200, "products": 50, "customers": 100},
+    "medium": {"employees": 2000, "products": 500, "customers": 1000},
+    "large": {"employees": 20000, "products": 5000, "customers": 10000},
+}
+
+# Tồn kho ban đầu của sản phẩm dùng cho export_contention
+CONTENTION_STOCK = 1_000_000
+# Sản phẩm tranh chấp chia thành nhiều batch nhỏ: export_fefo xuất qua nhiều batch
+CONTENTION_BATCHES = 2000
+
+
+@dataclass
+class SeedResult:
+    """ID của dữ liệu benchmark, dùng để sinh request"""
+
+    employee_ids: List[int] = field(default_factory=list)
+    product_ids: List[int] = field(default_factory=list)
+    customer_ids: List[int] = field(default_factory=list)
+    warehouse_id: int = 0
+    contention_product_id: int = 0
+    # (product_id, batch_id) của các product còn lại (1 batch / product), cho import_*
+    import_batches: List[Tuple[int, int]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("import_batches")
+        # Chỉ giữ số lượng trong report, không in cả list ID
+        for key in ("employee_ids", "product_ids", "customer_ids"):
+            data[key.replace("_ids", "_count")] = len(data.pop(key))
+        return data
+
+
+def _get_or_create(db, model, defaults=None, **filters):
+    instance = db.query(model).filter_by(**filters).first()
+    if instance is None:
+        instance = model(**filters, **(defaults or {}))
+        db.add(instance)
+        db.flush()
+    return instance
+
+
+def _ensure_user(db) -> None:
+    _get_or_create(
+        db,
+        User,
+        username=BENCH_USERNAME,
+        defaults={
+            "email": "bench_admin@robis-bench.com",
+            "hashed_password": get_password_hash(BENCH_PASSWORD),
+            "full_name": "Benchmark Admin",
+            "is_active": True,
+            "is_superuser": True,
+        },
+    )
+
+
+def _ensure_employees(db, count: int) -> List[int]:
+    department = _get_or_create(
+        db, Department, name="BENCH Operations", defaults={"type": DepartmentType.OPERATION}
+    )
+    position = _get_or_create(
+        db,
+        Position,
+        title="BENCH Staff",
+        defaults={"level": 1, "department_id": department.id},
+    )
+
+    existing = db.query(Employee.id).filter(Employee.employee_code.like("BENCH%")).count()
+    db.add_all(
+        Employee(
+            employee_code=f"BENCH{i:06d}",
+            full_name=f"Bench Employee {i}",
+            email=f"bench{i}@robis-bench.com",
+            department_id=department.id,
+            position_id=position.id,
+            hire_date=date(2024, 1, 1),
+        )
+        for i in range(existing, count)
+    )
+    db.flush()
+
+    rows = (
+        db.query(Employee.id)
+        .filter(Employee.employee_code.like("BENCH%"))
+        .order_by(Employee.id)
+        .limit(count)
+        .all()
+    )
+    return [r.id for r in rows]
+
+
+def _ensure_products(db, count: int, warehouse: Warehouse) -> List[int]:
+    category = _get_or_create(db, ProductCategory, name="BENCH Category")
+
+    existing = db.query(Product.id).filter(Product.sku.like("BENCH-%")).count()
+    db.add_all(
+        Product(
+            sku=f"BENCH-{i:06d}",
+            name=f"Bench Product {i}",
+            category_id=category.id,
+            unit_price=100000 + i,
+            cost_price=60000 + i,
+            min_stock=10,
+        )
+        for i in range(existing, count)
+    )
+    db.flush()
+
+    products = (
+        db.query(Product)
+        .filter(Product.sku.like("BENCH-%"))
+        .order_by(Product.id)
+        .limit(count)
+        .all()
+    )
+
+    # Mỗi product có 1 batch QC passed + stock ở warehouse benchmark; product đầu
+    # tiên (export_contention / export_fefo) có CONTENTION_BATCHES batch, hạn tăng dần
+    has_batch = {
+        r.product_id
+        for r in db.query(Batch.product_id).filter(Batch.batch_number.like("BENCH-%"))
+    }
+    for index, product in enumerate(products):
+        if product.id in has_batch:
+            continue
+        batch_count = CONTENTION_BATCHES if index == 0 else 1
+        for n in range(batch_count):
+            quantity = CONTENTION_STOCK / batch_count
+            batch = Batch(
+                batch_number=f"BENCH-{product.sku}" + (f"-{n:04d}" if batch_count > 1 else ""),
+                product_id=product.id,
+                initial_quantity=quantity,
+                current_quantity=quantity,
+                expiry_date=date.today() + timedelta(days=365 + n),
+                qc_status="passed",
+                is_active=True,
+            )
+            db.add(batch)
+            db.add(
+                BatchStock(
+                    batch=batch,
+                    warehouse_id=warehouse.id,
+                    product_id=product.id,
+                    quantity=quantity,
+                )
+            )
+        db.add(
+            Stock(warehouse_id=warehouse.id, product_id=product.id, quantity=CONTENTION_STOCK)
+        )
+    db.flush()
+
+    return [p.id for p in products]
+
+
+def _ensure_customers(db, count: int) -> List[int]:
+    existing = (
+        db.query(Customer.id).filter(Customer.customer_code.like("BENCH-%")).count()
+    )
+    db.add_all(
+        Customer(
+            customer_code=f"BENCH-{i:06d}",
+            customer_type=CustomerType.B2C,
+            name=f"Bench Customer {i}",
+            email=f"customer{i}@robis-bench.com",
+            is_active=True,
+        )
+        for i in range(existing, count)
+    )
+    db.flush()
+
+    rows = (
+        db.query(Customer.id)
+        .filter(Customer.customer_code.like("BENCH-%"))
+        .order_by(Customer.id)
+        .limit(count)
+        .all()
+    )
+    return [r.id for r in rows]
+
+
+def seed(employees: int, products: int, customers: int) -> SeedResult:
+    """Seed (idempotent) dữ liệu benchmark theo scale"""
+    db = SessionLocal()
+    try:
+        _ensure_user(db)
+        warehouse = _get_or_create(db, Warehouse, code="BENCH-WH", defaults={"name": "Bench Warehouse"})
+
+        result = SeedResult(
+            employee_ids=_ensure_employees(db, employees),
+            product_ids=_ensure_products(db, products, warehouse),
+            customer_ids=_ensure_customers(db, customers),
+            warehouse_id=warehouse.id,
+        )
+        result.contention_product_id = result.product_ids[0]
+        result.import_batches = [
+            (r.product_id, r.id)
+            for r in db.query(Batch.product_id, Batch.id)
+            .filter(
+                Batch.batch_number.like("BENCH-%"),
+                Batch.product_id.in_(result.product_ids[1:]),
+            )
+            .order_by(Batch.id)
+        ]
+        # Stock / batch BENCH ghi thẳng qua ORM -> tính lại stock summary
+        StockSummaryService.rebuild(db)
+        db.commit()
+        return result
+    finally:
+        db.close()
+
+
+def reset_attendance(employee_ids: List[int], day: date) -> None:
+    """Xóa chấm công của nhân viên benchmark trong ngày để chạy lại kiosk burst"""
+    if not employee_ids:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("DELETE FROM attendance WHERE date = :day AND employee_id = ANY(:ids)"),
+            {"day": day, "ids": employee_ids},
+        )
+        db.commit()
+    finally:
+        db.close()